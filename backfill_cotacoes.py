@@ -0,0 +1,443 @@
+"""
+⏪ BACKFILL: HISTÓRICO DIÁRIO DA AWESOMEAPI
+============================================
+
+OBJETIVO:
+- Semear o histórico com meses/anos de cotações diárias, para vários pares
+- Ler a resposta como FLUXO (item a item), sem montar listas gigantes
+- Gravar em blocos: executemany no SQLite local ou append_rows no Sheets
+- Pular o que já existe e continuar de onde parou se for interrompido
+
+COMO FUNCIONA:
+1. O período é dividido em janelas (ex: 90 dias) → uma requisição cada
+   GET /json/daily/USD-BRL/91?start_date=20240101&end_date=20240330
+2. A resposta é lida em pedaços e decodificada um objeto por vez
+3. A cada bloco gravado, o progresso vai para um SQLite (backfill_progresso.db):
+   janela + quantos itens já foram gravados
+4. Na próxima execução:
+   - janela concluída → pulada sem ir à rede
+   - janela pela metade → baixada de novo, pulando os itens já gravados
+   - destino local: janela que já tem todos os dias úteis no histórico
+     → pulada (mesmo sem checkpoint, ex: gravados pelo monitor)
+
+USO:
+    python cli.py backfill USD-BRL EUR-BRL --dias 730
+    python cli.py backfill USD-BRL --destino sheets
+"""
+
+import codecs
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+import cliente_http
+import cotacao_moedas
+from cotacao_moedas import normalizar_par
+from metricas import cronometrar, log
+
+ARQUIVO_PROGRESSO = os.getenv('BACKFILL_DB', 'backfill_progresso.db')
+
+DIAS_POR_JANELA = 90
+TAMANHO_PEDACO = 64 * 1024     # bytes lidos da rede por vez
+PARALELO_PADRAO = 4            # pares baixados ao mesmo tempo
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS progresso (
+    destino    TEXT    NOT NULL,
+    par        TEXT    NOT NULL,
+    inicio     TEXT    NOT NULL,
+    fim        TEXT    NOT NULL,
+    gravados   INTEGER NOT NULL DEFAULT 0,
+    concluida  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (destino, par, inicio)
+) WITHOUT ROWID
+"""
+
+
+# ============================================
+# 🌊 LEITURA EM FLUXO
+# ============================================
+
+def ler_array_json(pedacos):
+    """
+    Decodifica um array JSON que chega em pedaços, um item por vez
+
+    PARÂMETROS:
+    - pedacos: iterável de bytes (ex: resposta.iter_content())
+
+    COMO FUNCIONA:
+    - Junta bytes só até fechar o próximo objeto
+    - raw_decode() lê UM valor e diz onde ele terminou
+    - Memória ≈ tamanho de um pedaço, não da resposta inteira
+
+    RETORNA:
+    - gerador de itens do array
+    """
+    decodificador = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    texto = ''
+    posicao = 0
+    dentro = False
+
+    for pedaco in pedacos:
+        texto = texto[posicao:] + utf8.decode(pedaco)
+        posicao = 0
+
+        while True:
+            # Pula espaços, o '[' inicial e as vírgulas entre itens
+            while posicao < len(texto) and texto[posicao] in ' \t\r\n,[':
+                if texto[posicao] == '[':
+                    if dentro:
+                        break
+                    dentro = True
+                posicao += 1
+
+            if posicao >= len(texto):
+                break
+            if texto[posicao] == ']':
+                return
+
+            try:
+                item, fim = decodificador.raw_decode(texto, posicao)
+            except json.JSONDecodeError:
+                break   # objeto incompleto: espera o próximo pedaço
+            posicao = fim
+            yield item
+
+    restante = texto[posicao:].strip()
+    if restante not in ('', ']'):
+        raise ValueError(f"JSON truncado no fim da resposta: {restante[:50]!r}")
+
+
+def baixar_janela(par, inicio, fim, timeout=30):
+    """
+    Cotações diárias de um par entre inicio e fim (datas), em fluxo
+
+    RETORNA:
+    - gerador de tuplas (par, ts, bid, ask, pct), como o histórico grava
+    """
+    dias = (fim - inicio).days + 1
+    url = (f"{cotacao_moedas.URL_BASE_AWESOMEAPI}/json/daily/{par}/{dias}"
+           f"?start_date={inicio:%Y%m%d}&end_date={fim:%Y%m%d}")
+
+    with cliente_http.get(url, timeout=timeout, stream=True) as resposta:
+        resposta.raise_for_status()
+        for dia in ler_array_json(resposta.iter_content(TAMANHO_PEDACO)):
+            yield (
+                par,
+                int(dia['timestamp']),
+                float(dia['bid']),
+                float(dia['ask']) if dia.get('ask') else None,
+                float(dia['pctChange']) if dia.get('pctChange') else None,
+            )
+
+
+def dividir_periodo(inicio, fim, dias_por_janela=DIAS_POR_JANELA):
+    """Janelas (inicio, fim) consecutivas, da mais antiga para a mais nova"""
+    janelas = []
+    atual = inicio
+    while atual <= fim:
+        ultimo = min(fim, atual + timedelta(days=dias_por_janela - 1))
+        janelas.append((atual, ultimo))
+        atual = ultimo + timedelta(days=1)
+    return janelas
+
+
+def dias_uteis(inicio, fim):
+    """Quantos dias de segunda a sexta existem entre inicio e fim"""
+    return sum(1 for n in range((fim - inicio).days + 1)
+               if (inicio + timedelta(days=n)).weekday() < 5)
+
+
+def _epoch(dia):
+    return int(datetime(dia.year, dia.month, dia.day, tzinfo=timezone.utc).timestamp())
+
+
+# ============================================
+# 💾 PROGRESSO (para continuar de onde parou)
+# ============================================
+
+class ProgressoBackfill:
+    """
+    Quanto de cada janela já foi gravado
+
+    PARÂMETROS:
+    - caminho: arquivo SQLite (':memory:' para testes)
+    """
+
+    def __init__(self, caminho=ARQUIVO_PROGRESSO):
+        self.caminho = caminho
+        self._conexao = None
+        self._trava = threading.Lock()
+
+    def _conectar(self):
+        if self._conexao is None:
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute(ESQUEMA)
+            self._conexao = conexao
+        return self._conexao
+
+    def situacao(self, destino, par, inicio):
+        """RETORNA: (gravados, concluida) da janela — (0, False) se nova"""
+        with self._trava:
+            linha = self._conectar().execute(
+                "SELECT gravados, concluida FROM progresso WHERE destino = ? AND par = ? AND inicio = ?",
+                (destino, par, inicio.isoformat()),
+            ).fetchone()
+        return (linha[0], bool(linha[1])) if linha else (0, False)
+
+    def salvar(self, destino, par, inicio, fim, gravados, concluida=False):
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                conexao.execute(
+                    "INSERT OR REPLACE INTO progresso VALUES (?, ?, ?, ?, ?, ?)",
+                    (destino, par, inicio.isoformat(), fim.isoformat(), gravados, int(concluida)),
+                )
+
+    def fechar(self):
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+# ============================================
+# 📤 DESTINOS
+# ============================================
+
+class DestinoLocal:
+    """Histórico SQLite local (historico_cotacoes)"""
+
+    nome = 'local'
+    tamanho_bloco = 5000
+
+    def __init__(self, historico=None):
+        if historico is None:
+            from historico_cotacoes import historico_padrao as historico
+        self.historico = historico
+
+    def ja_presente(self, par, inicio, fim):
+        """True se o histórico já tem (pelo menos) todos os dias úteis da janela"""
+        velas = self.historico.ohlc(par, _epoch(inicio), _epoch(fim + timedelta(days=1)), 'dia')
+        return len(velas) >= dias_uteis(inicio, fim)
+
+    def gravar(self, linhas):
+        self.historico.gravar_linhas(linhas)
+
+
+class DestinoSheets:
+    """
+    Planilha do Google: um append_rows por bloco
+
+    ⚠️ CUIDADO: o Sheets não deduplica — aqui só o progresso evita
+    linhas repetidas (ja_presente é sempre False)
+    """
+
+    nome = 'sheets'
+    tamanho_bloco = 500
+
+    def __init__(self, aba):
+        self.aba = aba
+        self._trava = threading.Lock()   # pares em paralelo, uma escrita por vez
+
+    def ja_presente(self, par, inicio, fim):
+        return False
+
+    def gravar(self, linhas):
+        # Mesmas colunas do Projeto 2: Data/Hora | Moeda | Cotação
+        valores = [
+            [datetime.fromtimestamp(ts).strftime('%d/%m/%Y %H:%M:%S'), par.replace('-', '/'), bid]
+            for par, ts, bid, _, _ in linhas
+        ]
+        with self._trava, cronometrar('sheets_append'):
+            self.aba.append_rows(valores, value_input_option='USER_ENTERED')
+
+
+# ============================================
+# 🚀 EXECUÇÃO
+# ============================================
+
+def preencher_par(par, inicio, fim, destino, progresso, dias_por_janela=DIAS_POR_JANELA):
+    """
+    Baixa e grava todas as janelas de um par
+
+    Um erro no meio para o par, mas o progresso já salvo vale:
+    rodar de novo continua do último bloco gravado
+
+    RETORNA:
+    - dict {'linhas', 'baixadas', 'puladas'} (+ 'erro' se parou antes)
+    """
+    resumo = {'linhas': 0, 'baixadas': 0, 'puladas': 0}
+    try:
+        _preencher_janelas(par, inicio, fim, destino, progresso, dias_por_janela, resumo)
+    except Exception as e:
+        resumo['erro'] = str(e)
+        log.erro('backfill_falhou', "❌ Backfill interrompido", par=par, erro=str(e),
+                 linhas=resumo['linhas'])
+    return resumo
+
+
+def _preencher_janelas(par, inicio, fim, destino, progresso, dias_por_janela, resumo):
+    hoje = date.today()
+
+    for comeco, final in dividir_periodo(inicio, fim, dias_por_janela):
+        gravados, concluida = progresso.situacao(destino.nome, par, comeco)
+        if concluida:
+            resumo['puladas'] += 1
+            continue
+        if final < hoje and destino.ja_presente(par, comeco, final):
+            progresso.salvar(destino.nome, par, comeco, final, 0, concluida=True)
+            resumo['puladas'] += 1
+            continue
+
+        with cronometrar('backfill_janela'):
+            bloco = []
+            vistos = 0
+            for linha in baixar_janela(par, comeco, final):
+                vistos += 1
+                if vistos <= gravados:
+                    continue   # já gravado antes da interrupção
+                bloco.append(linha)
+                if len(bloco) >= destino.tamanho_bloco:
+                    destino.gravar(bloco)
+                    resumo['linhas'] += len(bloco)
+                    progresso.salvar(destino.nome, par, comeco, final, vistos)
+                    bloco = []
+
+            if bloco:
+                destino.gravar(bloco)
+                resumo['linhas'] += len(bloco)
+
+            # A janela de hoje ainda vai crescer: não fica marcada como concluída
+            progresso.salvar(destino.nome, par, comeco, final, vistos, concluida=final < hoje)
+        resumo['baixadas'] += 1
+
+
+def executar_backfill(pares, dias=365, fim=None, destino='local', planilha_id=None,
+                      paralelo=PARALELO_PADRAO, dias_por_janela=DIAS_POR_JANELA, progresso=None):
+    """
+    Preenche o histórico dos últimos `dias` dias de cada par
+
+    PARÂMETROS:
+    - destino: 'local' (SQLite) ou 'sheets', ou um objeto com
+      nome / tamanho_bloco / ja_presente() / gravar()
+    - planilha_id: para destino='sheets' (padrão: planilha da configuração)
+    - paralelo: quantos pares baixar ao mesmo tempo
+
+    RETORNA:
+    - dict {'linhas', 'baixadas', 'puladas', 'erros', 'segundos', 'linhas_por_s', 'pares'}
+    """
+    fim = fim or date.today()
+    inicio = fim - timedelta(days=dias - 1)
+    progresso = progresso or ProgressoBackfill()
+
+    if destino == 'local':
+        destino = DestinoLocal()
+    elif destino == 'sheets':
+        from conexao_sheets import obter_aba
+        if planilha_id is None:
+            from configuracao import obter as obter_config
+            planilha_id = obter_config().planilha_id
+        destino = DestinoSheets(obter_aba(planilha_id))
+
+    def um_par(par):
+        return preencher_par(par, inicio, fim, destino, progresso, dias_por_janela)
+
+    pares = [normalizar_par(par) for par in pares]
+    comeco = time.perf_counter()
+    with ThreadPoolExecutor(max(1, min(paralelo, len(pares)))) as pool:
+        por_par = dict(zip(pares, pool.map(um_par, pares)))
+    segundos = time.perf_counter() - comeco
+
+    linhas = sum(r['linhas'] for r in por_par.values())
+    resumo = {
+        'linhas': linhas,
+        'baixadas': sum(r['baixadas'] for r in por_par.values()),
+        'puladas': sum(r['puladas'] for r in por_par.values()),
+        'erros': sum(1 for r in por_par.values() if 'erro' in r),
+        'segundos': segundos,
+        'linhas_por_s': linhas / segundos if segundos else 0.0,
+        'pares': por_par,
+    }
+    log.info('backfill_concluido', "⏪ Backfill concluído", destino=destino.nome,
+             linhas=linhas, janelas_baixadas=resumo['baixadas'], janelas_puladas=resumo['puladas'],
+             linhas_por_s=round(resumo['linhas_por_s'], 1))
+    return resumo
+
+
+# ============================================
+# 📏 BENCHMARK (servidor fake)
+# ============================================
+
+def benchmark(pares=20, dias=3 * 365, latencia=0.02):
+    """
+    Backfill de `pares` pares x `dias` dias contra o ServidorFake
+
+    Mede três execuções no mesmo histórico:
+    1. interrompida: o destino "quebra" no meio
+    2. retomada: continua de onde parou
+    3. repetida: tudo já presente → nenhuma janela baixada
+    """
+    import tempfile
+
+    from historico_cotacoes import HistoricoCotacoes
+    from servidores_fake import ServidorFake
+
+    moedas = ['USD', 'EUR', 'GBP', 'JPY', 'ARS', 'CAD', 'AUD', 'CHF', 'CNY', 'MXN',
+              'CLP', 'COP', 'PEN', 'UYU', 'ZAR', 'INR', 'KRW', 'SEK', 'NOK', 'DKK']
+    lista = [f"{moeda}-BRL" for moeda in moedas[:pares]]
+    pasta = tempfile.mkdtemp(prefix='backfill_')
+    historico = HistoricoCotacoes(os.path.join(pasta, 'historico.db'))
+    progresso = ProgressoBackfill(os.path.join(pasta, 'progresso.db'))
+
+    class DestinoQueQuebra(DestinoLocal):
+        """Falha depois de `limite` blocos (simula queda no meio)"""
+        tamanho_bloco = 20
+
+        def __init__(self, historico, limite):
+            super().__init__(historico)
+            self.limite = limite
+            self._trava = threading.Lock()
+
+        def gravar(self, linhas):
+            with self._trava:
+                self.limite -= 1
+                if self.limite < 0:
+                    raise RuntimeError("queda simulada")
+            super().gravar(linhas)
+
+    resultados = {}
+    original = cotacao_moedas.URL_BASE_AWESOMEAPI
+    with ServidorFake(latencia=latencia) as servidor:
+        cotacao_moedas.URL_BASE_AWESOMEAPI = servidor.url
+        try:
+            for nome, destino in (('interrompida', DestinoQueQuebra(historico, 100)),
+                                  ('retomada', DestinoLocal(historico)),
+                                  ('repetida', DestinoLocal(historico))):
+                antes = len(servidor.requisicoes)
+                resultado = executar_backfill(lista, dias, destino=destino, progresso=progresso)
+                resultado.pop('pares')
+                resultado['requisicoes'] = len(servidor.requisicoes) - antes
+                resultados[nome] = resultado
+        finally:
+            cotacao_moedas.URL_BASE_AWESOMEAPI = original
+
+    total = sum(len(historico.intervalo(par)) for par in lista)
+    return {'execucoes': resultados, 'linhas_no_historico': total}
+
+
+if __name__ == "__main__":
+    r = benchmark()
+    for nome, execucao in r['execucoes'].items():
+        print(f"⏪ {nome:<12} {execucao['linhas']:>6} linhas em {execucao['segundos']:.2f}s "
+              f"({execucao['linhas_por_s']:,.0f}/s) | janelas baixadas: {execucao['baixadas']}, "
+              f"puladas: {execucao['puladas']} | requisições: {execucao['requisicoes']} | "
+              f"pares com erro: {execucao['erros']}")
+    print(f"🗃️ Linhas no histórico: {r['linhas_no_historico']}")
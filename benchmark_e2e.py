@@ -0,0 +1,354 @@
+"""
+🏁 BENCHMARK DE PONTA A PONTA (servidores fake)
+================================================
+
+OBJETIVO:
+- Rodar os fluxos REAIS dos projetos sem tocar nas APIs de verdade:
+  * executar_monitoramento()        (Projeto 3.5)
+  * salvar_cotacao_na_planilha()    (Projeto 2)
+  * criar_card_trello()             (Projeto 3)
+- Medir latência (p50/p99), vazão e memória alocada
+- Salvar o resultado em JSON para comparar execuções
+
+COMO FUNCIONA:
+- Sobe o ServidorFake (latência, erros e rate limit configuráveis)
+- Aponta as URLs dos módulos para ele
+- A aba do Sheets é uma AbaFakeHTTP: mesma interface que o gspread
+  usa aqui (row_values, append_rows), mas falando HTTP com o fake
+- Cada cenário roda 2x: uma para medir tempo, outra (menor) com
+  tracemalloc ligado, porque o tracemalloc deixa tudo mais lento
+
+USO:
+    python benchmark_e2e.py
+    python benchmark_e2e.py --quantidade 500 --latencia 0.02 --taxa-erro 0.05
+    python benchmark_e2e.py --saida hoje.json --comparar ontem.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Bancos locais (histórico, estado dos alertas) numa pasta temporária:
+# precisa vir ANTES de importar os módulos que leem essas variáveis
+_PASTA_TEMPORARIA = tempfile.mkdtemp(prefix='benchmark_e2e_')
+os.environ.setdefault('HISTORICO_DB', os.path.join(_PASTA_TEMPORARIA, 'historico.db'))
+os.environ.setdefault('ESTADO_ALERTAS_DB', os.path.join(_PASTA_TEMPORARIA, 'estado_alertas.db'))
+os.environ.setdefault('CAIXA_SAIDA_DB', os.path.join(_PASTA_TEMPORARIA, 'caixa_saida.db'))
+os.environ.setdefault('MUDANCAS_DB', os.path.join(_PASTA_TEMPORARIA, 'ultimas_cotacoes.db'))
+os.environ.setdefault('INDICE_CARDS_DB', os.path.join(_PASTA_TEMPORARIA, 'indice_cards.db'))
+
+import cliente_http
+from servidores_fake import ServidorFake
+
+CENARIOS = ('monitoramento', 'sheets', 'trello')
+CREDENCIAIS_FAKE = {'api_key': 'fake', 'token': 'fake', 'list_id': 'fake'}
+PLANILHA_FAKE = 'planilha-benchmark'
+
+
+class _PlanilhaFake:
+    """Só o que chave_aba() precisa: o id da planilha"""
+
+    def __init__(self, planilha_id):
+        self.id = planilha_id
+
+
+class AbaFakeHTTP:
+    """
+    Worksheet do gspread imitada, falando HTTP com o ServidorFake
+
+    Implementa só o que os projetos usam: row_values(), append_rows(),
+    row_count, id, title e spreadsheet.id
+    """
+
+    def __init__(self, url_base, planilha_id=PLANILHA_FAKE, titulo='Página1'):
+        self.url_base = url_base
+        self.spreadsheet = _PlanilhaFake(planilha_id)
+        self.id = 0
+        self.title = titulo
+        self.row_count = 1000
+
+    def _url_valores(self, intervalo):
+        return f"{self.url_base}/v4/spreadsheets/{self.spreadsheet.id}/values/{intervalo}"
+
+    def row_values(self, linha):
+        resposta = cliente_http.get(self._url_valores(f"{self.title}!A{linha}:Z{linha}"))
+        resposta.raise_for_status()
+        valores = resposta.json().get('values', [])
+        return valores[0] if valores else []
+
+    def append_rows(self, linhas, value_input_option='RAW'):
+        resposta = cliente_http.post(
+            self._url_valores(f"{self.title}!A1") + ':append',
+            params={'valueInputOption': value_input_option},
+            json={'values': linhas},
+        )
+        resposta.raise_for_status()
+        return resposta.json()
+
+
+def _percentil(valores, p):
+    from monitor_daemon import percentil
+    return percentil(valores, p)
+
+
+# ============================================
+# 📏 MEDIÇÃO
+# ============================================
+
+def medir(operacao, quantidade, finalizar=None):
+    """
+    Roda `operacao(i)` `quantidade` vezes
+
+    - operacao devolve False quando falha (igual às funções dos projetos)
+    - finalizar() roda no fim e entra no tempo total (ex: flush do buffer)
+
+    RETORNA:
+    - dict com p50/p99/máx (ms), vazão (ops/s), erros e memória
+    """
+    latencias = []
+    erros = 0
+
+    inicio = time.perf_counter()
+    for indice in range(quantidade):
+        t0 = time.perf_counter()
+        if operacao(indice) is False:
+            erros += 1
+        latencias.append(time.perf_counter() - t0)
+    if finalizar:
+        finalizar()
+    total = time.perf_counter() - inicio
+
+    # Segunda rodada, menor, só para contar memória
+    amostra = max(10, quantidade // 10)
+    tracemalloc.start()
+    antes, _ = tracemalloc.get_traced_memory()
+    for indice in range(amostra):
+        operacao(quantidade + indice)
+    if finalizar:
+        finalizar()
+    depois, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'operacoes': quantidade,
+        'erros': erros,
+        'segundos': total,
+        'vazao_por_s': quantidade / total if total else 0.0,
+        'p50_ms': _percentil(latencias, 50) * 1000,
+        'p99_ms': _percentil(latencias, 99) * 1000,
+        'max_ms': max(latencias, default=0.0) * 1000,
+        'retido_por_op_bytes': (depois - antes) / amostra,
+        'pico_kb': pico / 1024,
+    }
+
+
+# ============================================
+# 🎬 CENÁRIOS
+# ============================================
+
+def _cenario_monitoramento(servidor, quantidade):
+    import integracao_completa
+    from cache_cotacoes import cache_padrao
+    from escritor_sheets import fechar_escritores
+
+    def operacao(_):
+        # Sem cache: cada ciclo vai até a "API"
+        cache_padrao.invalidar()
+        integracao_completa.executar_monitoramento()
+
+    resultado = medir(operacao, quantidade, fechar_escritores)
+    resultado['linhas_no_servidor'] = len(servidor.linhas_sheets)
+    return resultado
+
+
+def _cenario_sheets(servidor, quantidade):
+    import projeto2_sheets
+    from escritor_sheets import fechar_escritores
+
+    def operacao(indice):
+        return projeto2_sheets.salvar_cotacao_na_planilha(None, {
+            'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+            'moeda': 'USD',
+            'valor': 5.0 + indice / 10000,
+        })
+
+    antes = len(servidor.linhas_sheets)
+    resultado = medir(operacao, quantidade, fechar_escritores)
+    resultado['linhas_no_servidor'] = len(servidor.linhas_sheets) - antes
+    return resultado
+
+
+def _cenario_trello(servidor, quantidade):
+    import projeto3_trello
+
+    def operacao(indice):
+        return projeto3_trello.criar_card_trello(f"card {indice}", "benchmark", CREDENCIAIS_FAKE)
+
+    antes = servidor.cards_criados
+    resultado = medir(operacao, quantidade)
+    resultado['cards_no_servidor'] = servidor.cards_criados - antes
+    return resultado
+
+
+_FUNCOES_CENARIO = {
+    'monitoramento': _cenario_monitoramento,
+    'sheets': _cenario_sheets,
+    'trello': _cenario_trello,
+}
+
+
+@contextlib.contextmanager
+def _apontar_para(servidor, limite_trello):
+    """Troca URLs e a aba do Sheets pelos fakes (e desfaz no fim)"""
+    import configuracao
+    import cotacao_moedas
+    import fila_trello
+    import integracao_completa
+    import projeto2_sheets
+
+    aba = AbaFakeHTTP(servidor.url)
+    # Trello fake: URL e credenciais entram pela configuração do processo
+    config_original = configuracao.obter()
+    configuracao.definir(config_original.com(url_base_trello=servidor.url,
+                                             credenciais_trello=CREDENCIAIS_FAKE))
+
+    trocas = [
+        (cotacao_moedas, 'URL_BASE_AWESOMEAPI', servidor.url),
+        (integracao_completa, 'obter_aba', lambda *args: aba),
+        (projeto2_sheets, 'obter_aba', lambda *args: aba),
+    ]
+    originais = [(modulo, nome, getattr(modulo, nome)) for modulo, nome, _ in trocas]
+    for modulo, nome, valor in trocas:
+        setattr(modulo, nome, valor)
+
+    # A fila do Trello é criada aqui, já apontando para o fake.
+    # Sem rate limit no fake, os baldes não seguram o benchmark.
+    fila_trello.fechar_fila()
+    limite = limite_trello or (1_000_000, 1)
+    fila_trello.obter_fila(CREDENCIAIS_FAKE, url_base=servidor.url,
+                           limite_key=limite, limite_token=limite)
+    try:
+        yield
+    finally:
+        fila_trello.fechar_fila()
+        for modulo, nome, valor in originais:
+            setattr(modulo, nome, valor)
+        configuracao.definir(config_original)
+
+
+def executar(quantidade=200, latencia=0.005, taxa_erro=0.0, limite_trello=None,
+             cenarios=CENARIOS, semente=42):
+    """
+    Roda os cenários e devolve o resultado (pronto para virar JSON)
+
+    PARÂMETROS:
+    - quantidade: operações por cenário
+    - latencia: segundos de latência do servidor fake
+    - taxa_erro: fração de respostas 503 (todas as rotas)
+    - limite_trello: (requisições, janela) do fake e da fila
+    """
+    import resiliencia
+
+    resultado = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'configuracao': {
+            'quantidade': quantidade, 'latencia': latencia, 'taxa_erro': taxa_erro,
+            'limite_trello': limite_trello, 'semente': semente,
+        },
+        'cenarios': {},
+    }
+
+    with ServidorFake(latencia=latencia, taxa_erro=taxa_erro,
+                      limite_trello=limite_trello, semente=semente) as servidor:
+        resiliencia.reiniciar_disjuntores()
+
+        with _apontar_para(servidor, limite_trello):
+            for nome in cenarios:
+                # Os projetos imprimem bastante: guarda a saída longe do relatório
+                with contextlib.redirect_stdout(io.StringIO()):
+                    resultado['cenarios'][nome] = _FUNCOES_CENARIO[nome](servidor, quantidade)
+
+        resultado['servidor'] = {
+            'requisicoes': len(servidor.requisicoes),
+            'erros_simulados': servidor.erros_simulados,
+            'respostas_429': servidor.respostas_429,
+        }
+        resultado['disjuntores'] = resiliencia.estado_disjuntores()
+
+    return resultado
+
+
+# ============================================
+# 📊 RELATÓRIO
+# ============================================
+
+def imprimir(resultado, anterior=None):
+    """Tabela dos cenários; com `anterior`, mostra a variação (%)"""
+    def variacao(nome, campo):
+        if not anterior or nome not in anterior.get('cenarios', {}):
+            return ''
+        antes = anterior['cenarios'][nome][campo]
+        if not antes:
+            return ''
+        return f" ({(resultado['cenarios'][nome][campo] / antes - 1) * 100:+.0f}%)"
+
+    config = resultado['configuracao']
+    print(f"🏁 {config['quantidade']} ops/cenário | latência {config['latencia'] * 1000:.0f}ms | "
+          f"erros {config['taxa_erro']:.0%}")
+
+    for nome, r in resultado['cenarios'].items():
+        print(f"\n   {nome}")
+        print(f"      p50/p99/máx: {r['p50_ms']:.2f}{variacao(nome, 'p50_ms')} / "
+              f"{r['p99_ms']:.2f}{variacao(nome, 'p99_ms')} / {r['max_ms']:.2f} ms")
+        print(f"      vazão: {r['vazao_por_s']:.0f} ops/s{variacao(nome, 'vazao_por_s')} | "
+              f"erros: {r['erros']}")
+        print(f"      memória: {r['retido_por_op_bytes']:.0f} B retidos/op | pico {r['pico_kb']:.0f} KB")
+
+    print(f"\n   Servidor: {resultado['servidor']['requisicoes']} requisições | "
+          f"503 simulados: {sum(resultado['servidor']['erros_simulados'].values())} | "
+          f"429: {sum(resultado['servidor']['respostas_429'].values())}")
+    for host, estado in resultado['disjuntores'].items():
+        print(f"   Disjuntor {host}: {estado['estado']} | {estado['retries']} retries")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta com servidores fake")
+    parser.add_argument('--quantidade', type=int, default=200)
+    parser.add_argument('--latencia', type=float, default=0.005, help="segundos")
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help="fração de 503 (0-1)")
+    parser.add_argument('--limite-trello', type=float, nargs=2, metavar=('REQ', 'JANELA'))
+    parser.add_argument('--cenarios', default=','.join(CENARIOS))
+    parser.add_argument('--saida', default='benchmark_e2e.json')
+    parser.add_argument('--comparar', help="JSON de uma execução anterior")
+    args = parser.parse_args(argumentos)
+
+    resultado = executar(
+        quantidade=args.quantidade,
+        latencia=args.latencia,
+        taxa_erro=args.taxa_erro,
+        limite_trello=tuple(args.limite_trello) if args.limite_trello else None,
+        cenarios=[nome.strip() for nome in args.cenarios.split(',') if nome.strip()],
+    )
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)
+
+    imprimir(resultado, anterior)
+
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultado salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
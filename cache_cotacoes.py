@@ -0,0 +1,289 @@
+"""
+🗄️ CACHE DE COTAÇÕES (TTL + LRU + stale-while-revalidate)
+==========================================================
+
+OBJETIVO:
+- Evitar buscar a MESMA cotação várias vezes no mesmo ciclo
+- Cada par tem seu próprio tempo de validade (TTL)
+- Limite de pares guardados (os menos usados saem primeiro = LRU)
+- Modo "stale-while-revalidate": devolve o último valor na hora
+  e atualiza em segundo plano (só em processo que fica no ar, como
+  o daemon, e só até max_vencido; depois disso busca na hora)
+- Snapshot opcional em disco: o processo reinicia já "aquecido"
+
+NOVOS CONCEITOS:
+- OrderedDict (lembra a ordem de uso → LRU fácil)
+- threading.Thread (atualização em segundo plano)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metricas import log
+
+# Validade padrão de uma cotação em cache (segundos)
+TTL_PADRAO = 30
+
+# Quantos pares no máximo ficam guardados
+CAPACIDADE_PADRAO = 256
+
+# Segundos DEPOIS do TTL em que ainda vale devolver o valor vencido
+MAX_VENCIDO_PADRAO = 300
+
+
+class CacheCotacoes:
+    """
+    Cache em memória na frente de buscar_cotacoes()
+
+    PARÂMETROS:
+    - buscar: função que recebe lista de pares e devolve {par: cotacao}
+              (padrão: cotacao_moedas.buscar_cotacoes)
+    - ttl_padrao: validade em segundos para pares sem TTL próprio
+    - ttls: dict {par: segundos} com TTLs específicos
+    - capacidade: máximo de pares guardados
+    - servir_vencido: True = stale-while-revalidate
+    - max_vencido: segundos além do TTL em que o vencido ainda é servido;
+                   passou disso, busca na hora (e o par falta se a busca falhar)
+    - arquivo_snapshot: caminho do JSON para salvar/carregar o cache
+
+    ⚠️ CUIDADO: servir_vencido só faz sentido em processo de longa
+    duração. Numa execução única (cron) a atualização em segundo plano
+    morre com o processo e o valor velho é o que vai para o Sheets.
+    """
+
+    def __init__(self, buscar=None, ttl_padrao=TTL_PADRAO, ttls=None,
+                 capacidade=CAPACIDADE_PADRAO, servir_vencido=True,
+                 max_vencido=MAX_VENCIDO_PADRAO, arquivo_snapshot=None):
+        self._buscar = buscar
+        self.ttl_padrao = ttl_padrao
+        self.ttls = dict(ttls or {})
+        self.capacidade = capacidade
+        self.servir_vencido = servir_vencido
+        self.max_vencido = max_vencido
+        self.arquivo_snapshot = arquivo_snapshot
+
+        # par → (cotacao, guardado_em)
+        # guardado_em usa time.time() para continuar válido no snapshot
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+        # Pares sendo atualizados em segundo plano (evita refresh duplicado)
+        self._atualizando = set()
+
+        self.contadores = {'acertos': 0, 'faltas': 0, 'vencidos': 0, 'despejados': 0}
+
+        if arquivo_snapshot:
+            self.carregar_snapshot()
+
+    # ----------------------------------------
+    # Consulta
+    # ----------------------------------------
+
+    def _funcao_busca(self):
+        if self._buscar is None:
+            # Import aqui dentro para evitar import circular
+            from cotacao_moedas import buscar_cotacoes
+            self._buscar = buscar_cotacoes
+        return self._buscar
+
+    def ttl(self, par):
+        """Validade (segundos) de um par"""
+        return self.ttls.get(par, self.ttl_padrao)
+
+    def obter(self, pares):
+        """
+        Devolve as cotações pedidas, buscando só o que falta
+
+        FLUXO:
+        1. Válido no cache → acerto (sem rede)
+        2. Vencido há menos de max_vencido + servir_vencido → devolve o
+           antigo e atualiza em background
+        3. Ausente, vencido demais (ou sem servir_vencido) → busca agora, em lote
+
+        RETORNA:
+        - dict {par: cotacao} (pares que falharam não aparecem)
+        """
+        from cotacao_moedas import normalizar_par
+
+        pares = list(dict.fromkeys(normalizar_par(par) for par in pares))
+        agora = time.time()
+
+        resultado = {}
+        faltando = []
+        vencidos = []
+
+        with self._trava:
+            for par in pares:
+                item = self._itens.get(par)
+
+                if item is None:
+                    faltando.append(par)
+                    continue
+
+                cotacao, guardado_em = item
+                self._itens.move_to_end(par)
+
+                idade = agora - guardado_em
+                if idade < self.ttl(par):
+                    self.contadores['acertos'] += 1
+                    resultado[par] = cotacao
+                elif self.servir_vencido and idade < self.ttl(par) + self.max_vencido:
+                    self.contadores['vencidos'] += 1
+                    resultado[par] = cotacao
+                    if par not in self._atualizando:
+                        self._atualizando.add(par)
+                        vencidos.append(par)
+                else:
+                    faltando.append(par)
+
+            self.contadores['faltas'] += len(faltando)
+
+        if vencidos:
+            threading.Thread(
+                target=self._atualizar_em_segundo_plano,
+                args=(vencidos,),
+                daemon=True,
+            ).start()
+
+        if faltando:
+            novos = self._funcao_busca()(faltando)
+            self.guardar(novos)
+            resultado.update(novos)
+
+        return resultado
+
+    def obter_um(self, par):
+        """Atalho para um único par (None se não conseguir)"""
+        from cotacao_moedas import normalizar_par
+
+        par = normalizar_par(par)
+        return self.obter([par]).get(par)
+
+    def _atualizar_em_segundo_plano(self, pares):
+        """Busca de novo os pares vencidos sem bloquear quem pediu"""
+        try:
+            self.guardar(self._funcao_busca()(pares))
+        except Exception as e:
+            log.aviso('cache_atualizacao_falhou', "⚠️ Falha ao atualizar cache em segundo plano",
+                      pares=len(pares), erro=str(e))
+        finally:
+            with self._trava:
+                self._atualizando.difference_update(pares)
+
+    # ----------------------------------------
+    # Escrita
+    # ----------------------------------------
+
+    def guardar(self, cotacoes, guardado_em=None):
+        """Guarda cotações novas, despejando as menos usadas se lotar"""
+        guardado_em = time.time() if guardado_em is None else guardado_em
+
+        with self._trava:
+            for par, cotacao in cotacoes.items():
+                self._itens[par] = (cotacao, guardado_em)
+                self._itens.move_to_end(par)
+
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.contadores['despejados'] += 1
+
+    def invalidar(self, par=None):
+        """Remove um par do cache (ou tudo, se par=None)"""
+        with self._trava:
+            if par is None:
+                self._itens.clear()
+            else:
+                self._itens.pop(par, None)
+
+    # ----------------------------------------
+    # Snapshot em disco
+    # ----------------------------------------
+
+    def salvar_snapshot(self, caminho=None):
+        """
+        Salva o cache em JSON
+
+        💡 DICA: grava num arquivo temporário e depois renomeia,
+        assim um crash no meio nunca deixa o JSON pela metade
+        """
+        caminho = caminho or self.arquivo_snapshot
+        if not caminho:
+            return
+
+        with self._trava:
+            dados = {
+                par: {'cotacao': cotacao, 'guardado_em': guardado_em}
+                for par, (cotacao, guardado_em) in self._itens.items()
+            }
+
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo)
+        os.replace(temporario, caminho)
+
+    def carregar_snapshot(self, caminho=None):
+        """Carrega o JSON salvo (se existir) mantendo a idade original"""
+        caminho = caminho or self.arquivo_snapshot
+        if not caminho or not os.path.exists(caminho):
+            return
+
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, ValueError) as e:
+            log.aviso('cache_snapshot_ignorado', "⚠️ Snapshot do cache ignorado",
+                      arquivo=caminho, erro=str(e))
+            return
+
+        for par, item in dados.items():
+            self.guardar({par: item['cotacao']}, guardado_em=item['guardado_em'])
+
+    # ----------------------------------------
+    # Estatísticas
+    # ----------------------------------------
+
+    def estatisticas(self):
+        """
+        Taxas de acerto, falta e vencido (para ajustar os TTLs)
+
+        RETORNA:
+        - dict com os contadores + 'taxa_acerto', 'taxa_falta', 'taxa_vencido'
+        """
+        with self._trava:
+            resultado = dict(self.contadores)
+            resultado['tamanho'] = len(self._itens)
+
+        total = resultado['acertos'] + resultado['faltas'] + resultado['vencidos']
+        for nome, chave in (('taxa_acerto', 'acertos'),
+                            ('taxa_falta', 'faltas'),
+                            ('taxa_vencido', 'vencidos')):
+            resultado[nome] = resultado[chave] / total if total else 0.0
+
+        return resultado
+
+
+# Cache compartilhado pelos scripts
+# Snapshot ativado com a variável de ambiente COTACOES_SNAPSHOT=arquivo.json
+# servir_vencido começa desligado: a maioria dos scripts roda uma vez e
+# sai; o monitor_daemon.py liga ao subir (processo de longa duração)
+cache_padrao = CacheCotacoes(servir_vencido=False,
+                             arquivo_snapshot=os.getenv('COTACOES_SNAPSHOT'))
+
+
+def buscar_cotacoes_em_cache(pares):
+    """Mesmo contrato de buscar_cotacoes(), passando pelo cache padrão"""
+    return cache_padrao.obter(pares)
+
+
+if __name__ == "__main__":
+    # Três "consumidores" pedindo o mesmo par no mesmo ciclo
+    for consumidor in ('monitor', 'formatação', 'alerta'):
+        cotacao = cache_padrao.obter_um('USD-BRL')
+        if cotacao:
+            print(f"{consumidor}: R$ {cotacao['bid']:.2f}")
+
+    # Esperado: 1 falta e 2 acertos → uma única requisição
+    print(cache_padrao.estatisticas())
@@ -0,0 +1,360 @@
+"""
+📮 CAIXA DE SAÍDA DURÁVEL (outbox)
+===================================
+
+OBJETIVO:
+- Nenhuma linha do Sheets ou alerta do Trello some numa queda de API
+- TODA escrita é gravada num SQLite local ANTES de ser enviada
+  e apagada só DEPOIS que a API confirmou
+- Um "reenviador" em segundo plano pega o que ficou para trás e
+  manda em LOTES grandes (append_rows no Sheets, fila com rate limit
+  no Trello): uma queda vira uma rajada de recuperação, não perda
+
+COMO FUNCIONA:
+1. registrar('sheets', {...}) → grava e devolve o id
+2. O envio normal (escritor em lote / fila do Trello) segue igual
+3. Deu certo → confirmar([id]) apaga o registro
+   Deu errado → liberar([id]): fica para o reenviador
+4. O reenviador só pega registros com mais de `idade_minima` segundos
+   que NÃO estão em andamento neste processo (evita envio duplicado)
+
+⚠️ CUIDADO: se o processo morrer entre a API aceitar e o confirmar(),
+o registro será reenviado (entrega "pelo menos uma vez").
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metricas import contar, log, registro
+
+ARQUIVO_PADRAO = os.getenv('CAIXA_SAIDA_DB', 'caixa_saida.db')
+
+TAMANHO_LOTE_REENVIO = 500
+IDADE_MINIMA_REENVIO = 60.0     # segundos: dá tempo do envio normal terminar
+INTERVALO_REENVIO = 30.0
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS caixa_saida (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    destino     TEXT    NOT NULL,
+    dados       TEXT    NOT NULL,
+    criado      REAL    NOT NULL,
+    tentativas  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS caixa_saida_destino ON caixa_saida (destino, id);
+"""
+
+
+class CaixaSaida:
+    """
+    Registro durável de escritas pendentes + reenvio em lote
+
+    PARÂMETROS:
+    - caminho: arquivo SQLite (':memory:' para testes)
+    - tamanho_lote: registros por chamada do despachante no reenvio
+    - idade_minima: segundos antes de um registro poder ser reenviado
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO, tamanho_lote=TAMANHO_LOTE_REENVIO,
+                 idade_minima=IDADE_MINIMA_REENVIO):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.idade_minima = idade_minima
+
+        self._conexao = None
+        self._trava = threading.Lock()
+        self._em_andamento = set()     # ids sendo enviados pelo caminho normal
+        self._despachantes = {}        # destino → função(lista de (id, dados)) → ids confirmados
+
+        self._parar = threading.Event()
+        self._thread = None
+        self._trava_reenvio = threading.Lock()
+
+        self.contadores = {'registrados': 0, 'confirmados': 0, 'reenviados': 0, 'falhas_reenvio': 0}
+
+    def _conectar(self):
+        """Abre o banco na primeira vez (mesmo padrão do historico_cotacoes)"""
+        if self._conexao is None:
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: sobrevive a queda do PROCESSO sem fsync a cada escrita
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.executescript(ESQUEMA)
+            self._conexao = conexao
+        return self._conexao
+
+    # ----------------------------------------
+    # Caminho normal
+    # ----------------------------------------
+
+    def registrar(self, destino, dados):
+        """
+        Grava a escrita ANTES do envio
+
+        RETORNA:
+        - id do registro (passe para confirmar/liberar)
+        """
+        texto = json.dumps(dados, ensure_ascii=False)
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                cursor = conexao.execute(
+                    "INSERT INTO caixa_saida (destino, dados, criado) VALUES (?, ?, ?)",
+                    (destino, texto, time.time()),
+                )
+            identificador = cursor.lastrowid
+            self._em_andamento.add(identificador)
+            self.contadores['registrados'] += 1
+        return identificador
+
+    def confirmar(self, ids):
+        """A API aceitou: apaga os registros"""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                conexao.executemany("DELETE FROM caixa_saida WHERE id = ?", ((i,) for i in ids))
+            self._em_andamento.difference_update(ids)
+            self.contadores['confirmados'] += len(ids)
+
+    def descartar(self, ids):
+        """Nunca vai dar certo (ex.: sem credenciais): apaga sem enviar"""
+        ids = list(ids)
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                conexao.executemany("DELETE FROM caixa_saida WHERE id = ?", ((i,) for i in ids))
+            self._em_andamento.difference_update(ids)
+
+    def liberar(self, ids):
+        """O envio normal falhou: o registro fica para o reenviador"""
+        with self._trava:
+            self._em_andamento.difference_update(ids)
+
+    def pendentes(self, destino=None):
+        """Quantos registros ainda não foram confirmados"""
+        with self._trava:
+            conexao = self._conectar()
+            if destino is None:
+                return conexao.execute("SELECT COUNT(*) FROM caixa_saida").fetchone()[0]
+            return conexao.execute(
+                "SELECT COUNT(*) FROM caixa_saida WHERE destino = ?", (destino,)
+            ).fetchone()[0]
+
+    # ----------------------------------------
+    # Reenvio em lote
+    # ----------------------------------------
+
+    def registrar_despachante(self, destino, funcao):
+        """
+        Define como reenviar um destino
+
+        funcao(itens) recebe [(id, dados), ...] e devolve os ids que a
+        API confirmou (levantar exceção = nenhum confirmado)
+        """
+        self._despachantes[destino] = funcao
+
+    def _proximo_lote(self, destino, depois_de):
+        limite_criacao = time.time() - self.idade_minima
+        with self._trava:
+            conexao = self._conectar()
+            linhas = conexao.execute(
+                "SELECT id, dados FROM caixa_saida "
+                "WHERE destino = ? AND id > ? AND criado <= ? ORDER BY id LIMIT ?",
+                (destino, depois_de, limite_criacao, self.tamanho_lote + len(self._em_andamento)),
+            ).fetchall()
+            itens = [(i, json.loads(dados)) for i, dados in linhas if i not in self._em_andamento]
+            itens = itens[:self.tamanho_lote]
+            self._em_andamento.update(i for i, _ in itens)
+        ultimo = linhas[-1][0] if linhas else None
+        return itens, ultimo
+
+    def reenviar(self, destinos=None):
+        """
+        Uma passada pelo atraso: manda tudo que está pendente, em lotes
+
+        RETORNA:
+        - dict {destino: {'reenviados', 'falhas', 'segundos'}}
+        """
+        resumo = {}
+        with self._trava_reenvio:
+            for destino in destinos or list(self._despachantes):
+                despachar = self._despachantes[destino]
+                reenviados = falhas = 0
+                inicio = time.perf_counter()
+                depois_de = 0
+
+                while not self._parar.is_set():
+                    itens, ultimo = self._proximo_lote(destino, depois_de)
+                    if ultimo is None:
+                        break
+                    depois_de = ultimo
+                    if not itens:
+                        continue
+
+                    ids = [i for i, _ in itens]
+                    try:
+                        confirmados = list(despachar(itens))
+                    except Exception as e:
+                        confirmados = []
+                        log.aviso('reenvio_falhou', "⚠️ Reenvio falhou, tenta de novo depois",
+                                  destino=destino, registros=len(itens), erro=str(e))
+
+                    self.confirmar(confirmados)
+                    falhados = set(ids) - set(confirmados)
+                    self._marcar_tentativa(falhados)
+                    self.liberar(falhados)
+
+                    reenviados += len(confirmados)
+                    falhas += len(falhados)
+                    if falhados and not confirmados:
+                        break   # destino ainda fora do ar: não insiste agora
+
+                segundos = time.perf_counter() - inicio
+                self.contadores['reenviados'] += reenviados
+                self.contadores['falhas_reenvio'] += falhas
+                if reenviados:
+                    contar('caixa_saida_reenviados_total', "Registros reenviados pela caixa de saída",
+                           reenviados, destino=destino)
+                    log.info('reenvio_concluido', "📮 Atraso reenviado", destino=destino,
+                             registros=reenviados, por_segundo=round(reenviados / segundos, 1))
+                resumo[destino] = {'reenviados': reenviados, 'falhas': falhas, 'segundos': segundos}
+        return resumo
+
+    def _marcar_tentativa(self, ids):
+        if not ids:
+            return
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                conexao.executemany(
+                    "UPDATE caixa_saida SET tentativas = tentativas + 1 WHERE id = ?",
+                    ((i,) for i in ids),
+                )
+
+    def _laco_reenvio(self, intervalo):
+        while not self._parar.wait(intervalo):
+            try:
+                self.reenviar()
+            except Exception as e:
+                log.erro('reenvio_erro', "❌ Erro no reenviador", erro=str(e))
+
+    def iniciar_reenvio(self, intervalo=INTERVALO_REENVIO):
+        """Sobe a thread que reenvia o atraso a cada `intervalo` segundos"""
+        if self._thread is None:
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco_reenvio, args=(intervalo,),
+                                            daemon=True, name='caixa-saida')
+            self._thread.start()
+
+    def parar_reenvio(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def fechar(self):
+        self.parar_reenvio()
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+# Caixa compartilhada pelos scripts
+caixa_padrao = CaixaSaida()
+
+
+def _coletar_metricas():
+    """Tamanho do atraso para o /metrics (só se a caixa já foi usada)"""
+    if caixa_padrao._conexao is None:
+        return []
+    with caixa_padrao._trava:
+        linhas = caixa_padrao._conexao.execute(
+            "SELECT destino, COUNT(*), MIN(criado) FROM caixa_saida GROUP BY destino"
+        ).fetchall()
+    agora = time.time()
+    amostras = []
+    for destino, quantidade, mais_antigo in linhas:
+        rotulos = {'destino': destino}
+        amostras += [
+            ('caixa_saida_pendentes', 'gauge', "Escritas ainda não confirmadas", rotulos, quantidade),
+            ('caixa_saida_idade_segundos', 'gauge', "Idade da escrita pendente mais antiga",
+             rotulos, agora - mais_antigo),
+        ]
+    return amostras
+
+
+registro.registrar_coletor(_coletar_metricas)
+
+
+# ============================================
+# 📏 BENCHMARK: recuperação depois de uma queda
+# ============================================
+
+def benchmark(linhas=20_000, cards=200, latencia=0.005):
+    """
+    Simula uma queda: `linhas` do Sheets e `cards` do Trello ficam na
+    caixa sem confirmação; depois a API volta e medimos o reenvio
+
+    RETORNA:
+    - dict {destino: {'registros', 'segundos', 'por_segundo', 'no_servidor'}}
+    """
+    from benchmark_e2e import CREDENCIAIS_FAKE, AbaFakeHTTP
+    from fila_trello import FilaTrello
+    from servidores_fake import ServidorFake
+
+    caixa = CaixaSaida(':memory:', idade_minima=0)
+
+    with ServidorFake(latencia=latencia) as servidor:
+        aba = AbaFakeHTTP(servidor.url)
+        fila = FilaTrello(CREDENCIAIS_FAKE, url_base=servidor.url,
+                          limite_key=(1_000_000, 1), limite_token=(1_000_000, 1))
+
+        def despachar_sheets(itens):
+            aba.append_rows([dados['linha'] for _, dados in itens])
+            return [i for i, _ in itens]
+
+        def despachar_trello(itens):
+            futuros = [(i, fila.enviar(dados['nome'], dados['descricao'], chave=str(i)))
+                       for i, dados in itens]
+            return [i for i, futuro in futuros if futuro.exception() is None]
+
+        caixa.registrar_despachante('sheets', despachar_sheets)
+        caixa.registrar_despachante('trello', despachar_trello)
+
+        # "Queda": tudo registrado, nada confirmado
+        for numero in range(linhas):
+            caixa.registrar('sheets', {'linha': [numero, 'USD-BRL', 5.0]})
+        for numero in range(cards):
+            caixa.registrar('trello', {'nome': f"alerta {numero}", 'descricao': 'queda'})
+        caixa.liberar(list(range(1, linhas + cards + 1)))
+
+        resumo = caixa.reenviar()
+        fila.fechar()
+
+        no_servidor = {'sheets': len(servidor.linhas_sheets), 'trello': servidor.cards_criados}
+
+    return {
+        destino: {
+            'registros': r['reenviados'],
+            'segundos': r['segundos'],
+            'por_segundo': r['reenviados'] / r['segundos'] if r['segundos'] else 0.0,
+            'no_servidor': no_servidor[destino],
+            'pendentes': caixa.pendentes(destino),
+        }
+        for destino, r in resumo.items()
+    }
+
+
+if __name__ == "__main__":
+    print("📮 Queda simulada: 20 mil linhas + 200 cards na caixa de saída")
+    for destino, r in benchmark().items():
+        print(f"   {destino:<7} {r['registros']:>6} reenviados em {r['segundos']:.2f}s "
+              f"({r['por_segundo']:,.0f}/s) | no servidor: {r['no_servidor']} | "
+              f"pendentes: {r['pendentes']}")
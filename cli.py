@@ -0,0 +1,210 @@
+"""
+🖥️ LINHA DE COMANDO ÚNICA
+==========================
+
+OBJETIVO:
+- Um só ponto de entrada para todos os projetos
+- Cada subcomando importa SÓ o que usa: buscar cotação não carrega
+  gspread, oauth2client nem dotenv (o stack do Google custa ~300ms)
+
+USO:
+    python cli.py quote USD-BRL EUR-BRL      # só cotação (início rápido)
+    python cli.py sheets                     # Projeto 2: cotação → planilha
+    python cli.py trello [--alerta]          # Projeto 3: card de teste / alerta simulado
+    python cli.py monitor [--daemon USD-BRL:60 EUR-BRL:300] [--trabalhadores 4]
+    python cli.py backfill USD-BRL --dias 730 [--destino sheets]
+    python cli.py inicio                     # mede o tempo de import (-X importtime)
+
+📏 MEDIDO (python cli.py inicio, menor de 5 processos):
+- quote: ~130ms (quase tudo é o requests)
+- import integracao_completa: ~490ms antes → ~130ms agora
+  (gspread/oauth2client só entram na primeira conexão com o Sheets)
+
+⚠️ CUIDADO: não importe módulos do projeto no topo deste arquivo!
+Os imports ficam dentro de cada comando, senão o `quote` volta a pagar
+por tudo.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+# ============================================
+# 🧩 SUBCOMANDOS (imports dentro de cada um)
+# ============================================
+
+def comando_quote(argumentos):
+    """Busca e mostra as cotações (um único GET para todos os pares)"""
+    from cotacao_moedas import buscar_cotacoes
+    from historico_cotacoes import ativar_gravacao
+
+    ativar_gravacao()   # a consulta avulsa também entra no histórico
+    cotacoes = buscar_cotacoes(argumentos.pares)
+    if not cotacoes:
+        print("❌ Nenhuma cotação obtida")
+        return 1
+
+    for par, cotacao in cotacoes.items():
+        print(f"💰 {par}: {cotacao['bid']:.4f} ({cotacao['pctChange']:+.2f}%)")
+    return 0
+
+
+def comando_sheets(argumentos):
+    """Projeto 2: busca o dólar e salva na planilha"""
+    from projeto2_sheets import main
+
+    main()
+    return 0
+
+
+def comando_trello(argumentos):
+    """Projeto 3: card de teste (ou alerta com cotação simulada)"""
+    if argumentos.alerta:
+        from integracao_completa import testar_alerta
+        testar_alerta()
+    else:
+        from projeto3_trello import main
+        main()
+    return 0
+
+
+def comando_monitor(argumentos):
+    """Um ciclo do monitoramento completo, ou o daemon (--daemon)"""
+    if argumentos.daemon is not None and argumentos.trabalhadores:
+        from monitor_shards import main
+        main(argumentos.trabalhadores, argumentos.daemon)
+    elif argumentos.daemon is not None:
+        from monitor_daemon import main
+        main(argumentos.daemon)
+    else:
+        from integracao_completa import executar_monitoramento
+        executar_monitoramento()
+    return 0
+
+
+def comando_backfill(argumentos):
+    """Cotações diárias dos últimos N dias → histórico local ou planilha"""
+    from backfill_cotacoes import executar_backfill
+
+    resumo = executar_backfill(argumentos.pares, argumentos.dias, destino=argumentos.destino,
+                               planilha_id=argumentos.planilha, paralelo=argumentos.paralelo)
+
+    for par, r in resumo['pares'].items():
+        situacao = f"❌ {r['erro']}" if 'erro' in r else "✅"
+        print(f"   {par}: {r['linhas']} linhas | janelas baixadas: {r['baixadas']}, "
+              f"já presentes: {r['puladas']} {situacao}")
+    print(f"⏪ {resumo['linhas']} linhas em {resumo['segundos']:.1f}s "
+          f"({resumo['linhas_por_s']:,.0f} linhas/s)")
+    return 1 if resumo['erros'] else 0
+
+
+def comando_inicio(argumentos):
+    """Compara o tempo de import do `quote` com o dos outros caminhos"""
+    resultado = medir_inicializacao(repeticoes=argumentos.repeticoes)
+    for nome, medida in resultado.items():
+        google = "com" if medida['google'] else "sem"
+        print(f"⏱️ {nome:<28} {medida['ms']:7.1f}ms ({google} gspread/oauth2client)")
+    return 0
+
+
+# ============================================
+# 📏 BENCHMARK: tempo de inicialização
+# ============================================
+
+# O que cada caminho importa (cada um num processo novo)
+CAMINHOS_INICIALIZACAO = {
+    'quote (cli)': "import cli, cotacao_moedas",
+    'integracao_completa': "import integracao_completa",
+    'sheets (stack do Google)': "import cli, conexao_sheets, gspread, oauth2client.service_account",
+}
+
+_LINHA_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def medir_inicializacao(caminhos=CAMINHOS_INICIALIZACAO, repeticoes=5):
+    """
+    Roda cada caminho com `python -X importtime` e soma os imports de topo
+
+    COMO FUNCIONA:
+    - O -X importtime escreve no stderr o tempo acumulado de cada import
+    - Somamos só os de nível 0 (os outros já estão dentro deles)
+    - Fica o MENOR de `repeticoes` processos (o menos afetado por ruído)
+
+    RETORNA:
+    - dict {caminho: {'ms', 'google'}}
+    """
+    # O site e o encodings são iguais para todos: ficam de fora
+    ignorar = {'site', 'encodings', 'encodings.utf_8', 'encodings.aliases', 'codecs'}
+    resultado = {}
+
+    for nome, codigo in caminhos.items():
+        melhores = None
+        codigo_completo = f"{codigo}\nimport sys; print('gspread' in sys.modules)"
+        for _ in range(repeticoes):
+            processo = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', codigo_completo],
+                capture_output=True, text=True, check=True,
+            )
+            total = 0
+            for linha in processo.stderr.splitlines():
+                encontrado = _LINHA_IMPORTTIME.match(linha)
+                if encontrado and not encontrado.group(2) and encontrado.group(3) not in ignorar:
+                    total += int(encontrado.group(1))
+            if melhores is None or total < melhores:
+                melhores = total
+            google = processo.stdout.strip().splitlines()[-1] == 'True'
+
+        resultado[nome] = {'ms': melhores / 1000, 'google': google}
+
+    return resultado
+
+
+# ============================================
+# 🚀 EXECUÇÃO
+# ============================================
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Cotações → Sheets / Trello")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    quote = subcomandos.add_parser('quote', help="mostra cotações (início rápido)")
+    quote.add_argument('pares', nargs='*', default=['USD-BRL'])
+    quote.set_defaults(funcao=comando_quote)
+
+    sheets = subcomandos.add_parser('sheets', help="salva a cotação do dólar na planilha")
+    sheets.set_defaults(funcao=comando_sheets)
+
+    trello = subcomandos.add_parser('trello', help="cria um card de teste no Trello")
+    trello.add_argument('--alerta', action='store_true', help="simula uma cotação alta")
+    trello.set_defaults(funcao=comando_trello)
+
+    monitor = subcomandos.add_parser('monitor', help="monitoramento completo")
+    monitor.add_argument('--daemon', nargs='*', metavar='PAR:INTERVALO',
+                         help="roda sem parar (ex: USD-BRL:60 EUR-BRL:300)")
+    monitor.add_argument('--trabalhadores', type=int, default=0,
+                         help="com --daemon: divide os pares entre N processos")
+    monitor.set_defaults(funcao=comando_monitor)
+
+    backfill = subcomandos.add_parser('backfill', help="preenche o histórico (retomável)")
+    backfill.add_argument('pares', nargs='*', default=['USD-BRL'])
+    backfill.add_argument('--dias', type=int, default=365)
+    backfill.add_argument('--destino', choices=['local', 'sheets'], default='local')
+    backfill.add_argument('--planilha', help="ID da planilha (destino sheets)")
+    backfill.add_argument('--paralelo', type=int, default=4, help="pares baixados ao mesmo tempo")
+    backfill.set_defaults(funcao=comando_backfill)
+
+    inicio = subcomandos.add_parser('inicio', help="mede o tempo de inicialização")
+    inicio.add_argument('--repeticoes', type=int, default=5)
+    inicio.set_defaults(funcao=comando_inicio)
+
+    return parser
+
+
+def main(argumentos=None):
+    argumentos = criar_parser().parse_args(argumentos)
+    return argumentos.funcao(argumentos)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+🌐 CLIENTE HTTP COMPARTILHADO
+==============================
+
+OBJETIVO:
+- Reaproveitar conexões TCP+TLS entre requisições (keep-alive)
+- Um pool de conexões por host (AwesomeAPI, Trello, Google)
+- Timeout padrão e gzip em todas as chamadas
+- Retry com backoff + circuit breaker por host (resiliencia.py)
+
+POR QUÊ?
+- requests.get() / requests.post() soltos abrem uma conexão NOVA a cada
+  chamada → handshake TCP + TLS toda vez (~100-300ms jogados fora)
+- Uma requests.Session guarda a conexão aberta e reaproveita
+
+USO:
+    import cliente_http
+    resposta = cliente_http.get("https://economia.awesomeapi.com.br/json/last/USD-BRL")
+    print(cliente_http.estatisticas_conexoes())
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metricas
+import resiliencia
+
+# Timeout usado quando quem chama não informa um
+TIMEOUT_PADRAO = 10
+
+# Host usado pelo gspread (Sheets + Drive compartilham a mesma sessão)
+HOST_GOOGLE = 'sheets.googleapis.com'
+
+# Tamanho do pool por host
+# - conexoes: quantos pools (um por host:porta) o adapter guarda
+# - maximo: quantas conexões abertas ao mesmo tempo por host
+POOL_PADRAO = {'conexoes': 4, 'maximo': 10}
+
+# Ajustes específicos por host (ex: Trello recebe rajadas de alertas)
+POOLS_POR_HOST = {
+    'economia.awesomeapi.com.br': {'conexoes': 4, 'maximo': 20},
+    'api.trello.com': {'conexoes': 2, 'maximo': 10},
+    'sheets.googleapis.com': {'conexoes': 2, 'maximo': 10},
+}
+
+CABECALHOS_PADRAO = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'User-Agent': 'monitor-cotacoes/1.0',
+}
+
+# Uma sessão por host, criada sob demanda
+_sessoes = {}
+_trava = threading.Lock()
+
+
+def extrair_host(url_ou_host):
+    """Aceita uma URL completa ou só o host e devolve o host"""
+    if '://' in url_ou_host:
+        return urlsplit(url_ou_host).hostname
+    return url_ou_host
+
+
+def configurar_pool(host, conexoes=None, maximo=None):
+    """
+    Ajusta o tamanho do pool de um host
+
+    ⚠️ CUIDADO: só vale para sessões criadas DEPOIS da chamada.
+    Se a sessão já existe, ela é recriada.
+    """
+    atual = dict(POOLS_POR_HOST.get(host, POOL_PADRAO))
+    if conexoes is not None:
+        atual['conexoes'] = conexoes
+    if maximo is not None:
+        atual['maximo'] = maximo
+    POOLS_POR_HOST[host] = atual
+
+    with _trava:
+        sessao = _sessoes.pop(host, None)
+    if sessao is not None:
+        sessao.close()
+
+
+class _SessaoResiliente(requests.Session):
+    """
+    Session que passa TODA requisição pelo retry + disjuntor do host
+
+    Por ser a própria Session, vale também para quem a usa direto
+    (ex: gspread, que recebe a sessão do Google em conexao_sheets)
+    """
+
+    def request(self, method, url, *args, politica=None, **kwargs):
+        enviar = super().request
+        host = extrair_host(url)
+        inicio = time.perf_counter()
+        try:
+            return resiliencia.executar(host, method, lambda: enviar(method, url, *args, **kwargs),
+                                        politica)
+        finally:
+            # Inclui os retries: é o tempo que quem chamou esperou
+            metricas.observar('http_requisicao_segundos', time.perf_counter() - inicio,
+                              "Duração das chamadas HTTP por host (com retries)", host=host)
+
+
+def _criar_sessao(host):
+    """Cria uma Session com pool dimensionado para o host"""
+    config = POOLS_POR_HOST.get(host, POOL_PADRAO)
+
+    # pool_block=False: se o pool lotar, abre conexão extra em vez de travar
+    adaptador = HTTPAdapter(
+        pool_connections=config['conexoes'],
+        pool_maxsize=config['maximo'],
+        pool_block=False,
+    )
+
+    sessao = _SessaoResiliente()
+    sessao.mount('https://', adaptador)
+    sessao.mount('http://', adaptador)
+    sessao.headers.update(CABECALHOS_PADRAO)
+    return sessao
+
+
+def obter_sessao(url_ou_host):
+    """
+    Devolve a Session (com pool keep-alive) do host
+
+    RETORNA:
+    - requests.Session reaproveitada entre chamadas
+    """
+    host = extrair_host(url_ou_host)
+
+    sessao = _sessoes.get(host)
+    if sessao is not None:
+        return sessao
+
+    with _trava:
+        # Confere de novo: outra thread pode ter criado enquanto esperávamos
+        if host not in _sessoes:
+            _sessoes[host] = _criar_sessao(host)
+        return _sessoes[host]
+
+
+def requisitar(metodo, url, **kwargs):
+    """
+    Faz uma requisição pelo pool do host, com timeout padrão
+
+    Aceita os mesmos argumentos de requests.request()
+    e levanta as mesmas exceções (requests.exceptions.*)
+
+    Falhas passageiras são repetidas com backoff; se o host está fora
+    do ar, levanta resiliencia.CircuitoAberto na hora (sem timeout).
+    politica=resiliencia.SEM_RETRY: uma tentativa só (quem chama repete)
+    """
+    kwargs.setdefault('timeout', TIMEOUT_PADRAO)
+    return obter_sessao(url).request(metodo, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """Equivalente a requests.get(), mas reaproveitando conexões"""
+    return requisitar('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Equivalente a requests.post(), mas reaproveitando conexões"""
+    return requisitar('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    """Equivalente a requests.put(), mas reaproveitando conexões"""
+    return requisitar('PUT', url, **kwargs)
+
+
+def estatisticas_conexoes():
+    """
+    Mostra quantas conexões foram abertas vs reaproveitadas por host
+
+    COMO FUNCIONA:
+    - Cada pool do urllib3 conta num_connections (conexões novas)
+      e num_requests (requisições feitas)
+    - Reaproveitadas = requisições - conexões novas
+
+    RETORNA:
+    - dict {host: {'requisicoes', 'conexoes_novas', 'reaproveitadas'}}
+    """
+    with _trava:
+        sessoes = list(_sessoes.items())
+
+    estatisticas = {}
+
+    for host, sessao in sessoes:
+        total = {'requisicoes': 0, 'conexoes_novas': 0, 'reaproveitadas': 0}
+
+        # O mesmo adapter está montado em http:// e https://
+        adaptadores = {id(a): a for a in sessao.adapters.values()}.values()
+
+        for adaptador in adaptadores:
+            pools = adaptador.poolmanager.pools
+            for chave in list(pools.keys()):
+                pool = pools.get(chave)
+                if pool is None:
+                    continue
+                total['requisicoes'] += pool.num_requests
+                total['conexoes_novas'] += pool.num_connections
+
+        total['reaproveitadas'] = max(total['requisicoes'] - total['conexoes_novas'], 0)
+        estatisticas[host] = total
+
+    return estatisticas
+
+
+def imprimir_estatisticas():
+    """Exibe as estatísticas de conexão de forma legível"""
+    for host, total in estatisticas_conexoes().items():
+        print(
+            f"🔌 {host}: {total['requisicoes']} requisições, "
+            f"{total['conexoes_novas']} conexões novas, "
+            f"{total['reaproveitadas']} reaproveitadas"
+        )
+    resiliencia.imprimir_estado()
+
+
+def fechar_sessoes():
+    """Fecha todas as conexões abertas (chamar ao encerrar o processo)"""
+    with _trava:
+        sessoes = list(_sessoes.values())
+        _sessoes.clear()
+
+    for sessao in sessoes:
+        sessao.close()
+
+
+if __name__ == "__main__":
+    from cotacao_moedas import buscar_cotacao
+
+    print("🔁 Fazendo 5 buscas seguidas no mesmo host...")
+    for _ in range(5):
+        buscar_cotacao("USD", "BRL")
+
+    # Esperado: 1 conexão nova e 4 reaproveitadas
+    imprimir_estatisticas()
+    fechar_sessoes()
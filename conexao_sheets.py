@@ -0,0 +1,218 @@
+"""
+🔐 CONEXÃO COM O GOOGLE SHEETS (reaproveitada no processo todo)
+================================================================
+
+OBJETIVO:
+- Ler credentials.json e autorizar UMA vez por processo
+- Guardar as planilhas/abas já abertas (sem buscar metadados de novo)
+- Renovar o token um pouco ANTES de expirar (nada de erro 401 no meio)
+
+POR QUÊ?
+- Cada conectar_google_sheets() fazia: ler arquivo + troca de token OAuth
+  + open_by_key (metadados da planilha) → várias idas à rede por ciclo
+- Num loop de monitoramento isso se repete à toa
+
+USO:
+    from conexao_sheets import obter_aba
+    aba = obter_aba('ID_DA_PLANILHA')          # primeira aba
+    aba = obter_aba('ID_DA_PLANILHA', 'Dados') # aba pelo nome
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import cliente_http
+from metricas import cronometrar, log
+
+# Permissões necessárias (Sheets + Drive)
+ESCOPO = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive'
+]
+
+ARQUIVO_CREDENCIAIS = 'credentials.json'
+
+# Renova o token quando faltar menos que isso para expirar (segundos)
+MARGEM_RENOVACAO = 300
+
+
+class GerenciadorSheets:
+    """
+    Guarda o cliente autorizado e as abas abertas
+
+    PARÂMETROS:
+    - arquivo_credenciais: caminho do JSON da Service Account
+    - margem_renovacao: segundos antes da expiração para renovar o token
+    """
+
+    def __init__(self, arquivo_credenciais=ARQUIVO_CREDENCIAIS,
+                 margem_renovacao=MARGEM_RENOVACAO):
+        self.arquivo_credenciais = arquivo_credenciais
+        self.margem_renovacao = margem_renovacao
+
+        self._cliente = None
+        self._planilhas = {}   # planilha_id → Spreadsheet
+        self._abas = {}        # (planilha_id, nome_aba) → Worksheet
+        self._trava = threading.RLock()
+
+        # Tempos (segundos) para comparar setup frio vs caminho quente
+        # - autorizacao: ler credenciais + OAuth
+        # - frio: primeira abertura de cada aba (inclui autorização, se houver)
+        # - quente: aba servida da memória
+        # (deque com maxlen: num processo longo guarda só as últimas medições)
+        self.tempos = {
+            'autorizacao': deque(maxlen=1000),
+            'frio': deque(maxlen=1000),
+            'quente': deque(maxlen=1000),
+            'renovacoes': 0,
+        }
+
+    # ----------------------------------------
+    # Autenticação
+    # ----------------------------------------
+
+    def _conectar(self):
+        """Setup completo: lê credenciais, autoriza e cria o cliente"""
+        # Import aqui dentro: gspread + oauth2client custam ~300ms para
+        # carregar, e só quem realmente fala com o Sheets deve pagar
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
+        credenciais = ServiceAccountCredentials.from_json_keyfile_name(
+            self.arquivo_credenciais,
+            ESCOPO
+        )
+
+        # Mesmo que gspread.authorize(), com a sessão com pool do cliente_http
+        cliente = gspread.Client(
+            auth=credenciais,
+            session=cliente_http.obter_sessao(cliente_http.HOST_GOOGLE)
+        )
+        cliente.login()
+
+        self._cliente = cliente
+
+    def _token_perto_de_expirar(self):
+        """True se o token expira dentro da margem de renovação"""
+        # gspread 5+ converte para google-auth (expiry);
+        # gspread 3.x usa oauth2client direto (token_expiry)
+        auth = self._cliente.auth
+        expira_em = getattr(auth, 'expiry', None) or getattr(auth, 'token_expiry', None)
+        if expira_em is None:
+            return False
+
+        # As duas bibliotecas guardam a expiração em UTC, sem fuso
+        restante = expira_em - datetime.utcnow()
+        return restante < timedelta(seconds=self.margem_renovacao)
+
+    def _renovar_token(self):
+        """Pede um token novo e atualiza o cabeçalho da sessão"""
+        auth = self._cliente.auth
+
+        # No gspread 3.x, login() só renova se o token JÁ expirou
+        if hasattr(auth, 'token_expiry'):
+            import httplib2
+            auth.refresh(httplib2.Http())
+
+        self._cliente.login()
+        self.tempos['renovacoes'] += 1
+        log.info('sheets_token_renovado', "🔄 Token do Google renovado")
+
+    def cliente(self):
+        """
+        Devolve o cliente autorizado (conecta só na primeira vez)
+
+        RETORNA:
+        - gspread.Client pronto para uso
+        """
+        with self._trava:
+            if self._cliente is None:
+                inicio = time.perf_counter()
+                with cronometrar('sheets_autorizacao'):
+                    self._conectar()
+                self.tempos['autorizacao'].append(time.perf_counter() - inicio)
+            elif self._token_perto_de_expirar():
+                self._renovar_token()
+
+            return self._cliente
+
+    # ----------------------------------------
+    # Planilhas e abas
+    # ----------------------------------------
+
+    def aba(self, planilha_id, nome_aba=None):
+        """
+        Devolve a aba pedida (primeira aba se nome_aba=None)
+
+        Na primeira vez: open_by_key + metadados (caminho frio)
+        Depois: vem direto da memória (caminho quente)
+        """
+        inicio = time.perf_counter()
+
+        with self._trava:
+            cliente = self.cliente()
+            chave = (planilha_id, nome_aba)
+
+            if chave in self._abas:
+                self.tempos['quente'].append(time.perf_counter() - inicio)
+                return self._abas[chave]
+
+            planilha = self._planilhas.get(planilha_id)
+            if planilha is None:
+                planilha = cliente.open_by_key(planilha_id)
+                self._planilhas[planilha_id] = planilha
+
+            aba = planilha.sheet1 if nome_aba is None else planilha.worksheet(nome_aba)
+            self._abas[chave] = aba
+
+        self.tempos['frio'].append(time.perf_counter() - inicio)
+        return aba
+
+    def esquecer(self):
+        """Descarta tudo (força reconectar na próxima chamada)"""
+        with self._trava:
+            self._cliente = None
+            self._planilhas.clear()
+            self._abas.clear()
+
+    def resumo_tempos(self):
+        """Média (ms) do setup frio vs caminho quente"""
+        def media(valores):
+            return sum(valores) / len(valores) * 1000 if valores else 0.0
+
+        return {
+            'autorizacao_ms': media(self.tempos['autorizacao']),
+            'frio_ms': media(self.tempos['frio']),
+            'quente_ms': media(self.tempos['quente']),
+            'chamadas_frias': len(self.tempos['frio']),
+            'chamadas_quentes': len(self.tempos['quente']),
+            'renovacoes': self.tempos['renovacoes'],
+        }
+
+
+# Gerenciador compartilhado pelos scripts
+gerenciador_padrao = GerenciadorSheets()
+
+
+def obter_cliente():
+    """Atalho: cliente autorizado do gerenciador padrão"""
+    return gerenciador_padrao.cliente()
+
+
+def obter_aba(planilha_id, nome_aba=None):
+    """Atalho: aba em cache do gerenciador padrão"""
+    return gerenciador_padrao.aba(planilha_id, nome_aba)
+
+
+if __name__ == "__main__":
+    from configuracao import obter as obter_config
+
+    # 1ª chamada = setup completo; as seguintes = memória
+    for _ in range(5):
+        obter_aba(obter_config().planilha_id)
+
+    resumo = gerenciador_padrao.resumo_tempos()
+    print(f"🥶 Setup frio:  {resumo['frio_ms']:.1f}ms ({resumo['chamadas_frias']}x)")
+    print(f"🔥 Caminho quente: {resumo['quente_ms']:.3f}ms ({resumo['chamadas_quentes']}x)")
@@ -0,0 +1,240 @@
+"""
+⚙️ CONFIGURAÇÃO ÚNICA (ambiente + .env + arquivo opcional)
+===========================================================
+
+OBJETIVO:
+- Antes: load_dotenv() em dois lugares, os.getenv() a CADA alerta
+  e o ID da planilha copiado em três arquivos
+- Agora: UM objeto Configuracao, montado uma vez, com os tipos já
+  convertidos (float, tuplas...) e validados
+- O código quente só lê atributos: obter_config().planilha_id
+
+DE ONDE VEM CADA VALOR (o de baixo ganha):
+1. Padrões deste arquivo
+2. monitor_config.json (opcional): pares, regras, limite, planilha
+3. .env
+4. Variáveis de ambiente de verdade
+
+RECARGA SEM REINICIAR:
+- recarregar_se_mudou() compara o mtime do arquivo e do .env
+  (um os.stat, microssegundos): mudou → monta de novo
+- Arquivo com erro → mantém a configuração anterior e registra no log
+- Quem guarda algo derivado (ex: motor de regras, fila do Trello)
+  se inscreve com ao_recarregar(funcao)
+- Só o monitor_daemon.py verifica; monitor_shards.py lê uma vez
+
+USO:
+    from configuracao import obter as obter_config
+
+    config = obter_config()
+    config.planilha_id, config.limite_dolar, config.credenciais_trello
+"""
+
+import json
+import os
+import threading
+
+from metricas import log
+
+ARQUIVO_PADRAO = os.getenv('MONITOR_CONFIG', 'monitor_config.json')
+ARQUIVO_ENV = '.env'
+
+PLANILHA_ID_PADRAO = '1ENHCxP6I2uOsXuTEey6sb_VQ2vCQEFcQqvAayxBId5w'
+LIMITE_DOLAR_PADRAO = 5.50
+URL_BASE_TRELLO_PADRAO = "https://api.trello.com"
+
+# Chave no arquivo → variável de ambiente que pode sobrescrever
+CAMPOS_ARQUIVO = {
+    'planilha_id': 'PLANILHA_ID',
+    'limite_dolar': 'LIMITE_DOLAR',
+    'url_base_trello': 'TRELLO_URL_BASE',
+    'pares': None,
+    'regras': None,
+}
+
+
+def _ler_par(texto):
+    """'USD-BRL:60:5' → ('USD-BRL', 60.0, 5.0) (mesmo formato do daemon)"""
+    partes = texto.split(':')
+    par, intervalo, jitter = partes + ['60', '0'][len(partes) - 1:]
+    return par.strip().upper(), float(intervalo), float(jitter)
+
+
+class Configuracao:
+    """
+    Configuração pronta para uso (só leitura)
+
+    ATRIBUTOS:
+    - planilha_id: planilha do monitoramento
+    - limite_dolar: alerta USD-BRL sem arquivo de regras (float)
+    - url_base_trello: endereço da API (trocado nos testes)
+    - credenciais_trello: dict api_key/token/board_id/list_id
+      (None se faltar key, token ou lista)
+    - pares: tupla de (par, intervalo, jitter) para o daemon
+    - regras: lista de regras (formato do regras_alerta.json) ou None
+    """
+
+    __slots__ = ('planilha_id', 'limite_dolar', 'url_base_trello', 'credenciais_trello',
+                 'pares', 'regras', 'arquivo', '_assinatura')
+
+    def __init__(self, planilha_id=PLANILHA_ID_PADRAO, limite_dolar=LIMITE_DOLAR_PADRAO,
+                 url_base_trello=URL_BASE_TRELLO_PADRAO, credenciais_trello=None,
+                 pares=(), regras=None, arquivo=None, _assinatura=None):
+        self.planilha_id = planilha_id
+        self.limite_dolar = float(limite_dolar)
+        self.url_base_trello = url_base_trello
+        self.credenciais_trello = credenciais_trello
+        self.pares = tuple(_ler_par(par) if isinstance(par, str) else tuple(par) for par in pares)
+        self.regras = regras
+        self.arquivo = arquivo
+        self._assinatura = _assinatura
+
+    @classmethod
+    def carregar(cls, arquivo=ARQUIVO_PADRAO, arquivo_env=ARQUIVO_ENV, ambiente=None):
+        """
+        Lê as quatro fontes e devolve a configuração
+
+        ⚠️ CUIDADO: levanta ValueError se o arquivo tiver chave
+        desconhecida ou valor inválido (melhor do que rodar errado)
+        """
+        assinatura = _assinatura(arquivo, arquivo_env)
+        ambiente = os.environ if ambiente is None else ambiente
+
+        dados = {}
+        if assinatura[0] is not None:
+            with open(arquivo, encoding='utf-8') as conteudo:
+                dados = json.load(conteudo)
+            desconhecidas = set(dados) - set(CAMPOS_ARQUIVO)
+            if desconhecidas:
+                raise ValueError(f"{arquivo}: chave(s) desconhecida(s): {sorted(desconhecidas)}")
+
+        variaveis = {}
+        if assinatura[1] is not None:
+            # dotenv só aqui (a 1ª leitura da configuração), não no import
+            from dotenv import dotenv_values
+            variaveis = {nome: valor for nome, valor in dotenv_values(arquivo_env).items()
+                         if valor is not None}
+        variaveis.update(ambiente)
+
+        for campo, variavel in CAMPOS_ARQUIVO.items():
+            if variavel and variaveis.get(variavel):
+                dados[campo] = variaveis[variavel]
+
+        trello = {
+            'api_key': variaveis.get('TRELLO_API_KEY'),
+            'token': variaveis.get('TRELLO_TOKEN'),
+            'board_id': variaveis.get('TRELLO_BOARD_ID'),
+            'list_id': variaveis.get('TRELLO_LIST_ID'),
+        }
+        completas = trello['api_key'] and trello['token'] and trello['list_id']
+
+        try:
+            config = cls(credenciais_trello=trello if completas else None, arquivo=arquivo,
+                         _assinatura=assinatura, **dados)
+            # Regras erradas aparecem agora, não no primeiro alerta
+            if config.regras is not None:
+                config.criar_motor()
+        except (TypeError, ValueError, KeyError) as erro:
+            raise ValueError(f"Configuração inválida: {erro!r}") from erro
+        return config
+
+    def com(self, **mudancas):
+        """Cópia com alguns campos trocados (testes, benchmark)"""
+        campos = {nome: getattr(self, nome) for nome in self.__slots__}
+        campos.update(mudancas)
+        return Configuracao(**campos)
+
+    def mudou(self):
+        """True se o arquivo ou o .env mudaram desde a leitura"""
+        return self._assinatura is not None and _assinatura(self.arquivo, ARQUIVO_ENV) != self._assinatura
+
+    def criar_motor(self):
+        """MotorRegras das regras do arquivo (sem elas, o padrão com limite_dolar)"""
+        from regras_alerta import MotorRegras, motor_padrao, regras_de_dict
+
+        if self.regras is None:
+            return motor_padrao(self.limite_dolar)
+        return MotorRegras(regra for item in self.regras for regra in regras_de_dict(item))
+
+    def __repr__(self):
+        trello = "ok" if self.credenciais_trello else "faltando"
+        return (f"Configuracao(planilha_id={self.planilha_id!r}, limite_dolar={self.limite_dolar}, "
+                f"pares={len(self.pares)}, regras={'arquivo' if self.regras is None else len(self.regras)}, "
+                f"trello={trello})")
+
+
+def _assinatura(arquivo, arquivo_env):
+    """(mtime do arquivo, mtime do .env); None para o que não existe"""
+    mtimes = []
+    for caminho in (arquivo, arquivo_env):
+        try:
+            mtimes.append(os.stat(caminho).st_mtime_ns)
+        except (OSError, TypeError):
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+# ============================================
+# ♻️ CONFIGURAÇÃO DO PROCESSO
+# ============================================
+
+_atual = None
+_trava = threading.Lock()
+_inscritos = []
+
+
+def obter():
+    """Configuração do processo (lida na primeira chamada)"""
+    config = _atual
+    if config is not None:
+        return config
+    with _trava:
+        if _atual is None:
+            definir(Configuracao.carregar())
+        return _atual
+
+
+def definir(config):
+    """Troca a configuração do processo e avisa os inscritos"""
+    global _atual
+    antiga, _atual = _atual, config
+    if antiga is not None:
+        for funcao in list(_inscritos):
+            funcao(config, antiga)
+    return config
+
+
+def ao_recarregar(funcao):
+    """Chama funcao(nova, antiga) sempre que a configuração for trocada"""
+    _inscritos.append(funcao)
+    return funcao
+
+
+def recarregar_se_mudou():
+    """
+    Relê a configuração se o arquivo ou o .env mudaram
+
+    RETORNA:
+    - a configuração em uso (a nova, ou a mesma se nada mudou / deu erro)
+    """
+    config = obter()
+    if not config.mudou():
+        return config
+
+    try:
+        nova = Configuracao.carregar(config.arquivo)
+    except (OSError, ValueError) as erro:
+        # Fica valendo a anterior; a assinatura nova evita repetir o erro a cada checagem
+        log.erro('config_invalida', "❌ Configuração com erro, mantendo a anterior",
+                 arquivo=config.arquivo, erro=str(erro))
+        config._assinatura = _assinatura(config.arquivo, ARQUIVO_ENV)
+        return config
+
+    log.info('config_recarregada', "⚙️ Configuração recarregada", arquivo=config.arquivo,
+             pares=len(nova.pares))
+    with _trava:
+        return definir(nova)
+
+
+if __name__ == "__main__":
+    print(f"⚙️ {obter()}")
@@ -7,6 +7,147 @@
 import requests
 from datetime import datetime
 
+import cliente_http
+from metricas import log
+
+# Endereço base da AwesomeAPI (separado para facilitar testes com servidor local)
+URL_BASE_AWESOMEAPI = "https://economia.awesomeapi.com.br"
+
+# Quantos pares cabem em UMA requisição
+# 💡 DICA: a API aceita "USD-BRL,EUR-BRL,..." mas URLs muito longas
+# podem ser recusadas, então dividimos listas grandes em lotes
+TAMANHO_LOTE = 50
+
+# Campos que a API devolve como texto mas que são números
+CAMPOS_NUMERICOS = ('bid', 'ask', 'high', 'low', 'varBid', 'pctChange')
+
+# Contador de requisições HTTP (para medir quantas idas à API cada ciclo faz)
+contador_requisicoes = {'requisicoes': 0, 'pares': 0}
+
+# Funções avisadas a cada busca (ex: gravar histórico)
+# Cada uma recebe o dict {par: cotacao} retornado por buscar_cotacoes()
+ouvintes_cotacao = []
+
+
+def registrar_ouvinte(funcao):
+    """Registra uma função para receber toda cotação buscada"""
+    if funcao not in ouvintes_cotacao:
+        ouvintes_cotacao.append(funcao)
+
+
+def normalizar_par(par):
+    """
+    Aceita "USD-BRL", "usd-brl" ou ("USD", "BRL") e devolve "USD-BRL"
+    """
+    if isinstance(par, (tuple, list)):
+        origem, destino = par
+    else:
+        origem, destino = par.split('-')
+    return f"{origem.strip().upper()}-{destino.strip().upper()}"
+
+
+def converter_cotacao(bruto):
+    """
+    Converte o dicionário cru da API (tudo string) em tipos de verdade
+
+    RETORNA:
+    - dict com os mesmos campos, mas 'bid', 'ask', 'pctChange'...
+      como float e 'timestamp' como int (epoch em segundos)
+    """
+    cotacao = dict(bruto)
+
+    for campo in CAMPOS_NUMERICOS:
+        if campo in cotacao:
+            cotacao[campo] = float(cotacao[campo])
+
+    if 'timestamp' in cotacao:
+        cotacao['timestamp'] = int(cotacao['timestamp'])
+
+    return cotacao
+
+
+def dividir_em_lotes(itens, tamanho):
+    """Divide uma lista em pedaços de no máximo `tamanho` itens"""
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def reiniciar_contador():
+    """Zera o contador de requisições (chamar no início de cada ciclo)"""
+    contador_requisicoes['requisicoes'] = 0
+    contador_requisicoes['pares'] = 0
+
+
+def buscar_cotacoes(pares, tamanho_lote=TAMANHO_LOTE, timeout=10):
+    """
+    Busca VÁRIOS pares de moedas com o mínimo de requisições
+
+    COMO FUNCIONA:
+    1. Junta os pares no formato "USD-BRL,EUR-BRL,..." (1 GET por lote)
+    2. Listas grandes são divididas em lotes de `tamanho_lote`
+    3. Cada resposta é convertida para tipos numéricos
+
+    Args:
+        pares (list): Pares como "USD-BRL" ou ("USD", "BRL")
+        tamanho_lote (int): Máximo de pares por requisição
+        timeout (int): Segundos de espera por requisição
+
+    Returns:
+        dict: {"USD-BRL": {...cotação convertida...}, ...}
+              Pares que falharam simplesmente não aparecem
+    """
+    # Remove duplicados mantendo a ordem original
+    pares = list(dict.fromkeys(normalizar_par(par) for par in pares))
+
+    resultado = {}
+    requisicoes = 0
+
+    for lote in dividir_em_lotes(pares, tamanho_lote):
+        url = f"{URL_BASE_AWESOMEAPI}/json/last/{','.join(lote)}"
+        requisicoes += 1
+
+        try:
+            # Sessão compartilhada: reaproveita a conexão entre ciclos
+            resposta = cliente_http.get(url, timeout=timeout)
+            resposta.raise_for_status()
+            dados = resposta.json()
+
+        except requests.exceptions.Timeout:
+            log.erro('cotacao_timeout', "⏰ A API demorou muito para responder",
+                     pares=len(lote), timeout=timeout)
+            continue
+
+        except requests.exceptions.HTTPError as e:
+            log.erro('cotacao_erro_http', "❌ Erro HTTP ao buscar cotações",
+                     pares=len(lote), status=e.response.status_code if e.response is not None else None,
+                     erro=str(e))
+            continue
+
+        except requests.exceptions.RequestException as e:
+            log.erro('cotacao_erro_requisicao', "❌ Erro na requisição de cotações",
+                     pares=len(lote), erro=str(e))
+            continue
+
+        # A API devolve chaves como "USDBRL" → voltamos para "USD-BRL"
+        for bruto in dados.values():
+            par = f"{bruto['code']}-{bruto['codein']}"
+            resultado[par] = converter_cotacao(bruto)
+
+    contador_requisicoes['requisicoes'] += requisicoes
+    contador_requisicoes['pares'] += len(pares)
+
+    if resultado:
+        for ouvinte in ouvintes_cotacao:
+            ouvinte(resultado)
+
+    # debug: no daemon/shards isto roda a cada poucos segundos
+    if len(pares) > 1:
+        log.debug('cotacoes_buscadas', "📡 Pares obtidos", obtidos=len(resultado),
+                  pedidos=len(pares), requisicoes=requisicoes)
+
+    return resultado
+
+
 def buscar_cotacao(moeda_origem="USD", moeda_destino="BRL"):
     """
     Busca cotação de moedas usando a API pública AwesomeAPI
@@ -18,34 +159,16 @@ def buscar_cotacao(moeda_origem="USD", moeda_destino="BRL"):
     Returns:
         dict: Dados da cotação ou None em caso de erro
     """
-    # URL da API - note o f-string para interpolação
-    url = f"https://economia.awesomeapi.com.br/json/last/{moeda_origem}-{moeda_destino}"
-    
-    try:
-        # Fazendo a requisição GET
-        # timeout evita travamento infinito
-        resposta = requests.get(url, timeout=10)
-        
-        # Verifica se a resposta foi bem-sucedida (status 200-299)
-        resposta.raise_for_status()
-        
-        # Converte JSON para dicionário Python
-        dados = resposta.json()
-        
-        return dados
-        
-    except requests.exceptions.Timeout:
-        print("⏰ Erro: A API demorou muito para responder")
-        return None
-    
-    except requests.exceptions.HTTPError as e:
-        print(f"❌ Erro HTTP: {e}")
-        return None
-    
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erro na requisição: {e}")
+    # Atalho para buscar_cotacoes() com um único par
+    par = normalizar_par((moeda_origem, moeda_destino))
+    cotacoes = buscar_cotacoes([par])
+
+    if par not in cotacoes:
         return None
 
+    # Mantém o formato da API: {"USDBRL": {...}}
+    return {par.replace('-', ''): cotacoes[par]}
+
 
 def formatar_cotacao(dados):
     """
@@ -71,6 +194,9 @@ def formatar_cotacao(dados):
 
 
 if __name__ == "__main__":
+    from historico_cotacoes import ativar_gravacao
+    ativar_gravacao()
+
     print("🌍 Buscando cotação do dólar...")
     
     # Busca a cotação
@@ -79,4 +205,12 @@ if __name__ == "__main__":
     # Exibe de forma formatada
     print(formatar_cotacao(dados))
     
-    # 🎯 DESAFIO EXTRA: Tente buscar EUR-BRL também!
\ No newline at end of file
+    # Vários pares de uma vez → uma única requisição
+    print("🌍 Buscando várias moedas em lote...")
+    reiniciar_contador()
+    cotacoes = buscar_cotacoes(["USD-BRL", "EUR-BRL", "GBP-BRL", "BTC-BRL"])
+
+    for par, cotacao in cotacoes.items():
+        print(f"   {par}: {cotacao['bid']:.2f} ({cotacao['pctChange']:+.2f}%)")
+
+    print(f"   Requisições neste ciclo: {contador_requisicoes['requisicoes']}")
\ No newline at end of file
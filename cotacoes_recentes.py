@@ -0,0 +1,279 @@
+"""
+🧮 COTAÇÕES COMPACTAS + HISTÓRICO RECENTE EM BUFFER CIRCULAR
+=============================================================
+
+OBJETIVO:
+- Trocar o dict {'valor', 'variacao', 'data_hora'} por um objeto com
+  __slots__: sem dicionário por instância, horário como epoch (float)
+  e o texto 'dd/mm/aaaa hh:mm:ss' formatado SÓ quando alguém pede
+- Guardar as últimas N cotações de cada par em arrays de float
+  (array('d')): 8 bytes por número, sem um objeto Python por cotação
+
+POR QUÊ?
+- Um daemon com centenas de pares e milhares de cotações recentes
+  por par gastava ~285 bytes por cotação em dicts + strings
+  (python cotacoes_recentes.py: ~120 com __slots__, ~25 no buffer)
+- strftime() rodava em TODA cotação, mesmo nas que nunca são exibidas
+
+COMPATIBILIDADE:
+- Cotacao aceita cotacao['valor'] e cotacao.get('par'), como o dict,
+  então salvar_no_sheets, alertas e Trello funcionam sem mudança
+
+USO:
+    cotacao = Cotacao.da_api(cotacoes['USD-BRL'])
+    historico_recente.registrar(cotacao)
+    historico_recente.buffer('USD-BRL').valores()   → [5.41, 5.43, ...]
+"""
+
+import threading
+import time
+from array import array
+
+FORMATO_DATA_HORA = '%d/%m/%Y %H:%M:%S'
+
+# Últimas cotações guardadas por par
+CAPACIDADE_PADRAO = 1000
+
+
+class Cotacao:
+    """
+    Uma cotação, no formato usado pelo monitoramento
+
+    PARÂMETROS:
+    - par: 'USD-BRL'
+    - valor: bid (float)
+    - variacao: pctChange (float, em %)
+    - ts: epoch em segundos (None = agora)
+    """
+
+    __slots__ = ('par', 'valor', 'variacao', 'ts')
+
+    # Chaves aceitas no acesso estilo dict
+    _CHAVES = frozenset(('par', 'valor', 'variacao', 'ts', 'data_hora'))
+
+    def __init__(self, par, valor, variacao, ts=None):
+        self.par = par
+        self.valor = valor
+        self.variacao = variacao
+        self.ts = time.time() if ts is None else ts
+
+    @classmethod
+    def da_api(cls, cotacao, ts=None):
+        """
+        Cria a partir do dict de buscar_cotacoes() (já convertido)
+
+        O horário é o da API ('timestamp': quando a cotação mudou lá),
+        não o da consulta — duas consultas da mesma cotação ficam iguais
+        """
+        if ts is None:
+            ts = cotacao.get('timestamp')
+        return cls(f"{cotacao['code']}-{cotacao['codein']}", cotacao['bid'], cotacao['pctChange'], ts)
+
+    @property
+    def data_hora(self):
+        """Texto formatado na hora do uso (não na criação)"""
+        return time.strftime(FORMATO_DATA_HORA, time.localtime(self.ts))
+
+    # ----------------------------------------
+    # Acesso como dict (código antigo continua funcionando)
+    # ----------------------------------------
+
+    def __getitem__(self, chave):
+        if chave not in self._CHAVES:
+            raise KeyError(chave)
+        return getattr(self, chave)
+
+    def get(self, chave, padrao=None):
+        return getattr(self, chave) if chave in self._CHAVES else padrao
+
+    def __contains__(self, chave):
+        return chave in self._CHAVES
+
+    def como_dict(self):
+        return {'par': self.par, 'valor': self.valor, 'variacao': self.variacao,
+                'data_hora': self.data_hora}
+
+    def __repr__(self):
+        return f"Cotacao({self.par!r}, {self.valor}, {self.variacao}, ts={self.ts})"
+
+
+class BufferCircular:
+    """
+    Últimas `capacidade` cotações de UM par (struct-of-arrays)
+
+    COMO FUNCIONA:
+    - Três array('d') do tamanho da capacidade: ts, valor, variacao
+    - _proximo aponta onde entra a próxima; ao encher, sobrescreve a
+      mais antiga (igual ao deque(maxlen), mas sem objeto por item)
+    - Memória fixa: 24 bytes por cotação, alocada uma vez
+    """
+
+    __slots__ = ('par', 'capacidade', '_ts', '_valor', '_variacao', '_proximo', '_tamanho')
+
+    def __init__(self, par, capacidade=CAPACIDADE_PADRAO):
+        self.par = par
+        self.capacidade = capacidade
+        vazio = array('d', bytes(8 * capacidade))
+        self._ts = vazio
+        self._valor = array('d', vazio)
+        self._variacao = array('d', vazio)
+        self._proximo = 0
+        self._tamanho = 0
+
+    def adicionar(self, valor, variacao, ts):
+        posicao = self._proximo
+        self._ts[posicao] = ts
+        self._valor[posicao] = valor
+        self._variacao[posicao] = variacao
+        self._proximo = (posicao + 1) % self.capacidade
+        if self._tamanho < self.capacidade:
+            self._tamanho += 1
+
+    def __len__(self):
+        return self._tamanho
+
+    def _indices(self):
+        """Posições da mais antiga para a mais nova"""
+        inicio = (self._proximo - self._tamanho) % self.capacidade
+        return [(inicio + n) % self.capacidade for n in range(self._tamanho)]
+
+    def valores(self):
+        """Bids em ordem de tempo (lista de float)"""
+        return [self._valor[i] for i in self._indices()]
+
+    def __iter__(self):
+        """Cotações em ordem de tempo (objetos criados só aqui)"""
+        for i in self._indices():
+            yield Cotacao(self.par, self._valor[i], self._variacao[i], self._ts[i])
+
+    def ultima(self):
+        if not self._tamanho:
+            return None
+        i = (self._proximo - 1) % self.capacidade
+        return Cotacao(self.par, self._valor[i], self._variacao[i], self._ts[i])
+
+    def bytes_usados(self):
+        return 3 * self._ts.itemsize * self.capacidade
+
+
+class HistoricoRecente:
+    """
+    Um BufferCircular por par, criado na primeira cotação
+
+    PARÂMETROS:
+    - capacidade: cotações guardadas por par
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.capacidade = capacidade
+        self._buffers = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, cotacao):
+        """Guarda uma Cotacao (ou dict com par/valor/variacao)"""
+        if isinstance(cotacao, Cotacao):
+            par, valor, variacao, ts = cotacao.par, cotacao.valor, cotacao.variacao, cotacao.ts
+        else:
+            par, valor, variacao = cotacao['par'], cotacao['valor'], cotacao['variacao']
+            ts = cotacao.get('ts') or time.time()
+
+        with self._trava:
+            buffer = self._buffers.get(par)
+            if buffer is None:
+                buffer = self._buffers[par] = BufferCircular(par, self.capacidade)
+            buffer.adicionar(valor, variacao, ts)
+
+    def buffer(self, par):
+        """BufferCircular do par (None se nunca recebeu cotação)"""
+        return self._buffers.get(par)
+
+    def pares(self):
+        return list(self._buffers)
+
+    def estatisticas(self):
+        with self._trava:
+            buffers = list(self._buffers.values())
+        return {
+            'pares': len(buffers),
+            'cotacoes': sum(len(buffer) for buffer in buffers),
+            'bytes': sum(buffer.bytes_usados() for buffer in buffers),
+        }
+
+
+# Histórico recente compartilhado (usado pelo daemon)
+historico_recente = HistoricoRecente()
+
+
+# ============================================
+# 📏 BENCHMARK: dict vs __slots__ vs array('d')
+# ============================================
+
+def benchmark_memoria(pares=200, por_par=1000):
+    """
+    Guarda `pares` x `por_par` cotações de três jeitos e mede memória/tempo
+
+    1. deque(maxlen) de dicts com data_hora formatada (jeito antigo)
+    2. deque(maxlen) de Cotacao (__slots__, data_hora preguiçosa)
+    3. BufferCircular (array('d'))
+
+    RETORNA:
+    - dict {nome: {'bytes_por_cotacao', 'us_por_cotacao'}}
+    """
+    import tracemalloc
+    from collections import deque
+    from datetime import datetime
+
+    agora = time.time()
+    entradas = [(f"M{n:03d}-BRL", 5.0 + n / 1000, 0.1) for n in range(pares)]
+
+    def com_dicts():
+        recentes = {par: deque(maxlen=por_par) for par, _, _ in entradas}
+        for passo in range(por_par):
+            for par, valor, variacao in entradas:
+                recentes[par].append({
+                    'par': par, 'valor': valor + passo / 1e6, 'variacao': variacao,
+                    'data_hora': datetime.now().strftime(FORMATO_DATA_HORA),
+                })
+        return recentes
+
+    def com_slots():
+        recentes = {par: deque(maxlen=por_par) for par, _, _ in entradas}
+        for passo in range(por_par):
+            for par, valor, variacao in entradas:
+                recentes[par].append(Cotacao(par, valor + passo / 1e6, variacao, agora + passo))
+        return recentes
+
+    def com_buffer():
+        recentes = HistoricoRecente(por_par)
+        for passo in range(por_par):
+            for par, valor, variacao in entradas:
+                recentes.registrar(Cotacao(par, valor + passo / 1e6, variacao, agora + passo))
+        return recentes
+
+    total = pares * por_par
+    resultado = {}
+    for nome, funcao in (('dict + strftime', com_dicts), ('Cotacao __slots__', com_slots),
+                         ('BufferCircular', com_buffer)):
+        # Tempo sem o tracemalloc (ele deixa cada alocação bem mais lenta)
+        inicio = time.perf_counter()
+        funcao()
+        segundos = time.perf_counter() - inicio
+
+        tracemalloc.start()
+        guardado = funcao()
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del guardado
+
+        resultado[nome] = {
+            'bytes_por_cotacao': memoria / total,
+            'us_por_cotacao': segundos / total * 1e6,
+        }
+    return resultado
+
+
+if __name__ == "__main__":
+    print("🧮 200 pares x 1000 cotações recentes")
+    for nome, r in benchmark_memoria().items():
+        print(f"   {nome:<18} {r['bytes_por_cotacao']:6.0f} bytes/cotação | "
+              f"{r['us_por_cotacao']:5.2f}µs para guardar")
@@ -0,0 +1,239 @@
+"""
+🔀 DESTINOS EM PARALELO (depois da busca)
+==========================================
+
+OBJETIVO:
+- Sheets e Trello não dependem um do outro → rodar AO MESMO TEMPO
+  (o ciclo passa a custar o MAIOR dos dois, não a SOMA)
+- Um destino que falha não derruba os outros
+- Cada destino tem um prazo: passou dele, o ciclo segue sem esperar
+- Novos destinos (banco local, webhook...) entram sem alongar o ciclo
+
+COMO FUNCIONA (um pequeno DAG):
+- Cada destino declara de quem depende (depende_de=...)
+- Quem não depende de ninguém começa na hora, num pool de threads
+- Quando um destino termina OK, os que dependiam dele são liberados
+- Se ele falhar ou estourar o prazo, os dependentes são PULADOS
+
+USO:
+    executor = ExecutorDestinos()
+    executor.registrar('sheets', salvar_no_sheets, prazo=10)
+    executor.registrar('alertas', alertar_por_regras, prazo=10)
+    executor.registrar('webhook', enviar_webhook, depende_de=['alertas'])
+    resultados = executor.executar(cotacao)
+    resultados['sheets']['status']   → 'ok' | 'erro' | 'prazo' | 'pulado'
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metricas import contar, log
+
+TRABALHADORES_PADRAO = 8
+PRAZO_PADRAO = 10.0   # segundos
+
+
+class Destino:
+    """Um passo depois da busca: função que recebe a cotação"""
+
+    __slots__ = ('nome', 'funcao', 'depende_de', 'prazo')
+
+    def __init__(self, nome, funcao, depende_de=(), prazo=PRAZO_PADRAO):
+        self.nome = nome
+        self.funcao = funcao
+        self.depende_de = tuple(depende_de)
+        self.prazo = prazo
+
+    def __repr__(self):
+        return f"Destino({self.nome!r}, depende_de={self.depende_de}, prazo={self.prazo})"
+
+
+class ExecutorDestinos:
+    """
+    Roda os destinos registrados em paralelo, respeitando dependências
+
+    PARÂMETROS:
+    - trabalhadores: threads do pool (compartilhado entre execuções)
+    - prazo_padrao: segundos de cada destino que não informar o seu
+    """
+
+    def __init__(self, trabalhadores=TRABALHADORES_PADRAO, prazo_padrao=PRAZO_PADRAO):
+        self.trabalhadores = trabalhadores
+        self.prazo_padrao = prazo_padrao
+
+        self._destinos = {}          # nome → Destino (na ordem de registro)
+        self._pool = None
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, funcao, depende_de=(), prazo=None):
+        """
+        Adiciona (ou troca) um destino
+
+        ⚠️ CUIDADO: as dependências precisam estar registradas ANTES —
+        assim nunca existe ciclo no grafo
+        """
+        faltando = [dependencia for dependencia in depende_de if dependencia not in self._destinos]
+        if faltando:
+            raise ValueError(f"Destino {nome!r} depende de destinos não registrados: {faltando}")
+
+        with self._trava:
+            self._destinos[nome] = Destino(nome, funcao, depende_de,
+                                           self.prazo_padrao if prazo is None else prazo)
+
+    def remover(self, nome):
+        """Tira um destino (e quem depende dele)"""
+        with self._trava:
+            self._destinos.pop(nome, None)
+            for outro in [d.nome for d in self._destinos.values() if nome in d.depende_de]:
+                self._destinos.pop(outro, None)
+
+    @property
+    def nomes(self):
+        return list(self._destinos)
+
+    def _obter_pool(self):
+        with self._trava:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.trabalhadores, thread_name_prefix='destino')
+            return self._pool
+
+    @staticmethod
+    def _rodar(destino, cotacao):
+        """Roda na thread do pool: devolve (resultado, duração)"""
+        inicio = time.perf_counter()
+        resultado = destino.funcao(cotacao)
+        return resultado, time.perf_counter() - inicio
+
+    def executar(self, cotacao):
+        """
+        Envia a cotação para todos os destinos
+
+        RETORNA:
+        - dict {nome: {'status', 'resultado', 'erro', 'duracao'}}
+          status: 'ok' | 'erro' (exceção) | 'prazo' (não terminou a tempo)
+                  | 'pulado' (uma dependência não deu certo)
+        """
+        with self._trava:
+            destinos = list(self._destinos.values())
+
+        pool = self._obter_pool()
+        resultados = {}
+        em_andamento = {}            # future → (destino, horário limite)
+        esperando = list(destinos)   # ainda não começaram
+
+        def liberar():
+            """Começa quem já pode começar; pula quem nunca vai poder"""
+            for destino in list(esperando):
+                estados = [resultados.get(nome, {}).get('status') for nome in destino.depende_de]
+                if any(estado is None for estado in estados):
+                    continue
+                esperando.remove(destino)
+                if all(estado == 'ok' for estado in estados):
+                    futuro = pool.submit(self._rodar, destino, cotacao)
+                    em_andamento[futuro] = (destino, time.monotonic() + destino.prazo)
+                else:
+                    resultados[destino.nome] = {'status': 'pulado', 'resultado': None,
+                                                'erro': None, 'duracao': 0.0}
+
+        liberar()
+        while em_andamento:
+            proximo_limite = min(limite for _, limite in em_andamento.values())
+            feitos, _ = wait(em_andamento, timeout=max(0.0, proximo_limite - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+
+            for futuro in feitos:
+                destino, _ = em_andamento.pop(futuro)
+                try:
+                    resultado, duracao = futuro.result()
+                    resultados[destino.nome] = {'status': 'ok', 'resultado': resultado,
+                                                'erro': None, 'duracao': duracao}
+                except Exception as e:
+                    # Isolamento: o erro fica só neste destino
+                    resultados[destino.nome] = {'status': 'erro', 'resultado': None,
+                                                'erro': e, 'duracao': None}
+                    log.erro('destino_falhou', "❌ Destino falhou", destino=destino.nome, erro=str(e))
+
+            agora = time.monotonic()
+            for futuro, (destino, limite) in list(em_andamento.items()):
+                if agora >= limite:
+                    # A thread continua no pool; o ciclo é que não espera mais
+                    del em_andamento[futuro]
+                    resultados[destino.nome] = {'status': 'prazo', 'resultado': None,
+                                                'erro': None, 'duracao': destino.prazo}
+                    log.aviso('destino_prazo', "⏰ Destino passou do prazo",
+                              destino=destino.nome, prazo=destino.prazo)
+
+            liberar()
+
+        for nome, resultado in resultados.items():
+            contar('monitor_destino_total', "Execuções de cada destino por status",
+                   destino=nome, status=resultado['status'])
+        return resultados
+
+    def fechar(self, esperar=True):
+        """Desliga o pool (esperar=True: espera destinos atrasados)"""
+        with self._trava:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=esperar)
+
+
+# ============================================
+# 📏 DEMONSTRAÇÃO: soma vs máximo
+# ============================================
+
+def comparar_com_sequencial(latencia_sheets=0.2, latencia_trello=0.3):
+    """
+    Destinos que só "dormem": mede sequencial vs executor
+
+    Inclui um destino que falha e um que estoura o prazo,
+    para mostrar que os outros não são afetados
+    """
+    def sheets(_):
+        time.sleep(latencia_sheets)
+        return True
+
+    def trello(_):
+        time.sleep(latencia_trello)
+        return True
+
+    def quebrado(_):
+        raise RuntimeError("webhook fora do ar")
+
+    def lento(_):
+        time.sleep(1.0)
+
+    def depois_do_quebrado(_):
+        return True
+
+    inicio = time.perf_counter()
+    sheets(None)
+    trello(None)
+    tempo_sequencial = time.perf_counter() - inicio
+
+    executor = ExecutorDestinos()
+    executor.registrar('sheets', sheets)
+    executor.registrar('trello', trello)
+    executor.registrar('webhook', quebrado)
+    executor.registrar('lento', lento, prazo=0.4)
+    executor.registrar('auditoria', depois_do_quebrado, depende_de=['webhook'])
+
+    inicio = time.perf_counter()
+    resultados = executor.executar({'par': 'USD-BRL'})
+    tempo_paralelo = time.perf_counter() - inicio
+    executor.fechar(esperar=False)
+
+    return {
+        'sequencial': tempo_sequencial,
+        'paralelo': tempo_paralelo,
+        'status': {nome: resultado['status'] for nome, resultado in resultados.items()},
+    }
+
+
+if __name__ == "__main__":
+    r = comparar_com_sequencial()
+    print(f"🐢 Sheets + Trello em sequência: {r['sequencial']:.2f}s")
+    print(f"🔀 Executor (com prazo de 0.4s):  {r['paralelo']:.2f}s")
+    for nome, status in r['status'].items():
+        print(f"   {nome:<10} {status}")
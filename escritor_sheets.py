@@ -0,0 +1,371 @@
+"""
+📦 ESCRITA EM LOTE NO GOOGLE SHEETS
+====================================
+
+OBJETIVO:
+- Parar de fazer 1 chamada de API por linha (append_row)
+- Juntar as linhas num buffer e enviar tudo com UM append_rows()
+
+QUANDO O BUFFER É ENVIADO (flush)?
+1. Quando junta `limite_linhas` linhas
+2. Quando a linha mais antiga espera mais que `latencia_maxima` segundos
+3. Quando o programa encerra (fechar() / atexit)
+
+⚠️ CUIDADO: a cota do Sheets é por REQUISIÇÃO, não por linha.
+100 linhas num append_rows() custam o mesmo que 1 append_row()!
+
+QUANDO UM LOTE FALHA:
+- append_rows é um POST (não idempotente): só repetimos quando o Sheets
+  certamente NÃO gravou (conexão recusada, disjuntor aberto, 429)
+- 4xx ("lote envenenado") ou resultado incerto (timeout de leitura,
+  5xx): o lote sai do buffer e vai para a caixa de saída (ao_falhar),
+  em vez de ser repetido para sempre ou duplicar linhas
+- O buffer tem teto (capacidade): Sheets fora do ar não faz a memória
+  crescer sem limite; o que não cabe vai direto para a caixa de saída
+"""
+
+import atexit
+import threading
+import time
+
+import requests
+
+import resiliencia
+from metricas import cronometrar, log
+
+# Padrões do flush
+LIMITE_LINHAS_PADRAO = 100
+LATENCIA_MAXIMA_PADRAO = 5.0
+
+# Retentativas de um flush inteiro
+TENTATIVAS_PADRAO = 3
+ESPERA_BASE_PADRAO = 1.0
+
+# Máximo de linhas esperando no buffer
+CAPACIDADE_PADRAO = 10_000
+
+
+def _status_http(erro):
+    """Código HTTP de um erro do gspread/requests (None se não houver resposta)"""
+    resposta = getattr(erro, 'response', None)
+    return getattr(resposta, 'status_code', None)
+
+
+def pode_repetir(erro):
+    """
+    True se o append_rows certamente NÃO foi gravado
+
+    Conexão recusada e disjuntor aberto nunca chegaram ao Sheets; 429
+    é recusado antes de processar. Timeout de leitura e 5xx podem ter
+    gravado: repetir duplicaria as linhas (mesma regra do resiliencia.py)
+    """
+    if isinstance(erro, (requests.exceptions.ConnectionError, resiliencia.CircuitoAberto)):
+        return True
+    return _status_http(erro) == 429
+
+
+class SheetsBatchWriter:
+    """
+    Buffer de linhas que descarrega em lote numa aba do Sheets
+
+    PARÂMETROS:
+    - aba: worksheet do gspread (precisa ter append_rows)
+    - limite_linhas: descarrega ao atingir esse número de linhas
+    - latencia_maxima: segundos máximos que uma linha fica esperando
+    - tentativas: quantas vezes tentar o MESMO lote antes de desistir
+      (só erros em que o Sheets certamente não gravou, ver pode_repetir)
+    - espera_base: espera entre tentativas (dobra a cada falha)
+    - capacidade: máximo de linhas no buffer
+
+    USO:
+        with SheetsBatchWriter(aba) as escritor:
+            escritor.adicionar(['01/01/2025 10:00', 'USD/BRL', 5.43])
+    """
+
+    def __init__(self, aba, limite_linhas=LIMITE_LINHAS_PADRAO,
+                 latencia_maxima=LATENCIA_MAXIMA_PADRAO,
+                 tentativas=TENTATIVAS_PADRAO, espera_base=ESPERA_BASE_PADRAO,
+                 capacidade=CAPACIDADE_PADRAO, value_input_option='USER_ENTERED'):
+        self.aba = aba
+        self.limite_linhas = limite_linhas
+        self.latencia_maxima = latencia_maxima
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.capacidade = capacidade
+        self.value_input_option = value_input_option
+
+        self._buffer = []
+        self._confirmacoes = []    # ao_enviar das linhas do buffer
+        self._falhas = []          # ao_falhar das linhas do buffer
+        self._primeira_em = None   # quando a linha mais antiga entrou
+
+        # _condicao protege o buffer; _trava_envio garante 1 flush por vez
+        # (assim os lotes chegam na planilha na mesma ordem do buffer)
+        self._condicao = threading.Condition()
+        self._trava_envio = threading.Lock()
+        self._encerrado = False
+
+        self.estatisticas = {
+            'descargas': 0,
+            'linhas_enviadas': 0,
+            'falhas': 0,
+            'linhas_devolvidas': 0,    # foram para a caixa de saída (ao_falhar)
+            'ultimas_descargas': [],   # [(linhas, segundos), ...]
+        }
+
+        self._thread = threading.Thread(target=self._laco_prazo, daemon=True)
+        self._thread.start()
+
+    # ----------------------------------------
+    # Entrada de linhas
+    # ----------------------------------------
+
+    def adicionar(self, linha, ao_enviar=None, ao_falhar=None):
+        """Coloca uma linha no buffer (não faz chamada de rede)"""
+        self.adicionar_varias([linha], ao_enviar, ao_falhar)
+
+    def adicionar_varias(self, linhas, ao_enviar=None, ao_falhar=None):
+        """
+        Coloca várias linhas no buffer, na ordem recebida
+
+        - ao_enviar: função sem argumentos chamada DEPOIS que o lote com
+          essas linhas foi aceito pelo Sheets (ex.: confirmar na caixa_saida)
+        - ao_falhar: chamada se as linhas saírem do buffer SEM ir para o
+          Sheets (lote recusado, resultado incerto, buffer cheio) —
+          ex.: liberar na caixa_saida, que reenvia depois
+
+        ⚠️ CUIDADO: buffer cheio sem ao_falhar levanta RuntimeError
+        (as linhas seriam perdidas em silêncio)
+        """
+        if not linhas:
+            return
+
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError("SheetsBatchWriter já foi fechado")
+
+            cheio = len(self._buffer) + len(linhas) > self.capacidade
+            if cheio and ao_falhar is None:
+                raise RuntimeError("Buffer do Sheets cheio: linhas recusadas")
+
+            if not cheio:
+                if not self._buffer:
+                    self._primeira_em = time.monotonic()
+                self._buffer.extend(list(linha) for linha in linhas)
+                if ao_enviar is not None:
+                    self._confirmacoes.append(ao_enviar)
+                if ao_falhar is not None:
+                    self._falhas.append(ao_falhar)
+
+                # Acorda a thread de flush se chegou no limite
+                if len(self._buffer) >= self.limite_linhas:
+                    self._condicao.notify()
+                return
+
+        # Não cabe: vai direto para quem sabe guardar (caixa de saída)
+        log.aviso('sheets_buffer_cheio', "⚠️ Buffer do Sheets cheio, linhas para a caixa de saída",
+                  linhas=len(linhas), capacidade=self.capacidade)
+        self._devolver(len(linhas), [ao_falhar])
+
+    def _devolver(self, linhas, funcoes):
+        """Avisa (ao_falhar) que linhas saíram do buffer sem ir para o Sheets"""
+        self.estatisticas['linhas_devolvidas'] += linhas
+        for funcao in funcoes:
+            try:
+                funcao()
+            except Exception as e:
+                log.erro('sheets_devolucao_falhou', "❌ Callback ao_falhar falhou", erro=str(e))
+
+    @property
+    def pendentes(self):
+        """Quantas linhas ainda não foram enviadas"""
+        with self._condicao:
+            return len(self._buffer)
+
+    # ----------------------------------------
+    # Flush
+    # ----------------------------------------
+
+    def _laco_prazo(self):
+        """Thread de fundo: descarrega por tamanho ou por prazo"""
+        while True:
+            with self._condicao:
+                while not self._encerrado:
+                    if len(self._buffer) >= self.limite_linhas:
+                        break
+
+                    if self._buffer:
+                        restante = self._primeira_em + self.latencia_maxima - time.monotonic()
+                        if restante <= 0:
+                            break
+                        self._condicao.wait(restante)
+                    else:
+                        self._condicao.wait()
+
+                if self._encerrado:
+                    return
+
+            try:
+                self.descarregar()
+            except Exception as e:
+                log.aviso('sheets_flush_falhou', "⚠️ Flush para o Sheets falhou, linhas mantidas no buffer",
+                          erro=str(e), pendentes=self.pendentes)
+                # Evita loop apertado enquanto a API está fora
+                time.sleep(self.espera_base)
+
+    def descarregar(self):
+        """
+        Envia TODO o buffer num único append_rows()
+
+        COMO FUNCIONA:
+        1. Pega as linhas pendentes (o buffer fica livre para novas)
+        2. Tenta enviar o lote inteiro; repete com backoff só se o
+           Sheets certamente não gravou (pode_repetir)
+        3. Se mesmo assim falhar, devolve as linhas para o INÍCIO do
+           buffer (a ordem se mantém) e levanta o erro
+        4. 4xx ou resultado incerto: o lote sai do buffer (ao_falhar →
+           caixa de saída) e o erro é levantado
+
+        RETORNA:
+        - número de linhas enviadas
+        """
+        with self._trava_envio:
+            with self._condicao:
+                lote, confirmacoes, falhas = self._buffer, self._confirmacoes, self._falhas
+                self._buffer, self._confirmacoes, self._falhas = [], [], []
+                self._primeira_em = None
+
+            if not lote:
+                return 0
+
+            inicio = time.perf_counter()
+            ultimo_erro = None
+
+            with cronometrar('sheets_append') as medicao:
+                for tentativa in range(self.tentativas):
+                    try:
+                        # Só este laço repete: a política HTTP do Sheets não
+                        # soma tentativas por cima (seriam 3 x 2 POSTs)
+                        with resiliencia.usando_politica(resiliencia.SEM_RETRY):
+                            self.aba.append_rows(lote, value_input_option=self.value_input_option)
+                        break
+                    except Exception as e:
+                        ultimo_erro = e
+                        self.estatisticas['falhas'] += 1
+                        if not pode_repetir(e):
+                            break
+                        if tentativa + 1 < self.tentativas:
+                            time.sleep(self.espera_base * 2 ** tentativa)
+                else:
+                    # Só erros "não gravou" (Sheets fora): o lote espera no buffer
+                    medicao.falhou()
+                    with self._condicao:
+                        self._buffer = lote + self._buffer
+                        self._confirmacoes = confirmacoes + self._confirmacoes
+                        self._falhas = falhas + self._falhas
+                        self._primeira_em = time.monotonic()
+                    raise ultimo_erro
+
+                if ultimo_erro is not None and not pode_repetir(ultimo_erro):
+                    # 4xx: o lote nunca vai passar; timeout/5xx: pode ter
+                    # gravado. Nos dois casos ele NÃO volta para o buffer
+                    medicao.falhou()
+                    log.erro('sheets_lote_recusado', "❌ Lote do Sheets tirado do buffer",
+                             linhas=len(lote), status=_status_http(ultimo_erro),
+                             erro=str(ultimo_erro))
+                    self._devolver(len(lote), falhas)
+                    raise ultimo_erro
+
+            duracao = time.perf_counter() - inicio
+            self._registrar_descarga(len(lote), duracao)
+
+            for confirmar in confirmacoes:
+                try:
+                    confirmar()
+                except Exception as e:
+                    log.erro('sheets_confirmacao_falhou', "❌ Callback ao_enviar falhou", erro=str(e))
+            return len(lote)
+
+    def _registrar_descarga(self, linhas, duracao):
+        self.estatisticas['descargas'] += 1
+        self.estatisticas['linhas_enviadas'] += linhas
+
+        # Guarda só as últimas 100 para não crescer sem limite
+        historico = self.estatisticas['ultimas_descargas']
+        historico.append((linhas, duracao))
+        del historico[:-100]
+
+        log.info('sheets_descarga', "📤 Linhas enviadas ao Sheets",
+                 linhas=linhas, duracao_ms=round(duracao * 1000, 1))
+
+    def fechar(self):
+        """Para a thread de fundo e envia o que sobrou"""
+        with self._condicao:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._condicao.notify_all()
+
+        self._thread.join()
+        try:
+            self.descarregar()
+        except Exception:
+            # Última chance falhou: o que ficou no buffer vai para a caixa de saída
+            with self._condicao:
+                linhas, falhas = len(self._buffer), self._falhas
+                self._buffer, self._confirmacoes, self._falhas = [], [], []
+            if linhas:
+                self._devolver(linhas, falhas)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+# ============================================
+# ♻️ UM ESCRITOR POR ABA, REAPROVEITADO
+# ============================================
+
+_escritores = {}
+_trava_escritores = threading.Lock()
+
+
+def chave_aba(aba):
+    """Identifica a aba pela planilha + id da aba (o objeto muda a cada abertura)"""
+    planilha = getattr(aba, 'spreadsheet', None)
+    return (getattr(planilha, 'id', None), getattr(aba, 'id', id(aba)))
+
+
+def obter_escritor(aba, **configuracao):
+    """
+    Devolve o SheetsBatchWriter da aba (cria na primeira vez)
+
+    O escritor é fechado automaticamente quando o processo termina,
+    então nenhuma linha fica para trás.
+    """
+    chave = chave_aba(aba)
+
+    with _trava_escritores:
+        if chave not in _escritores:
+            _escritores[chave] = SheetsBatchWriter(aba, **configuracao)
+        return _escritores[chave]
+
+
+def fechar_escritores():
+    """Descarrega e fecha todos os escritores abertos"""
+    with _trava_escritores:
+        escritores = list(_escritores.values())
+        _escritores.clear()
+
+    for escritor in escritores:
+        try:
+            escritor.fechar()
+        except Exception as e:
+            log.erro('sheets_linhas_perdidas', "❌ Linhas perdidas ao fechar escritor do Sheets",
+                     erro=str(e))
+
+
+atexit.register(fechar_escritores)
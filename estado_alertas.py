@@ -0,0 +1,315 @@
+"""
+🔕 ESTADO DOS ALERTAS (sem cards repetidos)
+============================================
+
+OBJETIVO:
+- Não criar 60 cards iguais por hora enquanto o dólar continua alto
+- Guardar, para cada (par, regra), se o alerta está "armado" ou não
+- Sobreviver a reinícios (arquivo SQLite local)
+
+AS TRÊS IDEIAS:
+1. COOLDOWN: depois de um alerta, espera X segundos antes do próximo
+   (um cruzamento nesse meio tempo fica PENDENTE: se o valor ainda
+   estiver além do limite quando o cooldown acabar, o alerta sai)
+2. HISTERESE: depois de disparar, a regra só "rearma" quando o valor
+   volta para ALÉM de um nível de reset
+   (ex: limite 5.50, histerese 0.5% → rearma abaixo de 5.4725)
+3. ESCALADA: se o valor continua piorando (cada passo_escalada_pct
+   além do limite), cria um alerta de nível maior
+
+⚠️ IMPORTANTE: tudo é decidido com dados em memória + disco local.
+Nenhuma chamada de rede no caminho quente.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+ARQUIVO_PADRAO = os.getenv('ESTADO_ALERTAS_DB', 'estado_alertas.db')
+
+COOLDOWN_PADRAO = 3600          # segundos entre alertas da mesma regra
+HISTERESE_PADRAO = 0.5          # % do limite (regras de valor) ou pontos % (variação)
+PASSO_ESCALADA_PADRAO = 2.0     # % além do limite para cada nível de escalada
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS estado_alertas (
+    par       TEXT    NOT NULL,
+    regra     TEXT    NOT NULL,
+    tipo      TEXT    NOT NULL,
+    limite    REAL    NOT NULL,
+    armado    INTEGER NOT NULL,
+    ultimo    REAL    NOT NULL,
+    nivel     INTEGER NOT NULL,
+    disparos  INTEGER NOT NULL,
+    pendente  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (par, regra, tipo)
+)
+"""
+
+COLUNAS = "par, regra, tipo, limite, armado, ultimo, nivel, disparos, pendente"
+
+
+class EstadoAlertas:
+    """
+    Estado persistente por (par, regra)
+
+    PARÂMETROS:
+    - caminho: arquivo SQLite (':memory:' para testes)
+    - cooldown: segundos mínimos entre dois alertas da mesma regra
+    - histerese_pct: distância do nível de reset (ver topo do arquivo)
+    - passo_escalada_pct: None desliga a escalada
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO, cooldown=COOLDOWN_PADRAO,
+                 histerese_pct=HISTERESE_PADRAO, passo_escalada_pct=PASSO_ESCALADA_PADRAO):
+        self.caminho = caminho
+        self.cooldown = cooldown
+        self.histerese_pct = histerese_pct
+        self.passo_escalada_pct = passo_escalada_pct
+
+        self._conexao = None
+        self._trava = threading.Lock()
+
+        # (par, regra, tipo) → dict de estado; carregado do disco 1x
+        self._estados = None
+        # par → chaves desarmadas (só elas precisam ser olhadas a cada cotação)
+        self._desarmados = {}
+        # par → chaves com cruzamento suprimido pelo cooldown (esperando ele acabar)
+        self._pendentes = {}
+
+        self.contadores = {'permitidos': 0, 'suprimidos_cooldown': 0,
+                           'suprimidos_histerese': 0, 'rearmados': 0, 'escaladas': 0,
+                           'adiados_enviados': 0, 'podados': 0}
+
+    # ----------------------------------------
+    # Persistência
+    # ----------------------------------------
+
+    def _carregar(self):
+        """Abre o banco e lê todo o estado para a memória (1x por processo)"""
+        if self._estados is not None:
+            return
+
+        conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute(ESQUEMA)
+        # Arquivo de uma versão anterior (sem a coluna pendente)
+        colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(estado_alertas)")}
+        if 'pendente' not in colunas:
+            conexao.execute("ALTER TABLE estado_alertas ADD COLUMN pendente INTEGER NOT NULL DEFAULT 0")
+        self._conexao = conexao
+
+        self._estados = {}
+        for par, regra, tipo, limite, armado, ultimo, nivel, disparos, pendente in conexao.execute(
+                f"SELECT {COLUNAS} FROM estado_alertas"):
+            chave = (par, regra, tipo)
+            self._estados[chave] = {
+                'limite': limite, 'armado': bool(armado), 'ultimo': ultimo,
+                'nivel': nivel, 'disparos': disparos, 'pendente': bool(pendente),
+            }
+            if not armado:
+                self._desarmados.setdefault(par, set()).add(chave)
+            if pendente:
+                self._pendentes.setdefault(par, set()).add(chave)
+
+    def _salvar(self, chave):
+        """Grava o estado de uma chave (disco local, sem rede)"""
+        par, regra, tipo = chave
+        estado = self._estados[chave]
+        with self._conexao:
+            self._conexao.execute(
+                f"INSERT OR REPLACE INTO estado_alertas ({COLUNAS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (par, regra, tipo, estado['limite'], int(estado['armado']),
+                 estado['ultimo'], estado['nivel'], estado['disparos'], int(estado['pendente'])),
+            )
+
+    # ----------------------------------------
+    # Regras de negócio
+    # ----------------------------------------
+
+    def _nivel_reset(self, tipo, limite):
+        """Valor que o preço precisa voltar a cruzar para rearmar"""
+        if tipo in ('acima', 'abaixo'):
+            distancia = abs(limite) * self.histerese_pct / 100
+        else:
+            distancia = self.histerese_pct
+        return limite - distancia if tipo.endswith('acima') else limite + distancia
+
+    def _distancia_pct(self, tipo, limite, atual):
+        """Quanto (%) o valor passou do limite, na direção da regra"""
+        if tipo in ('acima', 'abaixo'):
+            excesso = (atual - limite) / abs(limite) * 100 if limite else 0.0
+        else:
+            excesso = atual - limite
+        return excesso if tipo.endswith('acima') else -excesso
+
+    def _nivel_atual(self, tipo, limite, atual):
+        """Nível de escalada em que o valor já está (0 sem escalada/sem valor)"""
+        if not self.passo_escalada_pct or atual is None:
+            return 0
+        return max(0, int(self._distancia_pct(tipo, limite, atual) // self.passo_escalada_pct))
+
+    def _disparar(self, par, chave, limite, atual, agora, anterior=None):
+        """Marca a regra como disparada agora (desarmada, nível do valor atual)"""
+        self._estados[chave] = {
+            'limite': limite, 'armado': False, 'ultimo': agora,
+            'nivel': self._nivel_atual(chave[2], limite, atual),
+            'disparos': (anterior['disparos'] if anterior else 0) + 1, 'pendente': False,
+        }
+        self._desarmados.setdefault(par, set()).add(chave)
+        self._pendentes.get(par, set()).discard(chave)
+        self._salvar(chave)
+
+    def permitir(self, par, regra, valor=None, variacao=None, agora=None):
+        """
+        Uma regra acabou de disparar: pode criar o card?
+
+        PARÂMETROS:
+        - valor, variacao: cotação que disparou a regra. O nível de
+          escalada começa onde o valor já está (cruzou 5% além do limite
+          → não vira "escalada" na próxima cotação)
+
+        RETORNA:
+        - True se o alerta deve ser enviado (e marca a regra como desarmada)
+        """
+        from regras_alerta import TIPOS
+
+        agora = time.time() if agora is None else agora
+        chave = (par, regra.id, regra.tipo)
+        atual = {'valor': valor, 'variacao': variacao}[TIPOS[regra.tipo][0]]
+
+        with self._trava:
+            self._carregar()
+            estado = self._estados.get(chave)
+
+            if estado is not None:
+                if not estado['armado']:
+                    self.contadores['suprimidos_histerese'] += 1
+                    return False
+                if agora - estado['ultimo'] < self.cooldown:
+                    # observar() manda o alerta quando o cooldown acabar
+                    if not estado['pendente']:
+                        estado['pendente'] = True
+                        self._pendentes.setdefault(par, set()).add(chave)
+                        self._salvar(chave)
+                    self.contadores['suprimidos_cooldown'] += 1
+                    return False
+
+            self._disparar(par, chave, regra.limite, atual, agora, estado)
+            self.contadores['permitidos'] += 1
+            return True
+
+    def observar(self, par, valor, variacao=None, agora=None):
+        """
+        Chamado a CADA cotação: rearma regras, detecta escaladas e
+        solta os alertas que o cooldown segurou
+
+        Olha só as regras desarmadas e pendentes do par (normalmente
+        poucas), então o custo não depende do total de regras.
+
+        RETORNA:
+        - lista de (Regra, nivel) que devem gerar alerta: nivel ≥ 1 é
+          escalada; nivel 0 é um cruzamento adiado pelo cooldown
+        """
+        from regras_alerta import TIPOS, Regra
+
+        agora = time.time() if agora is None else agora
+        atuais = {'valor': valor, 'variacao': variacao}
+        escaladas = []
+
+        with self._trava:
+            self._carregar()
+
+            for chave in list(self._desarmados.get(par, ())):
+                _, regra_id, tipo = chave
+                estado = self._estados[chave]
+                atual = atuais[TIPOS[tipo][0]]
+                if atual is None:
+                    continue
+
+                reset = self._nivel_reset(tipo, estado['limite'])
+                voltou = atual < reset if tipo.endswith('acima') else atual > reset
+
+                if voltou:
+                    estado['armado'] = True
+                    estado['nivel'] = 0
+                    self._desarmados[par].discard(chave)
+                    self.contadores['rearmados'] += 1
+                    self._salvar(chave)
+                    continue
+
+                if self.passo_escalada_pct:
+                    excesso = self._distancia_pct(tipo, estado['limite'], atual)
+                    nivel = int(excesso // self.passo_escalada_pct)
+                    if nivel > estado['nivel']:
+                        estado['nivel'] = nivel
+                        estado['ultimo'] = agora
+                        self.contadores['escaladas'] += 1
+                        self._salvar(chave)
+                        escaladas.append((Regra(regra_id, par, tipo, estado['limite']), nivel))
+
+            for chave in list(self._pendentes.get(par, ())):
+                _, regra_id, tipo = chave
+                estado = self._estados[chave]
+                atual = atuais[TIPOS[tipo][0]]
+                if atual is None or agora - estado['ultimo'] < self.cooldown:
+                    continue
+
+                if self._distancia_pct(tipo, estado['limite'], atual) > 0:
+                    # Ainda além do limite: o alerta segurado sai agora
+                    self._disparar(par, chave, estado['limite'], atual, agora, estado)
+                    self.contadores['adiados_enviados'] += 1
+                    escaladas.append((Regra(regra_id, par, tipo, estado['limite']), 0))
+                else:
+                    # Voltou antes do fim do cooldown: nada a avisar
+                    estado['pendente'] = False
+                    self._pendentes[par].discard(chave)
+                    self._salvar(chave)
+
+        return escaladas
+
+    def podar(self, regras):
+        """
+        Apaga o estado de regras que saíram da configuração
+
+        Regra removida ou com limite novo não deixa lixo no arquivo
+        (nem uma regra desarmada que nunca mais seria olhada).
+
+        PARÂMETROS:
+        - regras: todas as Regra em uso (ex: motor.regras())
+
+        RETORNA:
+        - quantas chaves foram apagadas
+        """
+        validas = {(regra.par, regra.id, regra.tipo): regra.limite for regra in regras}
+
+        with self._trava:
+            self._carregar()
+            velhas = [chave for chave, estado in self._estados.items()
+                      if validas.get(chave) != estado['limite']]
+            if not velhas:
+                return 0
+
+            for chave in velhas:
+                del self._estados[chave]
+                self._desarmados.get(chave[0], set()).discard(chave)
+                self._pendentes.get(chave[0], set()).discard(chave)
+            with self._conexao:
+                self._conexao.executemany(
+                    "DELETE FROM estado_alertas WHERE par = ? AND regra = ? AND tipo = ?", velhas)
+            self.contadores['podados'] += len(velhas)
+
+        return len(velhas)
+
+    def resumo(self):
+        """Contadores + quantas regras estão desarmadas agora"""
+        with self._trava:
+            self._carregar()
+            desarmadas = sum(len(chaves) for chaves in self._desarmados.values())
+            pendentes = sum(len(chaves) for chaves in self._pendentes.values())
+        return {**self.contadores, 'desarmadas': desarmadas, 'pendentes': pendentes}
+
+
+# Estado compartilhado pelos scripts
+estado_padrao = EstadoAlertas()
@@ -0,0 +1,463 @@
+"""
+📬 FILA DE ENVIO PARA O TRELLO (respeitando o rate limit)
+==========================================================
+
+OBJETIVO:
+- Nunca mais perder card por erro 429 (Too Many Requests)
+- Vários workers enviando em paralelo, MAS dentro do limite do Trello
+- Cards repetidos ainda na fila viram UM só (coalescência)
+- Também atualiza cards que já existem (PUT), não só cria
+- Números: tamanho da fila, vazão, descartes
+
+LIMITES DO TRELLO (documentação oficial):
+- 300 requisições a cada 10 segundos por API key
+- 100 requisições a cada 10 segundos por token
+
+NOVOS CONCEITOS:
+- Token bucket ("balde de fichas"): cada requisição gasta uma ficha;
+  as fichas voltam numa taxa fixa. Sem ficha → espera.
+- Retry-After: quando o servidor manda esperar, TODOS os workers esperam
+- concurrent.futures.Future: quem enfileira pode esperar o resultado
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import requests
+
+import cliente_http
+import metricas
+import resiliencia
+
+URL_BASE_TRELLO = "https://api.trello.com"
+
+# Limites oficiais: (requisições, janela em segundos)
+LIMITE_POR_KEY = (300, 10)
+LIMITE_POR_TOKEN = (100, 10)
+
+WORKERS_PADRAO = 4
+CAPACIDADE_FILA = 1000
+TENTATIVAS_PADRAO = 5
+ESPERA_429_PADRAO = 1.0        # segundos, se o 429 vier sem Retry-After legível
+ESPERA_429_MAXIMA = 300.0      # um Retry-After absurdo não para a fila por horas
+PRAZO_FECHAR_PADRAO = 30.0     # segundos para esvaziar a fila ao encerrar
+
+
+class BaldeTokens:
+    """
+    Token bucket: no máximo `capacidade` requisições por `janela` segundos
+
+    ⚠️ CUIDADO: um balde que começa CHEIO e reenche na taxa
+    capacidade/janela deixa passar quase o DOBRO do limite numa janela
+    deslizante (a rajada inicial + o que reencheu). Por isso a rajada é
+    pequena (10% do limite) e a taxa é (capacidade - rajada) / janela:
+    em QUALQUER janela passam no máximo rajada + o resto = capacidade.
+    """
+
+    def __init__(self, capacidade, janela, rajada=None):
+        self.rajada = float(rajada if rajada is not None else max(1, capacidade // 10))
+        self.taxa = max(capacidade - self.rajada, 1) / janela
+        self._fichas = self.rajada
+        self._atualizado = time.monotonic()
+        self._trava = threading.Lock()
+
+    def consumir(self):
+        """Pega uma ficha, esperando o tempo necessário se o balde estiver vazio"""
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._fichas = min(self.rajada, self._fichas + (agora - self._atualizado) * self.taxa)
+                self._atualizado = agora
+
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.taxa
+
+            time.sleep(espera)
+
+
+class FilaTrello:
+    """
+    Fila com workers que criam cards no Trello
+
+    PARÂMETROS:
+    - credenciais: dict com 'api_key', 'token', 'list_id'
+    - workers: threads enviando em paralelo
+    - capacidade: máximo de cards esperando (acima disso, descarta)
+    - limite_key / limite_token: (requisições, janela) dos baldes
+    - tentativas: quantas vezes tentar cada card (429, rede, 5xx no PUT)
+      antes de desistir
+    """
+
+    def __init__(self, credenciais, workers=WORKERS_PADRAO, capacidade=CAPACIDADE_FILA,
+                 limite_key=LIMITE_POR_KEY, limite_token=LIMITE_POR_TOKEN,
+                 tentativas=TENTATIVAS_PADRAO, url_base=None):
+        self.credenciais = credenciais
+        self.capacidade = capacidade
+        self.tentativas = tentativas
+        self.url_base = url_base or URL_BASE_TRELLO
+
+        # Os dois limites valem ao mesmo tempo → um balde para cada
+        self._baldes = [BaldeTokens(*limite_key), BaldeTokens(*limite_token)]
+
+        self._fila = deque()
+        self._pendentes = {}             # chave → item ainda na fila (coalescência)
+        self._condicao = threading.Condition()
+        self._pausado_ate = 0.0          # Retry-After vale para todos os workers
+        self._em_envio = 0
+        self._encerrando = False
+
+        self.contadores = {'enfileirados': 0, 'enviados': 0, 'coalescidos': 0,
+                           'descartados': 0, 'falhas': 0, 'respostas_429': 0}
+        self._inicio = time.monotonic()
+
+        self._workers = [
+            threading.Thread(target=self._trabalhar, daemon=True, name=f"trello-{indice}")
+            for indice in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ----------------------------------------
+    # Entrada
+    # ----------------------------------------
+
+    def enviar(self, nome, descricao='', chave=None, card_id=None, **extras):
+        """
+        Coloca um card na fila
+
+        PARÂMETROS:
+        - nome, descricao: título e descrição do card
+        - chave: identifica cards "iguais" (padrão: o nome). Se já houver
+          um card com a mesma chave esperando, ele só é atualizado.
+        - card_id: atualiza ESSE card (PUT) em vez de criar um novo
+        - extras: outros parâmetros da API (ex: pos='top')
+
+        RETORNA:
+        - Future com o JSON do card (ou exceção se falhar/for descartado)
+        """
+        chave = chave or nome
+        parametros = {
+            'key': self.credenciais['api_key'],
+            'token': self.credenciais['token'],
+            'name': nome,
+            'desc': descricao,
+            **extras,
+        }
+        if card_id is None:
+            metodo, url = 'POST', f"{self.url_base}/1/cards"
+            parametros['idList'] = self.credenciais['list_id']
+        else:
+            metodo, url = 'PUT', f"{self.url_base}/1/cards/{card_id}"
+
+        with self._condicao:
+            existente = self._pendentes.get(chave)
+            if existente is not None:
+                # Mesmo card ainda não enviado: fica valendo o conteúdo mais novo
+                existente.update(metodo=metodo, url=url, parametros=parametros)
+                self.contadores['coalescidos'] += 1
+                return existente['futuro']
+
+            futuro = Future()
+            if self._encerrando or len(self._fila) >= self.capacidade:
+                self.contadores['descartados'] += 1
+                futuro.set_exception(RuntimeError("Fila do Trello cheia: card descartado"))
+                return futuro
+
+            item = {'chave': chave, 'metodo': metodo, 'url': url, 'parametros': parametros,
+                    'futuro': futuro, 'tentativas': 0}
+            self._fila.append(item)
+            self._pendentes[chave] = item
+            self.contadores['enfileirados'] += 1
+            self._condicao.notify()
+            return futuro
+
+    def _contar(self, nome):
+        with self._condicao:
+            self.contadores[nome] += 1
+
+    # ----------------------------------------
+    # Workers
+    # ----------------------------------------
+
+    def _proximo(self):
+        """Tira o próximo item da fila (None = encerrar)"""
+        with self._condicao:
+            while not self._fila:
+                if self._encerrando:
+                    return None
+                self._condicao.wait()
+
+            item = self._fila.popleft()
+            self._pendentes.pop(item['chave'], None)
+            self._em_envio += 1
+            return item
+
+    def _trabalhar(self):
+        while True:
+            item = self._proximo()
+            if item is None:
+                return
+            try:
+                # Tempo de entrega do card: espera no balde + POST (+ 429)
+                with metricas.cronometrar('trello') as medicao:
+                    if not self._enviar_item(item):
+                        medicao.falhou()
+            except Exception as erro:
+                # Erro inesperado (JSON inválido, bug...): só ESTE card falha,
+                # o worker continua atendendo a fila
+                self._contar('falhas')
+                if not item['futuro'].done():
+                    item['futuro'].set_exception(erro)
+                metricas.log.erro('trello_item_falhou', "❌ Erro inesperado ao enviar card",
+                                  erro=repr(erro))
+            finally:
+                with self._condicao:
+                    self._em_envio -= 1
+                    self._condicao.notify_all()
+
+    def _esperar_vez(self):
+        """Respeita o Retry-After global e os dois baldes de fichas"""
+        espera = self._pausado_ate - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        for balde in self._baldes:
+            balde.consumir()
+
+    def _enviar_item(self, item):
+        """
+        Cria/atualiza um card (True = deu certo)
+
+        💡 DICA: a fila é a ÚNICA camada de retry destas chamadas
+        (resiliencia.SEM_RETRY no cliente_http). Cada nova tentativa
+        volta para os baldes e respeita a pausa global; o retry do
+        cliente dormiria com o worker ocupado, fora do rate limit.
+        """
+        politica = resiliencia.POLITICAS_POR_HOST.get(cliente_http.extrair_host(item['url']),
+                                                      resiliencia.POLITICA_PADRAO)
+        while True:
+            self._esperar_vez()
+            item['tentativas'] += 1
+            ultima = item['tentativas'] >= self.tentativas
+
+            try:
+                resposta = cliente_http.requisitar(item['metodo'], item['url'],
+                                                   params=item['parametros'], timeout=10,
+                                                   politica=resiliencia.SEM_RETRY)
+
+                if resposta.status_code == 429:
+                    self._contar('respostas_429')
+                    espera = resiliencia.segundos_retry_after(resposta.headers.get('Retry-After'),
+                                                              ESPERA_429_PADRAO)
+                    # Pausa TODOS os workers, não só este
+                    self._pausado_ate = max(self._pausado_ate,
+                                            time.monotonic() + min(espera, ESPERA_429_MAXIMA))
+                    if not ultima:
+                        continue
+                elif not ultima and politica.repetir_status(item['metodo'], resposta.status_code):
+                    # 5xx no PUT (idempotente); POST com 5xx pode ter criado o card
+                    time.sleep(politica.espera(item['tentativas'] - 1))
+                    continue
+
+                resposta.raise_for_status()
+                card = resposta.json()
+
+            except requests.exceptions.RequestException as erro:
+                # Conexão recusada não chegou ao Trello: dá para repetir
+                # até POST; disjuntor aberto (CircuitoAberto) falha na hora
+                if not ultima and politica.repetir_erro(item['metodo'], erro):
+                    time.sleep(politica.espera(item['tentativas'] - 1))
+                    continue
+                self._contar('falhas')
+                item['futuro'].set_exception(erro)
+                return False
+
+            self._contar('enviados')
+            item['futuro'].set_result(card)
+            return True
+
+    # ----------------------------------------
+    # Encerramento e números
+    # ----------------------------------------
+
+    def aguardar(self, timeout=None):
+        """Espera a fila esvaziar (True se esvaziou dentro do timeout)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            while self._fila or self._em_envio:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._condicao.wait(restante)
+        return True
+
+    def fechar(self, esperar=True, timeout=PRAZO_FECHAR_PADRAO):
+        """
+        Para os workers (esperar=True: envia tudo antes)
+
+        PARÂMETROS:
+        - timeout: prazo (segundos) para a fila esvaziar; None = sem prazo
+
+        ⚠️ CUIDADO: com o Trello lento ou um Retry-After longo, esvaziar
+        a fila pode levar minutos. Passado o prazo, os cards que ainda
+        não saíram falham (o Future recebe RuntimeError) — quem usa a
+        caixa de saída os libera para o reenvio — e o encerramento segue
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        if esperar and not self.aguardar(timeout):
+            metricas.log.aviso('trello_fechar_prazo', "⚠️ Fila do Trello não esvaziou no prazo",
+                               prazo=timeout, restantes=len(self._fila), em_envio=self._em_envio)
+
+        with self._condicao:
+            self._encerrando = True
+            restantes = list(self._fila)
+            self._fila.clear()
+            self._pendentes.clear()
+            self._condicao.notify_all()
+
+        for item in restantes:
+            self._contar('descartados')
+            if not item['futuro'].done():
+                item['futuro'].set_exception(RuntimeError("Fila do Trello fechada: card não enviado"))
+
+        # Um worker no meio de um envio (ou dormindo num Retry-After) não
+        # segura o processo além do prazo: as threads são daemon
+        for worker in self._workers:
+            worker.join(None if limite is None else max(limite - time.monotonic(), 0))
+
+    def estatisticas(self):
+        """Profundidade da fila, vazão (cards/s) e contadores"""
+        decorrido = time.monotonic() - self._inicio
+        with self._condicao:
+            profundidade = len(self._fila)
+            em_envio = self._em_envio
+        return {
+            **self.contadores,
+            'profundidade': profundidade,
+            'em_envio': em_envio,
+            'vazao_por_s': self.contadores['enviados'] / decorrido if decorrido else 0.0,
+        }
+
+
+# ============================================
+# ♻️ FILA COMPARTILHADA
+# ============================================
+
+_fila_padrao = None
+_trava_fila = threading.Lock()
+
+
+def obter_fila(credenciais, **configuracao):
+    """Devolve a fila do processo (criada na primeira chamada)"""
+    global _fila_padrao
+
+    with _trava_fila:
+        if _fila_padrao is None:
+            _fila_padrao = FilaTrello(credenciais, **configuracao)
+        return _fila_padrao
+
+
+def fechar_fila(esperar=True, timeout=PRAZO_FECHAR_PADRAO):
+    """
+    Envia o que sobrou e para os workers (chamar ao encerrar)
+
+    timeout: prazo para esvaziar a fila (ver FilaTrello.fechar)
+
+    esperar=False: a fila sai de uso na hora (o próximo obter_fila()
+    cria outra) e é esvaziada numa thread — usado na troca de
+    credenciais, sem travar quem recarregou a configuração
+    """
+    global _fila_padrao
+
+    with _trava_fila:
+        fila, _fila_padrao = _fila_padrao, None
+    if fila is None:
+        return
+    if esperar:
+        fila.fechar(timeout=timeout)
+    else:
+        threading.Thread(target=fila.fechar, kwargs={'timeout': timeout},
+                         name='trello-fila-antiga', daemon=True).start()
+
+
+def estatisticas_fila():
+    """Números da fila do processo (None se ainda não foi criada)"""
+    fila = _fila_padrao
+    return fila.estatisticas() if fila is not None else None
+
+
+def _coletar_metricas():
+    """Números da fila para o /metrics (lido só na exportação)"""
+    numeros = estatisticas_fila()
+    if numeros is None:
+        return []
+    amostras = [('trello_fila_profundidade', 'gauge', "Cards esperando na fila", {},
+                 numeros['profundidade'])]
+    descricoes = {
+        'enviados': "Cards criados ou atualizados no Trello",
+        'coalescidos': "Cards repetidos juntados a um que já estava na fila",
+        'descartados': "Cards descartados com a fila cheia",
+        'falhas': "Cards que falharam de vez",
+        'respostas_429': "Respostas 429 (rate limit) recebidas",
+    }
+    for nome, descricao in descricoes.items():
+        amostras.append((f'trello_fila_{nome}_total', 'counter', descricao, {}, numeros[nome]))
+    return amostras
+
+
+metricas.registro.registrar_coletor(_coletar_metricas)
+
+# Cards ainda na fila são enviados antes do processo terminar
+atexit.register(fechar_fila)
+
+
+# ============================================
+# 📏 TESTE CONTRA O TRELLO FAKE
+# ============================================
+
+def testar_contra_fake(cards=200, limite=(20, 1.0), limite_balde=None, workers=8):
+    """
+    Rajada de cards contra o servidor fake com rate limit ativo
+
+    - limite_balde=None: balde com o MESMO limite do servidor
+      → esperado: zero respostas 429 e nenhum card perdido
+    - limite_balde maior que o do servidor: simula limite mal
+      configurado → aparecem 429, mas o Retry-After segura a fila
+      e nenhum card se perde
+    """
+    from servidores_fake import ServidorFake
+
+    limite_balde = limite_balde or limite
+
+    with ServidorFake(limite_trello=limite) as servidor:
+        fila = FilaTrello(
+            {'api_key': 'k', 'token': 't', 'list_id': 'l'},
+            workers=workers, limite_key=limite_balde, limite_token=limite_balde,
+            url_base=servidor.url,
+        )
+
+        inicio = time.perf_counter()
+        futuros = [fila.enviar(f"card {indice % (cards // 2)}", "teste") for indice in range(cards)]
+        fila.fechar()
+        duracao = time.perf_counter() - inicio
+
+        erros = sum(1 for futuro in set(futuros) if futuro.exception())
+        return {**fila.estatisticas(), 'segundos': duracao, 'erros': erros,
+                'recebidos_pelo_servidor': servidor.cards_criados}
+
+
+if __name__ == "__main__":
+    cenarios = [
+        ("balde = limite do servidor", None),
+        ("balde 3x acima do limite (só Retry-After)", (60, 1.0)),
+    ]
+    for titulo, limite_balde in cenarios:
+        print(f"📬 200 cards (100 distintos), Trello fake limitado a 20/s — {titulo}")
+        r = testar_contra_fake(limite_balde=limite_balde)
+        print(f"   Enviados: {r['enviados']} (servidor: {r['recebidos_pelo_servidor']}) | "
+              f"coalescidos: {r['coalescidos']} | descartados: {r['descartados']} | erros: {r['erros']}")
+        print(f"   Respostas 429: {r['respostas_429']} | vazão: {r['enviados'] / r['segundos']:.1f} cards/s")
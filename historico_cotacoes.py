@@ -0,0 +1,259 @@
+"""
+🗃️ HISTÓRICO LOCAL DE COTAÇÕES (SQLite)
+========================================
+
+OBJETIVO:
+- Guardar TODA cotação buscada, localmente, com números de verdade
+  (nada de reler "R$ 5.43" da planilha)
+- Índice por (par, horário) → consultas por intervalo rápidas
+- Velas OHLC por minuto/hora/dia e exportação em CSV
+
+POR QUÊ SQLite?
+- Já vem com o Python (módulo sqlite3), sem servidor
+- Um único arquivo, fácil de copiar/backup
+
+USO:
+    from historico_cotacoes import ativar_gravacao, historico_padrao
+    ativar_gravacao()   # toda busca passa a ser gravada
+    velas = historico_padrao.ohlc('USD-BRL', inicio, fim, 'hora')
+
+QUEM GRAVA:
+- Todo ponto de entrada que busca cotações chama ativar_gravacao():
+  integracao_completa (monitor, daemon, asyncio), cli.py quote,
+  projeto2_sheets.py e cotacao_moedas.py
+- monitor_shards.py: os trabalhadores NÃO gravam; o escoador grava
+  o lote inteiro numa transação (um único processo escrevendo)
+"""
+
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+from metricas import log
+
+ARQUIVO_PADRAO = os.getenv('HISTORICO_DB', 'historico_cotacoes.db')
+
+# Tamanho de cada período de vela, em segundos
+PERIODOS = {'minuto': 60, 'hora': 3600, 'dia': 86400}
+
+# Chave primária (par, ts) = o índice; WITHOUT ROWID guarda a tabela
+# já ordenada por ele (sem índice separado)
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cotacoes (
+    par       TEXT    NOT NULL,
+    ts        INTEGER NOT NULL,
+    bid       REAL    NOT NULL,
+    ask       REAL,
+    pct       REAL,
+    PRIMARY KEY (par, ts)
+) WITHOUT ROWID
+"""
+
+
+class HistoricoCotacoes:
+    """
+    Armazena cotações num arquivo SQLite
+
+    PARÂMETROS:
+    - caminho: arquivo do banco (':memory:' para testes)
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO):
+        self.caminho = caminho
+        self._conexao = None
+        self._trava = threading.Lock()
+
+    def _conectar(self):
+        """Abre o banco só na primeira vez que for usado"""
+        if self._conexao is None:
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            # WAL: leituras não bloqueiam a escrita (e vice-versa)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute(ESQUEMA)
+            self._conexao = conexao
+        return self._conexao
+
+    # ----------------------------------------
+    # Escrita
+    # ----------------------------------------
+
+    def gravar(self, cotacoes):
+        """
+        Grava um dict {par: cotacao} vindo de buscar_cotacoes()
+
+        A mesma cotação (mesmo par + timestamp da API) não duplica:
+        INSERT OR IGNORE descarta a repetida.
+
+        RETORNA:
+        - quantas linhas novas entraram
+        """
+        linhas = [
+            (
+                par,
+                int(cotacao.get('timestamp') or time.time()),
+                float(cotacao['bid']),
+                float(cotacao['ask']) if 'ask' in cotacao else None,
+                float(cotacao['pctChange']) if 'pctChange' in cotacao else None,
+            )
+            for par, cotacao in cotacoes.items()
+        ]
+        return self.gravar_linhas(linhas)
+
+    def gravar_linhas(self, linhas):
+        """Grava tuplas (par, ts, bid, ask, pct) numa única transação"""
+        if not linhas:
+            return 0
+
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                antes = conexao.total_changes
+                conexao.executemany(
+                    "INSERT OR IGNORE INTO cotacoes (par, ts, bid, ask, pct) VALUES (?, ?, ?, ?, ?)",
+                    linhas,
+                )
+                return conexao.total_changes - antes
+
+    # ----------------------------------------
+    # Leitura
+    # ----------------------------------------
+
+    def intervalo(self, par, inicio=0, fim=None):
+        """
+        Cotações de um par entre inicio e fim (epoch, fim exclusivo)
+
+        RETORNA:
+        - lista de tuplas (ts, bid, ask, pct), em ordem de tempo
+        """
+        fim = 2 ** 62 if fim is None else fim
+        with self._trava:
+            cursor = self._conectar().execute(
+                "SELECT ts, bid, ask, pct FROM cotacoes WHERE par = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (par, inicio, fim),
+            )
+            return cursor.fetchall()
+
+    def ultimo(self, par):
+        """Última cotação gravada de um par (ou None)"""
+        with self._trava:
+            cursor = self._conectar().execute(
+                "SELECT ts, bid, ask, pct FROM cotacoes WHERE par = ? ORDER BY ts DESC LIMIT 1",
+                (par,),
+            )
+            return cursor.fetchone()
+
+    def pares(self):
+        """Lista dos pares que têm histórico"""
+        with self._trava:
+            cursor = self._conectar().execute("SELECT DISTINCT par FROM cotacoes ORDER BY par")
+            return [linha[0] for linha in cursor]
+
+    def ohlc(self, par, inicio=0, fim=None, periodo='hora'):
+        """
+        Velas OHLC (abertura, máxima, mínima, fechamento) do bid
+
+        PARÂMETROS:
+        - periodo: 'minuto', 'hora', 'dia' ou número de segundos
+
+        COMO FUNCIONA:
+        - O SQLite agrupa por "balde" de tempo (ts / periodo)
+        - Abertura/fechamento = bid do menor/maior ts de cada balde
+
+        RETORNA:
+        - lista de tuplas (inicio_balde, abertura, maxima, minima, fechamento, quantidade)
+        """
+        segundos = PERIODOS.get(periodo, periodo)
+        fim = 2 ** 62 if fim is None else fim
+
+        consulta = """
+            WITH baldes AS (
+                SELECT (ts / :seg) * :seg AS balde,
+                       MIN(ts) AS primeiro, MAX(ts) AS ultimo,
+                       MAX(bid) AS maxima, MIN(bid) AS minima, COUNT(*) AS quantidade
+                FROM cotacoes
+                WHERE par = :par AND ts >= :inicio AND ts < :fim
+                GROUP BY balde
+            )
+            SELECT b.balde, a.bid, b.maxima, b.minima, f.bid, b.quantidade
+            FROM baldes b
+            JOIN cotacoes a ON a.par = :par AND a.ts = b.primeiro
+            JOIN cotacoes f ON f.par = :par AND f.ts = b.ultimo
+            ORDER BY b.balde
+        """
+        with self._trava:
+            cursor = self._conectar().execute(
+                consulta, {'seg': int(segundos), 'par': par, 'inicio': inicio, 'fim': fim}
+            )
+            return cursor.fetchall()
+
+    def exportar_csv(self, caminho, par=None, inicio=0, fim=None):
+        """
+        Exporta o histórico em CSV, linha a linha (sem carregar tudo na memória)
+
+        RETORNA:
+        - quantas linhas foram escritas
+        """
+        fim = 2 ** 62 if fim is None else fim
+        filtro = "ts >= ? AND ts < ?"
+        parametros = [inicio, fim]
+        if par is not None:
+            filtro += " AND par = ?"
+            parametros.append(par)
+
+        total = 0
+        with self._trava, open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(['par', 'ts', 'bid', 'ask', 'pct'])
+
+            cursor = self._conectar().execute(
+                f"SELECT par, ts, bid, ask, pct FROM cotacoes WHERE {filtro} ORDER BY par, ts",
+                parametros,
+            )
+            while True:
+                bloco = cursor.fetchmany(10000)
+                if not bloco:
+                    break
+                escritor.writerows(bloco)
+                total += len(bloco)
+
+        return total
+
+    def fechar(self):
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+# Histórico compartilhado pelos scripts
+historico_padrao = HistoricoCotacoes()
+
+
+def _gravar_cotacoes(cotacoes):
+    """Ouvinte de buscar_cotacoes(): grava sem derrubar a busca se falhar"""
+    try:
+        historico_padrao.gravar(cotacoes)
+    except sqlite3.Error as e:
+        log.aviso('historico_falhou', "⚠️ Não foi possível gravar o histórico", erro=str(e))
+
+
+def ativar_gravacao():
+    """Faz toda chamada de buscar_cotacoes() gravar no histórico"""
+    from cotacao_moedas import registrar_ouvinte
+    registrar_ouvinte(_gravar_cotacoes)
+
+
+if __name__ == "__main__":
+    import sys
+
+    par = sys.argv[1] if len(sys.argv) > 1 else 'USD-BRL'
+    periodo = sys.argv[2] if len(sys.argv) > 2 else 'hora'
+
+    print(f"🕯️ Velas de {par} por {periodo} (últimos 7 dias):")
+    for balde, abertura, maxima, minima, fechamento, quantidade in historico_padrao.ohlc(
+            par, time.time() - 7 * 86400, None, periodo):
+        horario = time.strftime('%d/%m %H:%M', time.localtime(balde))
+        print(f"   {horario}  A {abertura:.4f}  M {maxima:.4f}  m {minima:.4f}  F {fechamento:.4f}  ({quantidade})")
@@ -0,0 +1,424 @@
+"""
+📐 INDICADORES VETORIZADOS (NumPy)
+===================================
+
+OBJETIVO:
+- Carregar o histórico de cada par em arrays NumPy contíguos
+- Calcular médias móveis, EWMA, volatilidade, z-score e drawdown
+  SEM laços Python (tudo vetorizado)
+- Atualizar os indicadores a cada cotação nova SEM recalcular tudo
+
+NOVOS CONCEITOS:
+- np.cumsum (média móvel em O(n) com somas acumuladas)
+- Vetorização: uma operação no array inteiro em vez de um for
+- Atualização incremental (estado mínimo guardado entre cotações)
+
+USO:
+    from indicadores import carregar_precos, media_movel
+    precos = carregar_precos('USD-BRL')
+    mm20 = media_movel(precos, 20)
+"""
+
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+
+# ============================================
+# 📥 CARREGAR HISTÓRICO
+# ============================================
+
+def carregar_precos(par, inicio=0, fim=None, historico=None):
+    """
+    Lê o histórico local do par e devolve (timestamps, precos)
+
+    RETORNA:
+    - tupla de np.ndarray: int64 (epoch) e float64 (bid), contíguos
+    """
+    if historico is None:
+        from historico_cotacoes import historico_padrao
+        historico = historico_padrao
+
+    linhas = historico.intervalo(par, inicio, fim)
+    if not linhas:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    dados = np.array([(ts, bid) for ts, bid, _, _ in linhas], dtype=np.float64)
+    return dados[:, 0].astype(np.int64), np.ascontiguousarray(dados[:, 1])
+
+
+def empilhar(series):
+    """
+    Junta séries de vários pares numa matriz (pares × tempo)
+
+    As séries são alinhadas pelo FIM (cotações mais recentes);
+    séries mais curtas são completadas com NaN no começo.
+    """
+    tamanho = max((len(serie) for serie in series), default=0)
+    matriz = np.full((len(series), tamanho), np.nan)
+    for linha, serie in enumerate(series):
+        if len(serie):
+            matriz[linha, tamanho - len(serie):] = serie
+    return matriz
+
+
+# ============================================
+# 📊 INDICADORES (funcionam com 1 par ou matriz de pares)
+# ============================================
+# Todos recebem arrays com o tempo no ÚLTIMO eixo:
+# - 1 par:  shape (n,)
+# - vários: shape (pares, n)
+# Posições sem dados suficientes ficam NaN.
+
+def media_movel(precos, janela):
+    """
+    Média móvel simples com somas acumuladas (O(n), sem laço)
+
+    💡 DICA: NaN (ex: começo de série empilhada) não contamina a soma
+    acumulada: entra como 0 e a janela só vale se tiver `janela` preços
+    de verdade. Assim uma linha da matriz dá o mesmo resultado que a
+    série calculada sozinha.
+    """
+    precos = np.asarray(precos, dtype=np.float64)
+    resultado = np.full(precos.shape, np.nan)
+    if precos.shape[-1] < janela:
+        return resultado
+
+    validos = ~np.isnan(precos)
+    completa = validos.all()
+    if not completa:
+        precos = np.where(validos, precos, 0.0)
+
+    acumulado = np.cumsum(precos, axis=-1)
+    soma = acumulado[..., janela - 1:].copy()
+    soma[..., 1:] -= acumulado[..., :-janela]
+    resultado[..., janela - 1:] = soma / janela
+
+    if not completa:
+        contagem = np.cumsum(validos, axis=-1)
+        na_janela = contagem[..., janela - 1:].copy()
+        na_janela[..., 1:] -= contagem[..., :-janela]
+        resultado[..., janela - 1:][na_janela < janela] = np.nan
+    return resultado
+
+
+def _primeiro_valido(precos):
+    """Índice do primeiro preço não-NaN em cada série (0 se todos forem NaN)"""
+    return np.argmax(~np.isnan(precos), axis=-1)
+
+
+def ewma(precos, alfa):
+    """
+    Média móvel exponencial: m[t] = alfa * p[t] + (1 - alfa) * m[t-1]
+
+    💡 DICA: a recursão vira uma soma ponderada por potências de
+    (1 - alfa). Para séries longas isso estoura o float, então
+    processamos em blocos e carregamos o último valor entre eles.
+
+    Séries que começam com NaN (empilhar()) partem do primeiro preço
+    válido, como se tivessem sido calculadas sozinhas.
+    """
+    precos = np.asarray(precos, dtype=np.float64)
+    resultado = np.empty(precos.shape)
+    n = precos.shape[-1]
+    if n == 0:
+        return resultado
+
+    if alfa >= 1.0:
+        resultado[...] = precos
+        return resultado
+
+    # Completa o começo de cada série com o 1º preço válido: m[t] fica
+    # = p[0] até ali (mesma semente da série sozinha) e volta a NaN no fim
+    antes_do_inicio = None
+    if np.isnan(precos).any():
+        primeiro = _primeiro_valido(precos)[..., np.newaxis]
+        antes_do_inicio = np.arange(n) < primeiro
+        semente = np.take_along_axis(precos, primeiro, axis=-1)
+        precos = np.where(antes_do_inicio, semente, precos)
+
+    beta = 1.0 - alfa
+    # Bloco em que beta**-bloco ainda cabe no float64 (sem estourar)
+    bloco = max(1, min(n, int(600 / -math.log(beta))))
+
+    # Valor "anterior" ao primeiro = o próprio primeiro preço (m[0] = p[0])
+    anterior = precos[..., :1]
+    for inicio in range(0, n, bloco):
+        pedaco = precos[..., inicio:inicio + bloco]
+        pesos = beta ** np.arange(pedaco.shape[-1])    # beta^0 .. beta^(k-1)
+
+        # m[t] = soma_j<=t alfa * beta^(t-j) * p[j]  +  beta^(t+1) * anterior
+        #      = beta^t * cumsum(alfa * p[j] / beta^j) + beta^(t+1) * anterior
+        media = np.cumsum(alfa * pedaco / pesos, axis=-1) * pesos + beta * pesos * anterior
+
+        resultado[..., inicio:inicio + pedaco.shape[-1]] = media
+        anterior = media[..., -1:]
+
+    if antes_do_inicio is not None:
+        resultado[antes_do_inicio] = np.nan
+    return resultado
+
+
+def retornos(precos):
+    """Retorno simples entre cotações consecutivas (primeiro = NaN)"""
+    precos = np.asarray(precos, dtype=np.float64)
+    resultado = np.full(precos.shape, np.nan)
+    resultado[..., 1:] = precos[..., 1:] / precos[..., :-1] - 1.0
+    return resultado
+
+
+def desvio_movel(valores, janela):
+    """Desvio padrão móvel (populacional) via somas acumuladas"""
+    valores = np.asarray(valores, dtype=np.float64)
+    media = media_movel(valores, janela)
+    media_quadrados = media_movel(valores * valores, janela)
+    variancia = np.maximum(media_quadrados - media * media, 0.0)
+    return np.sqrt(variancia)
+
+
+def volatilidade(precos, janela):
+    """Volatilidade móvel = desvio padrão dos retornos na janela"""
+    # O 1º retorno de cada série é NaN, então a 1ª janela cheia
+    # começa em primeiro_valido + janela (media_movel cuida disso)
+    return desvio_movel(retornos(precos), janela)
+
+
+def zscore(precos, janela):
+    """Quantos desvios padrão o preço está da média móvel"""
+    precos = np.asarray(precos, dtype=np.float64)
+    desvio = desvio_movel(precos, janela)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (precos - media_movel(precos, janela)) / desvio
+
+
+def drawdown(precos):
+    """Queda (%) em relação ao maior preço já visto (0 = no topo)"""
+    precos = np.asarray(precos, dtype=np.float64)
+    # fmax ignora NaN: o topo só começa a contar no primeiro preço real
+    topo = np.fmax.accumulate(precos, axis=-1)
+    return precos / topo - 1.0
+
+
+# ============================================
+# 🔁 ATUALIZAÇÃO INCREMENTAL
+# ============================================
+
+class IndicadoresIncrementais:
+    """
+    Mantém os indicadores de UM par atualizados a cada cotação nova
+
+    Guarda só o necessário (janela + somas), então cada atualização
+    custa O(1), não importa o tamanho do histórico.
+
+    PARÂMETROS:
+    - janela: tamanho da janela de média/volatilidade/z-score
+    - alfa: fator da EWMA
+    """
+
+    def __init__(self, janela=20, alfa=0.1):
+        self.janela = janela
+        self.alfa = alfa
+
+        self._precos = deque(maxlen=janela)
+        self._retornos = deque(maxlen=janela)
+        self._soma = 0.0
+        self._soma_quadrados = 0.0
+        self._soma_ret = 0.0
+        self._soma_ret_quadrados = 0.0
+
+        self.ultimo = None
+        self.ewma = None
+        self.topo = None
+
+    @classmethod
+    def a_partir_de(cls, precos, janela=20, alfa=0.1):
+        """Inicializa a partir de um histórico (calculado uma única vez)"""
+        estado = cls(janela, alfa)
+        for preco in np.asarray(precos, dtype=np.float64)[-(janela + 1):]:
+            estado._empurrar_janela(float(preco))
+        if len(precos):
+            estado.ewma = float(ewma(precos, alfa)[-1])
+            estado.topo = float(np.max(precos))
+        return estado
+
+    def _empurrar_janela(self, preco):
+        if len(self._precos) == self.janela:
+            antigo = self._precos[0]
+            self._soma -= antigo
+            self._soma_quadrados -= antigo * antigo
+        self._precos.append(preco)
+        self._soma += preco
+        self._soma_quadrados += preco * preco
+
+        if self.ultimo is not None:
+            retorno = preco / self.ultimo - 1.0
+            if len(self._retornos) == self.janela:
+                antigo = self._retornos[0]
+                self._soma_ret -= antigo
+                self._soma_ret_quadrados -= antigo * antigo
+            self._retornos.append(retorno)
+            self._soma_ret += retorno
+            self._soma_ret_quadrados += retorno * retorno
+
+        self.ultimo = preco
+
+    def atualizar(self, preco):
+        """
+        Recebe uma cotação nova e devolve os indicadores atualizados
+
+        RETORNA:
+        - dict com 'media', 'ewma', 'volatilidade', 'zscore', 'drawdown'
+        """
+        preco = float(preco)
+        self._empurrar_janela(preco)
+
+        self.ewma = preco if self.ewma is None else self.alfa * preco + (1 - self.alfa) * self.ewma
+        self.topo = preco if self.topo is None else max(self.topo, preco)
+
+        return self.valores()
+
+    def valores(self):
+        """Indicadores atuais (NaN enquanto a janela não encher)"""
+        n = len(self._precos)
+        cheia = n == self.janela
+
+        media = self._soma / n if cheia else math.nan
+        desvio = math.sqrt(max(self._soma_quadrados / n - media * media, 0.0)) if cheia else math.nan
+
+        if len(self._retornos) == self.janela:
+            media_ret = self._soma_ret / self.janela
+            vol = math.sqrt(max(self._soma_ret_quadrados / self.janela - media_ret ** 2, 0.0))
+        else:
+            vol = math.nan
+
+        return {
+            'media': media,
+            'ewma': self.ewma if self.ewma is not None else math.nan,
+            'volatilidade': vol,
+            'zscore': (self.ultimo - media) / desvio if cheia and desvio > 0 else math.nan,
+            'drawdown': self.ultimo / self.topo - 1.0 if self.topo else math.nan,
+        }
+
+
+class PainelIndicadores:
+    """
+    Indicadores incrementais de VÁRIOS pares, alimentados a cada busca
+
+    Na primeira cotação de um par, carrega o histórico local uma vez;
+    depois só atualiza. Pode ser registrado como ouvinte de
+    buscar_cotacoes() (ver ativar_indicadores()).
+    """
+
+    def __init__(self, janela=20, alfa=0.1, historico=None):
+        self.janela = janela
+        self.alfa = alfa
+        self.historico = historico
+        self.pares = {}
+
+    def atualizar(self, cotacoes):
+        """Recebe {par: cotacao} e atualiza os indicadores de cada par"""
+        for par, cotacao in cotacoes.items():
+            estado = self.pares.get(par)
+            if estado is None:
+                _, precos = carregar_precos(par, historico=self.historico)
+                estado = IndicadoresIncrementais.a_partir_de(precos, self.janela, self.alfa)
+                self.pares[par] = estado
+            estado.atualizar(cotacao['bid'])
+
+    def valores(self, par):
+        """Indicadores atuais de um par (None se ainda não viu o par)"""
+        estado = self.pares.get(par)
+        return estado.valores() if estado else None
+
+
+# Painel compartilhado pelos scripts
+painel_padrao = PainelIndicadores()
+
+
+def ativar_indicadores():
+    """Faz toda chamada de buscar_cotacoes() atualizar o painel padrão"""
+    from cotacao_moedas import registrar_ouvinte
+    registrar_ouvinte(painel_padrao.atualizar)
+
+
+# ============================================
+# 📏 BENCHMARK
+# ============================================
+
+def benchmark(pontos=1_000_000, pares=4, janela=20):
+    """
+    Mede os indicadores vetorizados em `pares` séries de `pontos` cada
+
+    RETORNA:
+    - dict {indicador: segundos}
+    """
+    gerador = np.random.default_rng(42)
+    passos = gerador.normal(0, 0.001, size=(pares, pontos))
+    precos = 5.0 * np.exp(np.cumsum(passos, axis=-1))
+
+    tempos = {}
+    for nome, funcao in (
+        ('media_movel', lambda: media_movel(precos, janela)),
+        ('ewma', lambda: ewma(precos, 2 / (janela + 1))),
+        ('volatilidade', lambda: volatilidade(precos, janela)),
+        ('zscore', lambda: zscore(precos, janela)),
+        ('drawdown', lambda: drawdown(precos)),
+    ):
+        inicio = time.perf_counter()
+        funcao()
+        tempos[nome] = time.perf_counter() - inicio
+
+    # Atualização incremental: custo por cotação nova
+    estado = IndicadoresIncrementais.a_partir_de(precos[0], janela)
+    novos = precos[1, :100_000]
+    inicio = time.perf_counter()
+    for preco in novos:
+        estado.atualizar(preco)
+    tempos['incremental_por_cotacao'] = (time.perf_counter() - inicio) / len(novos)
+
+    return tempos
+
+
+def conferir_empilhados(janela=20, alfa=0.1):
+    """
+    Confere que cada linha de empilhar() dá o mesmo resultado que a
+    série calculada sozinha (séries de tamanhos diferentes)
+
+    ⚠️ CUIDADO: levanta AssertionError se algum indicador divergir
+    """
+    gerador = np.random.default_rng(7)
+    series = [5.0 * np.exp(np.cumsum(gerador.normal(0, 0.001, size=tamanho)))
+              for tamanho in (500, 120, 37, 5, 0)]
+    matriz = empilhar(series)
+
+    for nome, funcao in (
+        ('media_movel', lambda precos: media_movel(precos, janela)),
+        ('ewma', lambda precos: ewma(precos, alfa)),
+        ('volatilidade', lambda precos: volatilidade(precos, janela)),
+        ('zscore', lambda precos: zscore(precos, janela)),
+        ('drawdown', drawdown),
+    ):
+        todas = funcao(matriz)
+        for linha, serie in enumerate(series):
+            sozinha = funcao(serie)
+            empilhada = todas[linha, matriz.shape[-1] - len(serie):]
+            assert np.isnan(todas[linha, :matriz.shape[-1] - len(serie)]).all(), nome
+            assert np.allclose(empilhada, sozinha, equal_nan=True, rtol=1e-9, atol=1e-12), \
+                f"{nome}: linha {linha} ({len(serie)} pontos) difere da série sozinha"
+    return True
+
+
+if __name__ == "__main__":
+    conferir_empilhados()
+    print("✅ empilhar(): cada linha bate com a série calculada sozinha")
+
+    pontos, pares = 1_000_000, 4
+    print(f"📏 Indicadores em {pares} pares × {pontos:,} pontos")
+
+    for nome, segundos in benchmark(pontos, pares).items():
+        if nome == 'incremental_por_cotacao':
+            print(f"   {nome:<24} {segundos * 1e6:8.2f}µs")
+        else:
+            print(f"   {nome:<24} {segundos * 1000:8.1f}ms")
@@ -0,0 +1,385 @@
+"""
+🗂️ ÍNDICE LOCAL DE CARDS DO TRELLO (um card por par + regra)
+=============================================================
+
+OBJETIVO:
+- Antes, TODO alerta virava um card novo: a mesma regra disparando de
+  novo (ou escalando) enchia o board de cards repetidos
+- Agora cada (par, regra) tem UM card: o primeiro alerta cria, os
+  seguintes atualizam nome e descrição do mesmo card (PUT)
+- Menos cards no board e a mesma quantidade de chamadas à API
+
+COMO FUNCIONA:
+1. Toda descrição ganha uma linha "🔑 alerta:USD-BRL:regra" no final
+2. Na primeira vez (índice nunca montado) lemos a lista INTEIRA do
+   Trello com UM GET e guardamos chave → id dos cards abertos
+3. Depois disso o índice só muda aos poucos: card criado → guarda,
+   card apagado/arquivado no Trello → esquece e cria outro
+4. Tudo fica num SQLite local: vale entre execuções do cron também
+
+USO:
+    futuro = indice_padrao.enviar(fila, 'USD-BRL:dolar-alto', nome, descricao, pos='top')
+    futuro.result()   → JSON do card criado ou atualizado
+
+⚠️ CUIDADO: cards criados antes deste índice não têm a linha 🔑,
+então não são reaproveitados (o próximo alerta cria um card novo).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+import cliente_http
+from metricas import log, registro
+
+ARQUIVO_PADRAO = os.getenv('INDICE_CARDS_DB', 'indice_cards.db')
+
+# Linha que identifica o card na descrição (é o que a reconstrução procura)
+MARCADOR = "🔑 alerta:{chave}"
+_PADRAO_MARCADOR = re.compile(r"🔑 alerta:(\S+)")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    chave      TEXT PRIMARY KEY,
+    card_id    TEXT NOT NULL,
+    atualizado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    nome  TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+def marcar(descricao, chave):
+    """Descrição com a linha 🔑 no final (só uma, mesmo chamando de novo)"""
+    descricao = _PADRAO_MARCADOR.sub('', descricao).rstrip()
+    return f"{descricao}\n\n{MARCADOR.format(chave=chave)}"
+
+
+def _repassar(origem, destino):
+    """Copia o resultado (ou a exceção) de um Future para outro"""
+    erro = origem.exception()
+    if erro is None:
+        destino.set_result(origem.result())
+    else:
+        destino.set_exception(erro)
+
+
+class IndiceCards:
+    """
+    chave (par:regra) → id do card no Trello, persistido em SQLite
+
+    PARÂMETROS:
+    - caminho: arquivo SQLite (':memory:' para testes)
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO):
+        self.caminho = caminho
+
+        self._conexao = None
+        self._cards = None            # chave → card_id; carregado 1x
+        self._criando = {}            # chave → Future do card sendo criado
+        # RLock: um Future já concluído roda o callback na hora, com a trava na mão
+        self._trava = threading.RLock()
+        self._trava_reconstrucao = threading.Lock()
+        self._tentou_reconstruir = False
+
+        self.contadores = {'criados': 0, 'atualizados': 0, 'recriados': 0, 'reconstrucoes': 0}
+
+    # ----------------------------------------
+    # Armazenamento
+    # ----------------------------------------
+
+    def _carregar(self):
+        if self._cards is not None:
+            return
+        conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.executescript(ESQUEMA)
+        self._conexao = conexao
+        self._cards = dict(conexao.execute("SELECT chave, card_id FROM cards"))
+
+    def construido(self):
+        """True se o índice já foi montado a partir do Trello alguma vez"""
+        with self._trava:
+            self._carregar()
+            linha = self._conexao.execute(
+                "SELECT valor FROM meta WHERE nome = 'construido_em'").fetchone()
+        return linha is not None
+
+    def obter(self, chave):
+        with self._trava:
+            self._carregar()
+            return self._cards.get(chave)
+
+    def guardar(self, chave, card_id):
+        with self._trava:
+            self._carregar()
+            self._cards[chave] = card_id
+            with self._conexao:
+                self._conexao.execute("INSERT OR REPLACE INTO cards VALUES (?, ?, ?)",
+                                      (chave, card_id, time.time()))
+
+    def remover(self, chave):
+        with self._trava:
+            self._carregar()
+            if self._cards.pop(chave, None) is not None:
+                with self._conexao:
+                    self._conexao.execute("DELETE FROM cards WHERE chave = ?", (chave,))
+
+    def esquecer(self):
+        """
+        Apaga o índice (troca de lista, board ou endereço do Trello)
+
+        Os ids guardados são da lista antiga: o próximo envio monta o
+        índice de novo a partir da lista nova, como na primeira vez.
+        Cards antigos ainda sendo criados não entram no índice novo.
+        """
+        with self._trava_reconstrucao, self._trava:
+            self._carregar()
+            with self._conexao:
+                self._conexao.execute("DELETE FROM cards")
+                self._conexao.execute("DELETE FROM meta WHERE nome = 'construido_em'")
+            self._cards = {}
+            self._criando = {}
+            self._tentou_reconstruir = False
+
+    def __len__(self):
+        with self._trava:
+            self._carregar()
+            return len(self._cards)
+
+    # ----------------------------------------
+    # Reconstrução (UM GET com a lista inteira)
+    # ----------------------------------------
+
+    def reconstruir(self, credenciais, url_base):
+        """
+        Lê os cards abertos da lista e refaz o índice do zero
+
+        RETORNA:
+        - quantidade de cards com a linha 🔑 encontrados
+        """
+        resposta = cliente_http.get(
+            f"{url_base}/1/lists/{credenciais['list_id']}/cards",
+            params={'key': credenciais['api_key'], 'token': credenciais['token'],
+                    'fields': 'id,name,desc,closed,idList'},
+            timeout=30,
+        )
+        resposta.raise_for_status()
+
+        encontrados = {}
+        for card in resposta.json():
+            marcador = _PADRAO_MARCADOR.search(card.get('desc') or '')
+            if marcador and not card.get('closed'):
+                # Cards duplicados de antes do índice: fica o primeiro (o do topo)
+                encontrados.setdefault(marcador.group(1), card['id'])
+
+        agora = time.time()
+        with self._trava:
+            self._carregar()
+            with self._conexao:
+                self._conexao.execute("DELETE FROM cards")
+                self._conexao.executemany("INSERT INTO cards VALUES (?, ?, ?)",
+                                          [(chave, card_id, agora) for chave, card_id in encontrados.items()])
+                self._conexao.execute("INSERT OR REPLACE INTO meta VALUES ('construido_em', ?)",
+                                      (str(agora),))
+            self._cards = encontrados
+            self.contadores['reconstrucoes'] += 1
+
+        log.info('indice_cards_reconstruido', "🗂️ Índice de cards montado a partir do Trello",
+                 cards=len(encontrados))
+        return len(encontrados)
+
+    def _garantir_construido(self, fila):
+        """Monta o índice na primeira vez (uma tentativa por processo)"""
+        if self._tentou_reconstruir:
+            return
+        with self._trava_reconstrucao:
+            if self._tentou_reconstruir:
+                return
+            self._tentou_reconstruir = True
+            if self.construido():
+                return
+            try:
+                self.reconstruir(fila.credenciais, fila.url_base)
+            except requests.exceptions.RequestException as erro:
+                # Sem o índice os alertas continuam saindo (como cards novos)
+                log.aviso('indice_cards_falhou', "⚠️ Não deu para ler a lista do Trello",
+                          erro=str(erro))
+
+    # ----------------------------------------
+    # Envio: cria OU atualiza
+    # ----------------------------------------
+
+    def enviar(self, fila, chave, nome, descricao='', **extras):
+        """
+        Cria o card da chave ou atualiza o que já existe
+
+        PARÂMETROS:
+        - fila: FilaTrello (rate limit, coalescência)
+        - chave: 'PAR:regra' (um card por chave)
+        - nome, descricao, extras: como em FilaTrello.enviar
+
+        RETORNA:
+        - Future com o JSON do card
+        """
+        self._garantir_construido(fila)
+        resultado = Future()
+        self._despachar(fila, chave, nome, marcar(descricao, chave), extras, resultado)
+        return resultado
+
+    def _concluir_criacao(self, chave, futuro):
+        """Card novo respondeu: guarda o id (só uma vez por Future)"""
+        with self._trava:
+            if self._criando.get(chave) is not futuro:
+                return
+            del self._criando[chave]
+            if futuro.exception() is None:
+                self.guardar(chave, futuro.result()['id'])
+
+    def _despachar(self, fila, chave, nome, descricao, extras, resultado, recriando=False):
+        with self._trava:
+            self._carregar()
+
+            criando = self._criando.get(chave)
+            if criando is not None and criando.done():
+                self._concluir_criacao(chave, criando)
+                criando = None
+            if criando is not None:
+                # Card ainda sendo criado: vira atualização quando o id chegar
+                criando.add_done_callback(
+                    lambda _: self._despachar(fila, chave, nome, descricao, extras, resultado))
+                return
+
+            card_id = self._cards.get(chave)
+            if card_id is None:
+                futuro = fila.enviar(nome, descricao, chave=chave, **extras)
+                self._criando[chave] = futuro
+                self.contadores['recriados' if recriando else 'criados'] += 1
+            else:
+                futuro = fila.enviar(nome, descricao, chave=chave, card_id=card_id, **extras)
+                self.contadores['atualizados'] += 1
+
+        if card_id is None:
+            def ao_criar(futuro):
+                self._concluir_criacao(chave, futuro)
+                _repassar(futuro, resultado)
+            futuro.add_done_callback(ao_criar)
+            return
+
+        def ao_atualizar(futuro):
+            erro = futuro.exception()
+            resposta = getattr(erro, 'response', None)
+            sumiu = resposta is not None and resposta.status_code == 404
+            if erro is None:
+                card = futuro.result()
+                # Arquivado ou movido de lista = alerta "resolvido" no board
+                lista = card.get('idList', fila.credenciais['list_id'])
+                sumiu = card.get('closed') or lista != fila.credenciais['list_id']
+
+            if sumiu and not recriando:
+                with self._trava:
+                    if self._cards.get(chave) == card_id:
+                        self.remover(chave)
+                self._despachar(fila, chave, nome, descricao, extras, resultado, recriando=True)
+            else:
+                _repassar(futuro, resultado)
+        futuro.add_done_callback(ao_atualizar)
+
+
+# Índice compartilhado pelos scripts
+indice_padrao = IndiceCards()
+
+
+def _coletar_metricas():
+    """Cards indexados e operações para o /metrics (só se o índice já foi usado)"""
+    if indice_padrao._cards is None:
+        return []
+    amostras = [('trello_indice_cards', 'gauge', "Cards de alerta no índice local", {},
+                 len(indice_padrao))]
+    for operacao, quantidade in indice_padrao.contadores.items():
+        amostras.append(('trello_indice_operacoes_total', 'counter',
+                         "Criações/atualizações de card decididas pelo índice",
+                         {'operacao': operacao}, quantidade))
+    return amostras
+
+
+registro.registrar_coletor(_coletar_metricas)
+
+
+# ============================================
+# 📏 DEMONSTRAÇÃO: board com e sem o índice
+# ============================================
+
+def comparar_cards(pares=5, disparos=10):
+    """
+    Cada par dispara a mesma regra `disparos` vezes (alertas + escaladas)
+
+    1. Sem índice: um card novo por disparo (como era antes)
+    2. Com índice: um card por par; o resto vira atualização
+    3. "Reinício" com o arquivo do índice: nenhum card novo
+    4. Arquivo perdido: reconstrói com UM GET e continua atualizando
+
+    RETORNA:
+    - dict {cenário: {'cards_no_board', 'criados', 'atualizados', 'requisicoes'}}
+    """
+    import tempfile
+
+    from fila_trello import FilaTrello
+    from servidores_fake import ServidorFake
+
+    lista = [f"{moeda}-BRL" for moeda in ('USD', 'EUR', 'GBP', 'JPY', 'ARS')[:pares]]
+    credenciais = {'api_key': 'k', 'token': 't', 'list_id': 'l'}
+    resultado = {}
+
+    def disparar(servidor, indice=None):
+        fila = FilaTrello(credenciais, url_base=servidor.url,
+                          limite_key=(10_000, 1), limite_token=(10_000, 1))
+        antes = (servidor.cards_criados, servidor.cards_atualizados, len(servidor.requisicoes))
+        futuros = []
+        for disparo in range(disparos):
+            for par in lista:
+                nome = f"🔺 ESCALADA {disparo}: {par}" if disparo else f"🚨 ALERTA: {par}"
+                if indice is None:
+                    futuros.append(fila.enviar(nome, "teste", chave=f"{par}:regra:{disparo}"))
+                else:
+                    futuros.append(indice.enviar(fila, f"{par}:regra", nome, "teste"))
+            fila.aguardar()
+        for futuro in futuros:
+            futuro.result(timeout=10)
+        fila.fechar()
+        return {
+            'cards_no_board': sum(1 for card in servidor.cards.values() if not card['closed']),
+            'criados': servidor.cards_criados - antes[0],
+            'atualizados': servidor.cards_atualizados - antes[1],
+            'requisicoes': len(servidor.requisicoes) - antes[2],
+        }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, 'indice.db')
+
+        with ServidorFake() as servidor:
+            resultado['sem índice'] = disparar(servidor)
+
+        with ServidorFake() as servidor:
+            resultado['com índice'] = disparar(servidor, IndiceCards(arquivo))
+            resultado['reinício (mesmo arquivo)'] = disparar(servidor, IndiceCards(arquivo))
+            novo = os.path.join(pasta, 'indice_novo.db')
+            resultado['arquivo perdido (1 GET)'] = disparar(servidor, IndiceCards(novo))
+
+    return resultado
+
+
+if __name__ == "__main__":
+    print("🗂️ 5 pares x 10 disparos da mesma regra (Trello fake)")
+    for cenario, r in comparar_cards().items():
+        print(f"   {cenario:<26} cards no board: {r['cards_no_board']:3d} | "
+              f"criados: {r['criados']:3d} | atualizados: {r['atualizados']:3d} | "
+              f"requisições: {r['requisicoes']}")
@@ -7,126 +7,242 @@ SISTEMA: Monitor de Cotação com Alertas Automáticos
 FLUXO:
 1. Busca cotação do dólar (AwesomeAPI)
 2. Salva na planilha Google Sheets
-3. Se cotação > R$ 5.50 → Cria card de alerta no Trello
-4. Registra tudo com logs
+3. Se alguma regra for cruzada (ex: > R$ 5.50) → Cria card de alerta no Trello
+4. Registra tudo com logs (JSON, uma linha por evento) e métricas por etapa
 """
 
-import requests
-import gspread
-import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturoAtrasado
 from datetime import datetime
-from dotenv import load_dotenv
-from oauth2client.service_account import ServiceAccountCredentials
 
-# Carrega variáveis de ambiente
-load_dotenv()
+from cache_cotacoes import buscar_cotacoes_em_cache, cache_padrao
+from caixa_saida import caixa_padrao as caixa_saida
+from conexao_sheets import obter_aba
+from cotacoes_recentes import Cotacao
+from destinos import ExecutorDestinos
+from cotacao_moedas import contador_requisicoes, reiniciar_contador
+from escritor_sheets import obter_escritor
+from estado_alertas import estado_padrao as estado_alertas
+from fila_trello import fechar_fila, obter_fila
+from historico_cotacoes import ativar_gravacao
+from indice_cards import indice_padrao as indice_cards
+from configuracao import ao_recarregar, obter as obter_config
+from metricas import cronometrar, log, salvar_em_arquivo
+from mudancas_cotacao import detector_padrao as detector_mudancas
 
-# Limite de alerta para dólar
-LIMITE_DOLAR = 5.50
+# Toda cotação buscada também vai para o histórico local (SQLite)
+ativar_gravacao()
+
+# Planilha, limite do dólar, credenciais e URL do Trello: configuracao.py
+# (lida na primeira chamada; o daemon recarrega quando o arquivo muda)
+
+# Regras de alerta: montadas na primeira avaliação
+# (regras da configuração; sem elas, regras_alerta.json ou o limite do dólar)
+_motor_regras = None
+# Os destinos 'sheets' e 'alertas' rodam em paralelo e os dois pedem o
+# motor: sem a trava, cada um montaria o seu e o estado de cruzamento
+# (valor anterior) de um deles se perderia
+_trava_motor = threading.Lock()
+
+# Tamanho máximo do texto de status (a célula do Sheets aceita 50 mil)
+TAMANHO_MAXIMO_STATUS = 200
+
+# Quanto o reenvio espera pelos cards atrasados (todos juntos, em segundos)
+PRAZO_REENVIO_TRELLO = 30.0
+
+
+def obter_motor():
+    """Motor de regras atual (refeito quando a configuração muda)"""
+    global _motor_regras
+    motor = _motor_regras
+    if motor is not None:
+        return motor
+    with _trava_motor:
+        if _motor_regras is None:
+            motor = obter_config().criar_motor()
+            # Regras que saíram da configuração não deixam estado para trás
+            estado_alertas.podar(motor.regras())
+            _motor_regras = motor
+        return _motor_regras
+
+
+@ao_recarregar
+def _config_mudou(nova, antiga):
+    global _motor_regras
+    if nova.regras != antiga.regras or nova.limite_dolar != antiga.limite_dolar:
+        with _trava_motor:
+            _motor_regras = None
+
+    # A fila do Trello guarda as credenciais e o endereço de quando foi
+    # criada: troca por uma nova (a antiga termina o que já tinha, com
+    # as credenciais antigas, numa thread)
+    credenciais_antigas = antiga.credenciais_trello or {}
+    credenciais_novas = nova.credenciais_trello or {}
+    if credenciais_novas != credenciais_antigas or nova.url_base_trello != antiga.url_base_trello:
+        fechar_fila(esperar=False)
+        log.info('trello_fila_recriada', "🔄 Credenciais do Trello mudaram, fila recriada")
+
+    # Outra lista/board/endereço: os ids do índice não valem mais
+    if (nova.url_base_trello != antiga.url_base_trello
+            or credenciais_novas.get('list_id') != credenciais_antigas.get('list_id')
+            or credenciais_novas.get('board_id') != credenciais_antigas.get('board_id')):
+        indice_cards.esquecer()
+
+
+def resumir_cotacao(cotacao):
+    """
+    Converte a cotação da API no formato usado pelo monitoramento
+    
+    Devolve uma Cotacao (__slots__): lê igual ao dict antigo
+    (cotacao['valor'], cotacao['data_hora']...), mas o texto da
+    data/hora só é formatado se alguém usar
+    """
+    return Cotacao.da_api(cotacao)
 
 def buscar_cotacao_dolar():
     """Busca cotação atual do dólar"""
-    print("💰 Buscando cotação do dólar...")
+    # Um único par, mas passando pela busca em lote do Projeto 1
+    # (cache na frente: monitor, formatação e alerta não repetem a busca)
+    with cronometrar('buscar') as medicao:
+        cotacoes = buscar_cotacoes_em_cache(['USD-BRL'])
+        
+        if 'USD-BRL' not in cotacoes:
+            medicao.falhou()
+            log.erro('cotacao_falhou', "❌ Erro ao buscar cotação", par='USD-BRL')
+            return None
     
-    url = "https://economia.awesomeapi.com.br/json/last/USD-BRL"
+    resultado = resumir_cotacao(cotacoes['USD-BRL'])
     
-    try:
-        resposta = requests.get(url, timeout=10)
-        resposta.raise_for_status()
-        
-        dados = resposta.json()
-        cotacao = dados['USDBRL']
-        
-        resultado = {
-            'valor': float(cotacao['bid']),
-            'variacao': float(cotacao['pctChange']),
-            'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        }
-        
-        print(f"✅ Cotação obtida: R$ {resultado['valor']:.2f}")
-        return resultado
-        
-    except Exception as e:
-        print(f"❌ Erro ao buscar cotação: {e}")
-        return None
+    log.info('cotacao_obtida', "✅ Cotação obtida", par=resultado['par'], valor=resultado['valor'])
+    return resultado
+
+
+def _gravidade(regra):
+    """Quanto mais longe o limite, mais grave a regra (na direção dela)"""
+    return regra.limite if regra.tipo.endswith('acima') else -regra.limite
+
+
+def status_da_cotacao(cotacao):
+    """
+    Texto da coluna de status: as regras do PAR que valem agora
+    
+    Vem do motor de regras (o mesmo dos alertas), não do limite do
+    dólar: EUR-BRL a 6.10 não é "alerta" só porque passa de 5.50.
+    
+    ⚠️ CUIDADO: com milhares de regras, listar todas estoura o limite
+    de 50 mil caracteres da célula (e o append_rows falha o lote
+    inteiro). Vai só a quantidade + a regra mais grave, com teto
+    de TAMANHO_MAXIMO_STATUS.
+    """
+    par = cotacao.get('par', 'USD-BRL')
+    regras = obter_motor().satisfeitas(par, cotacao['valor'], cotacao['variacao'])
+    if not regras:
+        return "Normal"
+    
+    mais_grave = max(regras, key=_gravidade).descrever()
+    if len(regras) == 1:
+        status = f"🚨 ALERTA! {mais_grave}"
+    else:
+        status = f"🚨 ALERTA! {len(regras)} regras ({mais_grave}; …)"
+    return status[:TAMANHO_MAXIMO_STATUS]
 
 
 def salvar_no_sheets(cotacao):
     """Salva cotação no Google Sheets"""
-    print("📊 Salvando na planilha...")
+    config = obter_config()
+    # Com vários pares (daemon, shards) a linha precisa dizer de qual é
+    linha = [
+        cotacao['data_hora'],
+        cotacao.get('par', 'USD-BRL'),
+        f"R$ {cotacao['valor']:.2f}",
+        f"{cotacao['variacao']:.2f}%",
+        status_da_cotacao(cotacao),
+    ]
     
-    try:
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            'credentials.json',
-            scope
-        )
-        
-        client = gspread.authorize(creds)
-        
-        # ID DA SUA PLANILHA
-        planilha = client.open_by_key('1ENHCxP6I2uOsXuTEey6sb_VQ2vCQEFcQqvAayxBId5w')
-        sheet = planilha.sheet1
-        
-        linha = [
-            cotacao['data_hora'],
-            f"R$ {cotacao['valor']:.2f}",
-            f"{cotacao['variacao']:.2f}%",
-            "🚨 ALERTA!" if cotacao['valor'] > LIMITE_DOLAR else "Normal"
-        ]
-        
-        sheet.append_row(linha)
-        
-        print(f"✅ Dados salvos na planilha!")
-        return True
-        
-    except FileNotFoundError:
-        print("⚠️ Arquivo credentials.json não encontrado")
-        return False
-        
-    except Exception as e:
-        print(f"⚠️ Erro ao salvar no Sheets: {e}")
-        return False
+    # Gravada na caixa de saída ANTES de tudo: se o Sheets estiver fora,
+    # o reenviador manda depois (apagada só quando o append_rows der certo)
+    registro = caixa_saida.registrar('sheets', {'planilha': config.planilha_id, 'linha': linha})
+    
+    with cronometrar('sheets') as medicao:
+        try:
+            # Conexão e aba vêm do gerenciador (autoriza uma vez por processo)
+            sheet = obter_aba(config.planilha_id)
+            
+            # Vai para o buffer; o flush envia várias linhas num append_rows()
+            escritor = obter_escritor(sheet)
+            escritor.adicionar(linha,
+                               ao_enviar=lambda: caixa_saida.confirmar([registro]),
+                               ao_falhar=lambda: caixa_saida.liberar([registro]))
+            
+            log.info('sheets_enfileirado', "✅ Linha na fila da planilha",
+                     par=cotacao.get('par'), pendentes=escritor.pendentes)
+            return True
+            
+        except FileNotFoundError:
+            medicao.falhou()
+            caixa_saida.descartar([registro])
+            log.aviso('sheets_sem_credenciais', "⚠️ Arquivo credentials.json não encontrado")
+            return False
+            
+        except Exception as e:
+            medicao.falhou()
+            caixa_saida.liberar([registro])
+            log.aviso('sheets_falhou', "⚠️ Erro ao salvar no Sheets, linha fica para o reenvio",
+                      erro=str(e))
+            return False
 
 
-def criar_alerta_trello(cotacao):
-    """Cria card de alerta no Trello se necessário"""
+def criar_alerta_trello(cotacao, regra=None, nivel=0):
+    """
+    Cria card de alerta no Trello se necessário
     
-    # Verifica se precisa criar alerta
-    if cotacao['valor'] <= LIMITE_DOLAR:
-        print(f"✅ Cotação normal (R$ {cotacao['valor']:.2f} ≤ R$ {LIMITE_DOLAR:.2f})")
-        print("   Não é necessário criar alerta no Trello")
-        return False
+    Cada par + regra tem UM card (indice_cards.py): alertas repetidos e
+    escaladas atualizam o card que já está no board.
+    
+    PARÂMETROS:
+    - cotacao: dict com 'valor', 'variacao', 'data_hora' (e 'par')
+    - regra: Regra disparada pelo motor de regras
+             (None = checagem antiga contra o limite do dólar)
+    - nivel: 0 = alerta novo; 1, 2... = escalada (valor continua piorando)
+    """
+    
+    par = cotacao.get('par', 'USD-BRL')
+    config = obter_config()
     
-    print(f"🚨 ALERTA! Cotação acima do limite (R$ {cotacao['valor']:.2f} > R$ {LIMITE_DOLAR:.2f})")
-    print("📝 Criando card de alerta no Trello...")
+    if regra is None:
+        # Verifica se precisa criar alerta
+        if cotacao['valor'] <= config.limite_dolar:
+            log.info('alerta_desnecessario', "✅ Cotação normal, sem alerta no Trello",
+                     par=par, valor=cotacao['valor'], limite=config.limite_dolar)
+            return False
+        condicao = f"valor > {config.limite_dolar:.2f}"
+    else:
+        condicao = regra.descrever()
+    
+    log.aviso('alerta_disparado', "🚨 ALERTA! Criando card no Trello",
+              par=par, condicao=condicao, valor=cotacao['valor'], nivel=nivel)
     
-    # Carregar credenciais do Trello
-    api_key = os.getenv('TRELLO_API_KEY')
-    token = os.getenv('TRELLO_TOKEN')
-    list_id = os.getenv('TRELLO_LIST_ID')
+    # Credenciais do Trello (lidas uma vez, junto com a configuração)
+    credenciais = config.credenciais_trello
     
-    if not all([api_key, token, list_id]):
-        print("⚠️ Credenciais do Trello não encontradas no .env")
+    if credenciais is None:
+        log.aviso('trello_sem_credenciais', "⚠️ Credenciais do Trello não encontradas no .env")
         return False
     
     # Preparar dados do card
-    url = "https://api.trello.com/1/cards"
-    
     tendencia = "📈" if cotacao['variacao'] > 0 else "📉"
     
-    nome = f"🚨 ALERTA: Dólar em R$ {cotacao['valor']:.2f}"
+    nome = f"🚨 ALERTA: {par} em R$ {cotacao['valor']:.2f}"
+    if nivel:
+        nome = f"🔺 ESCALADA {nivel}: {par} em R$ {cotacao['valor']:.2f}"
     
     descricao = f"""
 ## 🚨 Alerta de Cotação
 
 **Valor atual:** R$ {cotacao['valor']:.2f}  
 **Variação:** {cotacao['variacao']:.2f}% {tendencia}  
-**Limite configurado:** R$ {LIMITE_DOLAR:.2f}  
+**Regra:** {condicao}  
 **Data/Hora:** {cotacao['data_hora']}
 
 ---
@@ -141,76 +257,203 @@ def criar_alerta_trello(cotacao):
 *Card criado automaticamente pelo sistema de monitoramento Python* 🐍
 """
     
-    parametros = {
-        'key': api_key,
-        'token': token,
-        'idList': list_id,
-        'name': nome,
-        'desc': descricao,
-        'pos': 'top'
-    }
+    fila = obter_fila(credenciais, url_base=config.url_base_trello)
+    
+    # O card vai para a fila (respeita o rate limit do Trello).
+    # Mesmo par + mesma regra → o mesmo card, criado ou atualizado.
+    chave = f"{par}:{regra.id if regra else 'limite-dolar'}"
+    registro = caixa_saida.registrar('trello', {'nome': nome, 'descricao': descricao, 'chave': chave})
+    futuro = indice_cards.enviar(fila, chave, nome, descricao, pos='top')
+    
+    def informar(futuro):
+        try:
+            card = futuro.result()
+            caixa_saida.confirmar([registro])
+            log.info('trello_card_enviado', "✅ Card de alerta criado/atualizado",
+                     par=par, url=card.get('url'))
+        except Exception as e:
+            # Fica na caixa de saída: o reenviador tenta de novo
+            caixa_saida.liberar([registro])
+            log.erro('trello_falhou', "❌ Erro ao criar card no Trello", par=par, erro=str(e))
     
-    try:
-        resposta = requests.post(url, params=parametros, timeout=10)
-        resposta.raise_for_status()
+    futuro.add_done_callback(informar)
+    
+    if futuro.done() and futuro.exception():
+        return False
+    
+    log.info('trello_enfileirado', "📬 Card na fila do Trello",
+             par=par, profundidade=fila.estatisticas()['profundidade'])
+    return True
+
+
+def alertar_por_regras(cotacao, disparadas=None):
+    """
+    Avalia as regras do par e cria um card para cada regra cruzada
+    
+    Antes de criar o card, o estado local (estado_alertas.py) decide se
+    é um alerta novo, repetido (cooldown/histerese) ou uma escalada.
+    
+    PARÂMETROS:
+    - disparadas: regras já avaliadas em outro processo (monitor_shards.py);
+                  None = avaliar aqui com obter_motor()
+    
+    RETORNA:
+    - True se pelo menos um alerta foi criado
+    """
+    par = cotacao.get('par', 'USD-BRL')
+    
+    with cronometrar('alertas'):
+        # Rearma regras que voltaram ao normal e detecta escaladas
+        escaladas = estado_alertas.observar(par, cotacao['valor'], cotacao['variacao'])
+        if disparadas is None:
+            disparadas = obter_motor().avaliar(par, cotacao['valor'], cotacao['variacao'])
         
-        card = resposta.json()
+        novas = [regra for regra in disparadas
+                 if estado_alertas.permitir(par, regra, cotacao['valor'], cotacao['variacao'])]
         
-        print(f"✅ Card de alerta criado com sucesso!")
-        print(f"   URL: {card['url']}")
+        if len(novas) < len(disparadas):
+            log.info('alertas_suprimidos', "🔕 Alerta(s) repetido(s) suprimido(s)",
+                     par=par, quantidade=len(disparadas) - len(novas))
         
-        return True
+        if not novas and not escaladas:
+            log.info('sem_alerta', "✅ Nenhum alerta novo", par=par, valor=cotacao['valor'])
+            return False
         
-    except Exception as e:
-        print(f"❌ Erro ao criar card no Trello: {e}")
-        return False
+        criados = [criar_alerta_trello(cotacao, regra) for regra in novas]
+        criados += [criar_alerta_trello(cotacao, regra, nivel) for regra, nivel in escaladas]
+        return any(criados)
 
 
-def executar_monitoramento():
-    """Executa o fluxo completo de monitoramento"""
+# ============================================
+# 📮 REENVIO DA CAIXA DE SAÍDA (em lote)
+# ============================================
+
+def reenviar_sheets(itens):
+    """Linhas atrasadas: UM append_rows por planilha"""
+    por_planilha = {}
+    for registro, dados in itens:
+        por_planilha.setdefault(dados['planilha'], []).append((registro, dados['linha']))
     
-    print("=" * 60)
-    print("🚀 SISTEMA DE MONITORAMENTO DE COTAÇÃO")
-    print("=" * 60)
-    print()
+    confirmados = []
+    for planilha, linhas in por_planilha.items():
+        obter_aba(planilha).append_rows([linha for _, linha in linhas],
+                                        value_input_option='USER_ENTERED')
+        confirmados += [registro for registro, _ in linhas]
+    return confirmados
+
+
+def reenviar_trello(itens, prazo=PRAZO_REENVIO_TRELLO):
+    """
+    Cards atrasados: todos pela fila (respeita o rate limit do Trello)
+
+    ⚠️ CUIDADO: com um Retry-After longo a fila pode demorar minutos.
+    Passado o prazo, o card que ainda não saiu NÃO é confirmado: volta
+    para a caixa de saída e o próximo reenvio tenta de novo (pela
+    chave, o índice de cards atualiza em vez de duplicar)
+    """
+    config = obter_config()
+    if config.credenciais_trello is None:
+        return []
+    
+    fila = obter_fila(config.credenciais_trello, url_base=config.url_base_trello)
+    futuros = [(registro, indice_cards.enviar(fila, dados['chave'], dados['nome'],
+                                              dados['descricao'], pos='top'))
+               for registro, dados in itens]
     
-    # PASSO 1: Buscar cotação
-    cotacao = buscar_cotacao_dolar()
+    limite = time.monotonic() + prazo
+    confirmados = []
+    for registro, futuro in futuros:
+        try:
+            if futuro.exception(timeout=max(limite - time.monotonic(), 0)) is None:
+                confirmados.append(registro)
+        except FuturoAtrasado:
+            pass
     
-    if not cotacao:
-        print("\n❌ Falha ao buscar cotação. Encerrando.")
-        return
+    if len(confirmados) < len(futuros):
+        log.aviso('trello_reenvio_incompleto', "⚠️ Cards do reenvio ficam para a próxima vez",
+                  enviados=len(confirmados), pendentes=len(futuros) - len(confirmados))
+    return confirmados
+
+
+caixa_saida.registrar_despachante('sheets', reenviar_sheets)
+caixa_saida.registrar_despachante('trello', reenviar_trello)
+
+
+# Destinos da cotação depois da busca: rodam EM PARALELO, cada um com prazo.
+# Para plugar outro (banco local, webhook...): destinos.registrar(nome, funcao)
+destinos = ExecutorDestinos()
+destinos.registrar('sheets', salvar_no_sheets)
+destinos.registrar('alertas', alertar_por_regras)
+
+
+def enviar_se_mudou(cotacao):
+    """
+    Manda a cotação para os destinos SÓ se ela mudou na API
     
-    print()
+    Consultar mais rápido que a AwesomeAPI atualiza devolve a mesma
+    cotação: sem isso, cada consulta virava uma linha repetida no Sheets.
     
-    # PASSO 2: Salvar no Google Sheets
-    salvar_no_sheets(cotacao)
+    RETORNA:
+    - resultados de destinos.executar(), ou None se nada mudou
+    """
+    if detector_mudancas.avaliar(cotacao) != 'nova':
+        return None
+    return destinos.executar(cotacao)
+
+
+def executar_monitoramento():
+    """Executa o fluxo completo de monitoramento"""
     
-    print()
+    log.info('ciclo_iniciado', "🚀 Sistema de monitoramento de cotação")
     
-    # PASSO 3: Verificar se precisa criar alerta no Trello
-    alerta_criado = criar_alerta_trello(cotacao)
+    # Zera o contador para medir as requisições DESTE ciclo
+    reiniciar_contador()
     
-    print()
-    print("=" * 60)
+    with cronometrar('ciclo') as ciclo:
+        # PASSO 1: Buscar cotação
+        cotacao = buscar_cotacao_dolar()
+        
+        if not cotacao:
+            ciclo.falhou()
+            log.erro('ciclo_abortado', "❌ Falha ao buscar cotação. Encerrando.")
+            return
+        
+        # PASSO 2 e 3 ao mesmo tempo: Google Sheets + regras/alerta no Trello
+        # (um não espera o outro; se um falhar, o outro segue)
+        # Cotação igual à última enviada → nenhum destino é chamado
+        resultados = enviar_se_mudou(cotacao) or {}
+        salvo = resultados.get('sheets', {}).get('resultado') is True
+        alerta_criado = resultados.get('alertas', {}).get('resultado') is True
     
     # RESUMO FINAL
-    if alerta_criado:
-        print("✅ MONITORAMENTO CONCLUÍDO - ALERTA CRIADO!")
-        print(f"   Dólar: R$ {cotacao['valor']:.2f} (acima do limite)")
-        print("   🚨 Verifique o card no Trello!")
-    else:
-        print("✅ MONITORAMENTO CONCLUÍDO - SITUAÇÃO NORMAL")
-        print(f"   Dólar: R$ {cotacao['valor']:.2f}")
-        print("   ✅ Dados salvos na planilha")
+    estatisticas_cache = cache_padrao.estatisticas()
+    log.info(
+        'ciclo_concluido',
+        "✅ Monitoramento concluído - ALERTA CRIADO!" if alerta_criado
+        else "✅ Monitoramento concluído - situação normal",
+        par=cotacao['par'],
+        valor=cotacao['valor'],
+        alerta=alerta_criado,
+        salvo=salvo,
+        sem_mudanca=not resultados,
+        escritas_suprimidas=round(detector_mudancas.taxa_suprimida(), 3),
+        requisicoes_awesomeapi=contador_requisicoes['requisicoes'],
+        cache_acertos=round(estatisticas_cache['taxa_acerto'], 3),
+        cache_vencidos=round(estatisticas_cache['taxa_vencido'], 3),
+    )
+    
+    # Escritas que falharam em execuções anteriores vão agora, em lote
+    caixa_saida.reenviar()
+    
+    # Próxima execução começa com o cache aquecido (se COTACOES_SNAPSHOT definido)
+    cache_padrao.salvar_snapshot()
     
-    print("=" * 60)
+    # Métricas para o Prometheus (se METRICAS_ARQUIVO definido)
+    salvar_em_arquivo()
 
 
 def testar_alerta():
     """Função de teste que simula uma cotação alta"""
-    print("🧪 MODO DE TESTE - Simulando cotação alta")
-    print()
     
     cotacao_teste = {
         'valor': 5.75,
@@ -218,18 +461,25 @@ def testar_alerta():
         'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
     }
     
-    print(f"💰 Cotação simulada: R$ {cotacao_teste['valor']:.2f}")
-    print()
+    log.info('teste_alerta', "🧪 MODO DE TESTE - Simulando cotação alta",
+             valor=cotacao_teste['valor'], variacao=cotacao_teste['variacao'])
     
     criar_alerta_trello(cotacao_teste)
 
 
 if __name__ == "__main__":
-    # MODO NORMAL - Busca cotação real
-    # executar_monitoramento()
+    import sys
     
-    # MODO TESTE - Simula cotação alta para testar
-    testar_alerta()
+    if '--daemon' in sys.argv:
+        # MODO DAEMON - Roda sem parar (ex: --daemon USD-BRL:60 EUR-BRL:300)
+        from monitor_daemon import main as executar_daemon
+        executar_daemon([arg for arg in sys.argv[1:] if arg != '--daemon'])
+    else:
+        # MODO NORMAL - Busca cotação real
+        # executar_monitoramento()
+        
+        # MODO TESTE - Simula cotação alta para testar
+        testar_alerta()
 """
 📚 CONCEITOS APRENDIDOS NESTA INTEGRAÇÃO:
 
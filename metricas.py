@@ -0,0 +1,404 @@
+"""
+📊 MÉTRICAS E LOGS ESTRUTURADOS
+================================
+
+OBJETIVO:
+- Saber ONDE o ciclo ficou lento: AwesomeAPI? autorização do Sheets?
+  append? post no Trello?
+- Cronômetros por etapa, contadores (ok / erro / retry) e histogramas
+- Exportar no formato texto do Prometheus (arquivo ou HTTP local)
+- Logs em JSON (uma linha por evento) no lugar dos print()
+
+NOVOS CONCEITOS:
+- Histograma com "baldes" fixos: em vez de guardar cada medição,
+  conta quantas caíram abaixo de 5ms, 10ms, 25ms... (memória constante)
+- Coletores: números que já existem em outros módulos (retries do
+  disjuntor, fila do Trello) só são lidos na hora de exportar,
+  sem custo nenhum no caminho quente
+
+USO:
+    from metricas import cronometrar, log
+
+    with cronometrar('buscar') as medicao:
+        cotacoes = buscar_cotacoes(pares)
+        if not cotacoes:
+            medicao.falhou()
+
+    log.info('cotacao_obtida', "✅ Cotação obtida", par='USD-BRL', valor=5.41)
+
+    python metricas.py   → mede o custo de cronometrar()
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites dos baldes (segundos) — os mesmos do cliente oficial do Prometheus
+BALDES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Exportação automática (ver ativar_exportacao)
+ARQUIVO_METRICAS = os.getenv('METRICAS_ARQUIVO')
+PORTA_METRICAS = os.getenv('METRICAS_PORTA')
+
+
+def _rotulos_texto(rotulos):
+    """(('etapa', 'buscar'),) → '{etapa="buscar"}'"""
+    if not rotulos:
+        return ''
+    pares = ','.join(f'{nome}="{str(valor)}"' for nome, valor in rotulos)
+    return '{' + pares + '}'
+
+
+class Contador:
+    """Valor que só cresce (ex: requisições, erros)"""
+
+    __slots__ = ('valor', '_trava')
+
+    def __init__(self):
+        self.valor = 0.0
+        self._trava = threading.Lock()
+
+    def incrementar(self, quantidade=1):
+        with self._trava:
+            self.valor += quantidade
+
+
+class Histograma:
+    """Distribuição de durações em baldes fixos (+ soma e contagem)"""
+
+    __slots__ = ('limites', 'contagens', 'soma', 'total', '_trava')
+
+    def __init__(self, limites=BALDES_PADRAO):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)   # último = +Inf
+        self.soma = 0.0
+        self.total = 0
+        self._trava = threading.Lock()
+
+    def observar(self, valor):
+        posicao = bisect_left(self.limites, valor)
+        with self._trava:
+            self.contagens[posicao] += 1
+            self.soma += valor
+            self.total += 1
+
+
+class RegistroMetricas:
+    """
+    Guarda todas as métricas do processo
+
+    Cada métrica é identificada por nome + rótulos
+    (ex: monitor_etapa_segundos{etapa="sheets"})
+    """
+
+    def __init__(self):
+        self._familias = {}       # nome → {'tipo', 'ajuda', 'series': {rotulos: objeto}}
+        self._coletores = []
+        self._trava = threading.Lock()
+
+    def _serie(self, tipo, fabrica, nome, ajuda, rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        familia = self._familias.get(nome)
+        if familia is not None:
+            serie = familia['series'].get(chave)
+            if serie is not None:
+                return serie
+
+        with self._trava:
+            familia = self._familias.setdefault(nome, {'tipo': tipo, 'ajuda': ajuda, 'series': {}})
+            return familia['series'].setdefault(chave, fabrica())
+
+    def contador(self, nome, ajuda='', **rotulos):
+        """Devolve (criando na primeira vez) o contador nome{rotulos}"""
+        return self._serie('counter', Contador, nome, ajuda, rotulos)
+
+    def histograma(self, nome, ajuda='', **rotulos):
+        """Devolve (criando na primeira vez) o histograma nome{rotulos}"""
+        return self._serie('histogram', Histograma, nome, ajuda, rotulos)
+
+    def registrar_coletor(self, coletor):
+        """
+        Registra uma função lida só na exportação
+
+        O coletor devolve uma lista de (nome, tipo, ajuda, rotulos, valor),
+        com tipo 'counter' ou 'gauge' e rotulos um dict
+        """
+        self._coletores.append(coletor)
+
+    def exportar_prometheus(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        linhas = []
+
+        with self._trava:
+            familias = [(nome, dict(familia, series=dict(familia['series'])))
+                        for nome, familia in self._familias.items()]
+
+        for nome, familia in sorted(familias):
+            linhas.append(f"# HELP {nome} {familia['ajuda']}")
+            linhas.append(f"# TYPE {nome} {familia['tipo']}")
+
+            for rotulos, serie in sorted(familia['series'].items()):
+                if familia['tipo'] == 'counter':
+                    linhas.append(f"{nome}{_rotulos_texto(rotulos)} {serie.valor}")
+                    continue
+
+                with serie._trava:
+                    contagens = list(serie.contagens)
+                    soma, total = serie.soma, serie.total
+                acumulado = 0
+                for limite, contagem in zip(serie.limites + ('+Inf',), contagens):
+                    acumulado += contagem
+                    linhas.append(f"{nome}_bucket{_rotulos_texto(rotulos + (('le', limite),))} {acumulado}")
+                linhas.append(f"{nome}_sum{_rotulos_texto(rotulos)} {soma}")
+                linhas.append(f"{nome}_count{_rotulos_texto(rotulos)} {total}")
+
+        amostras = []
+        for coletor in self._coletores:
+            try:
+                amostras.extend(coletor())
+            except Exception as e:
+                log.erro('coletor_falhou', "❌ Coletor de métricas falhou", erro=str(e))
+
+        # O formato exige as linhas de cada métrica juntas
+        anterior = None
+        for nome, tipo, ajuda, rotulos, valor in sorted(amostras, key=lambda amostra: amostra[0]):
+            if nome != anterior:
+                linhas.append(f"# HELP {nome} {ajuda}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+                anterior = nome
+            linhas.append(f"{nome}{_rotulos_texto(tuple(sorted(rotulos.items())))} {valor}")
+
+        return '\n'.join(linhas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+# ============================================
+# ⏱️ CRONÔMETRO POR ETAPA
+# ============================================
+
+class _Medicao:
+    """Context manager de cronometrar(): marca ok/erro e observa a duração"""
+
+    __slots__ = ('etapa', 'inicio', 'resultado')
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+        self.resultado = 'ok'
+
+    def falhou(self):
+        """Para funções que tratam o erro e devolvem False/None"""
+        self.resultado = 'erro'
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, erro, rastro):
+        duracao = time.perf_counter() - self.inicio
+        if tipo_erro is not None:
+            self.resultado = 'erro'
+        _registrar_etapa(self.etapa, self.resultado, duracao)
+        return False
+
+
+# etapa → (histograma, {resultado: contador}); evita montar rótulos a cada medição
+_series_etapas = {}
+
+
+def _registrar_etapa(etapa, resultado, duracao):
+    series = _series_etapas.get(etapa)
+    if series is None:
+        histograma = registro.histograma('monitor_etapa_segundos',
+                                         "Duração de cada etapa do monitoramento", etapa=etapa)
+        series = _series_etapas.setdefault(etapa, (histograma, {}))
+
+    histograma, contadores = series
+    contador = contadores.get(resultado)
+    if contador is None:
+        contador = contadores.setdefault(resultado, registro.contador(
+            'monitor_etapa_total', "Execuções de cada etapa por resultado",
+            etapa=etapa, resultado=resultado))
+
+    histograma.observar(duracao)
+    contador.incrementar()
+
+
+def cronometrar(etapa):
+    """
+    Mede uma etapa: duração (histograma) + contagem por resultado
+
+    Se o bloco levantar exceção, conta como 'erro' (e a exceção segue)
+    """
+    return _Medicao(etapa)
+
+
+def contar(nome, ajuda='', quantidade=1, **rotulos):
+    """Atalho: incrementa o contador nome{rotulos}"""
+    registro.contador(nome, ajuda, **rotulos).incrementar(quantidade)
+
+
+def observar(nome, valor, ajuda='', **rotulos):
+    """Atalho: registra um valor no histograma nome{rotulos}"""
+    registro.histograma(nome, ajuda, **rotulos).observar(valor)
+
+
+# ============================================
+# 📤 EXPORTAÇÃO
+# ============================================
+
+def salvar_em_arquivo(caminho=None):
+    """
+    Grava as métricas num arquivo (ex: textfile collector do node_exporter)
+
+    Escreve num temporário e troca de nome: quem lê nunca vê meio arquivo
+    """
+    caminho = caminho or ARQUIVO_METRICAS
+    if not caminho:
+        return
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(registro.exportar_prometheus())
+    os.replace(temporario, caminho)
+
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    def log_message(self, formato, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        dados = registro.exportar_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+_servidor_http = None
+
+
+def servir_http(porta=9464, endereco='127.0.0.1'):
+    """Sobe GET /metrics numa thread de fundo (uma vez por processo)"""
+    global _servidor_http
+
+    if _servidor_http is None:
+        _servidor_http = ThreadingHTTPServer((endereco, int(porta)), _ManipuladorMetricas)
+        _servidor_http.daemon_threads = True
+        threading.Thread(target=_servidor_http.serve_forever, daemon=True).start()
+        log.info('metricas_http', "📊 Métricas em /metrics",
+                 endereco=f"http://{endereco}:{_servidor_http.server_address[1]}/metrics")
+    return _servidor_http
+
+
+def ativar_exportacao():
+    """Liga o que estiver configurado: METRICAS_PORTA (HTTP) e/ou METRICAS_ARQUIVO"""
+    if PORTA_METRICAS:
+        servir_http(PORTA_METRICAS)
+    salvar_em_arquivo()
+
+
+# ============================================
+# 📝 LOGS ESTRUTURADOS (JSON)
+# ============================================
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por evento: ts, nivel, evento, msg + campos extras"""
+
+    def format(self, registro_log):
+        dados = {
+            'ts': round(registro_log.created, 3),
+            'nivel': registro_log.levelname.lower(),
+            'logger': registro_log.name,
+            'evento': getattr(registro_log, 'evento', None),
+            'msg': registro_log.getMessage(),
+            **getattr(registro_log, 'campos', {}),
+        }
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _SaidaPadrao(logging.StreamHandler):
+    """Escreve no sys.stdout ATUAL (como print: respeita redirect_stdout)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _):
+        pass
+
+
+class LogEstruturado:
+    """
+    Logger com eventos nomeados e campos (em vez de texto solto)
+
+    USO:
+        log.info('sheets_salvo', "✅ Linha na fila da planilha", pendentes=3)
+        → {"ts": ..., "nivel": "info", "evento": "sheets_salvo", "msg": "...", "pendentes": 3}
+    """
+
+    def __init__(self, nome='monitor'):
+        self._logger = logging.getLogger(nome)
+        if not self._logger.handlers:
+            saida = _SaidaPadrao()
+            saida.setFormatter(FormatadorJSON())
+            self._logger.addHandler(saida)
+            self._logger.setLevel(os.getenv('LOG_NIVEL', 'INFO').upper())
+            self._logger.propagate = False
+
+    def _emitir(self, nivel, evento, mensagem, campos):
+        if self._logger.isEnabledFor(nivel):
+            self._logger.log(nivel, mensagem, extra={'evento': evento, 'campos': campos})
+
+    def debug(self, evento, mensagem='', **campos):
+        self._emitir(logging.DEBUG, evento, mensagem, campos)
+
+    def info(self, evento, mensagem='', **campos):
+        self._emitir(logging.INFO, evento, mensagem, campos)
+
+    def aviso(self, evento, mensagem='', **campos):
+        self._emitir(logging.WARNING, evento, mensagem, campos)
+
+    def erro(self, evento, mensagem='', **campos):
+        self._emitir(logging.ERROR, evento, mensagem, campos)
+
+
+log = LogEstruturado()
+
+
+# ============================================
+# 📏 CUSTO DO CRONÔMETRO
+# ============================================
+
+def benchmark(repeticoes=1_000_000):
+    """Custo de um bloco `with cronometrar(...)` vazio, em µs"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        pass
+    vazio = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        with cronometrar('benchmark'):
+            pass
+    medido = time.perf_counter() - inicio
+
+    return {'repeticoes': repeticoes, 'custo_us': (medido - vazio) / repeticoes * 1e6}
+
+
+if __name__ == "__main__":
+    resultado = benchmark()
+    print(f"⏱️ cronometrar(): {resultado['custo_us']:.2f}µs por etapa "
+          f"({resultado['repeticoes']:,} repetições)")
+    print()
+    print(registro.exportar_prometheus())
@@ -0,0 +1,201 @@
+"""
+⚡ MONITORAMENTO ASSÍNCRONO (asyncio)
+======================================
+
+OBJETIVO:
+- Buscar MUITOS pares ao mesmo tempo (com limite de concorrência)
+- Mandar cada cotação pelo MESMO caminho do monitor síncrono:
+  detector de mudanças → destinos (Sheets e Trello em paralelo)
+- Manter executar_monitoramento() síncrono funcionando como antes
+
+POR QUÊ?
+- No fluxo sequencial o tempo total é a SOMA das chamadas de rede:
+  busca + Sheets + Trello
+- Com asyncio o tempo vira (aproximadamente) o da chamada MAIS LENTA
+
+NOVOS CONCEITOS:
+- asyncio.gather (várias tarefas ao mesmo tempo)
+- asyncio.Semaphore (no máximo N tarefas simultâneas)
+- asyncio.to_thread (roda funções bloqueantes sem travar o loop)
+"""
+
+import asyncio
+import time
+
+from cotacao_moedas import TAMANHO_LOTE, buscar_cotacoes, dividir_em_lotes, normalizar_par
+from integracao_completa import enviar_se_mudou, resumir_cotacao
+
+# Máximo de requisições simultâneas (não sobrecarregar as APIs)
+CONCORRENCIA_PADRAO = 8
+
+
+async def buscar_cotacoes_async(pares, concorrencia=CONCORRENCIA_PADRAO,
+                                tamanho_lote=TAMANHO_LOTE):
+    """
+    Busca os pares em lotes, com vários lotes em paralelo
+
+    PARÂMETROS:
+    - pares: lista de pares ("USD-BRL", ...)
+    - concorrencia: máximo de requisições ao mesmo tempo
+    - tamanho_lote: pares por requisição
+
+    RETORNA:
+    - dict {par: cotacao}, igual a buscar_cotacoes()
+    """
+    pares = list(dict.fromkeys(normalizar_par(par) for par in pares))
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def buscar_lote(lote):
+        async with semaforo:
+            return await asyncio.to_thread(buscar_cotacoes, lote, tamanho_lote)
+
+    lotes = list(dividir_em_lotes(pares, tamanho_lote))
+    respostas = await asyncio.gather(*(buscar_lote(lote) for lote in lotes))
+
+    resultado = {}
+    for resposta in respostas:
+        resultado.update(resposta)
+    return resultado
+
+
+async def processar_cotacao_async(cotacao, enviar, semaforo):
+    """
+    Envia UMA cotação para os destinos (Sheets e Trello ao mesmo tempo)
+
+    💡 DICA: enviar_se_mudou() passa pelo detector de mudanças antes:
+    cotação repetida não vira linha no Sheets nem alerta de novo.
+    O paralelismo Sheets/Trello e o isolamento de falhas ficam com o
+    ExecutorDestinos (igual ao monitor síncrono e ao daemon)
+    """
+    async with semaforo:
+        destinos = await asyncio.to_thread(enviar, cotacao)
+
+    destinos = destinos or {}
+    return {
+        'cotacao': cotacao,
+        'enviado': bool(destinos),
+        'salvo': destinos.get('sheets', {}).get('status') == 'ok',
+        'alerta': destinos.get('alertas', {}).get('status') == 'ok',
+    }
+
+
+async def executar_monitoramento_async(pares=('USD-BRL',), enviar=enviar_se_mudou,
+                                       concorrencia=CONCORRENCIA_PADRAO,
+                                       tamanho_lote=TAMANHO_LOTE):
+    """
+    Versão assíncrona de executar_monitoramento() para vários pares
+
+    FLUXO:
+    1. Busca todos os pares em paralelo (limitado pelo semáforo)
+    2. Cada cotação → enviar(): detector de mudanças e destinos
+
+    RETORNA:
+    - dict {par: {'cotacao', 'enviado', 'salvo', 'alerta'}}
+      (enviado=False: cotação repetida, nada foi mandado)
+    """
+    cotacoes = await buscar_cotacoes_async(pares, concorrencia, tamanho_lote)
+
+    semaforo = asyncio.Semaphore(concorrencia)
+    tarefas = [
+        processar_cotacao_async(resumir_cotacao(cotacao), enviar, semaforo)
+        for cotacao in cotacoes.values()
+    ]
+    resultados = await asyncio.gather(*tarefas)
+
+    return {resultado['cotacao']['par']: resultado for resultado in resultados}
+
+
+def executar_monitoramento_concorrente(pares=('USD-BRL',), **kwargs):
+    """Ponto de entrada síncrono (para quem não usa asyncio)"""
+    return asyncio.run(executar_monitoramento_async(pares, **kwargs))
+
+
+# ============================================
+# 📏 BENCHMARK: sequencial vs asyncio
+# ============================================
+
+def _fluxo_sequencial(pares, salvar, alertar, detector):
+    """O fluxo antigo: para cada par → busca, depois Sheets, depois Trello"""
+    for par in pares:
+        cotacao = buscar_cotacoes([par]).get(par)
+        if cotacao:
+            resumo = resumir_cotacao(cotacao)
+            if detector.avaliar(resumo) == 'nova':
+                salvar(resumo)
+                alertar(resumo)
+
+
+def comparar_com_sequencial(quantidade_pares=20, latencia=0.05):
+    """
+    Mede o tempo de parede dos dois fluxos contra o servidor fake
+
+    RETORNA:
+    - dict com 'sequencial', 'async' (segundos) e 'aceleracao'
+    """
+    import cliente_http
+    import cotacao_moedas
+    from destinos import ExecutorDestinos
+    from mudancas_cotacao import DetectorMudancas
+    from servidores_fake import ServidorFake
+
+    pares = [f"M{indice:02d}-BRL" for indice in range(quantidade_pares)]
+
+    with ServidorFake(latencia=latencia) as servidor:
+        url_original = cotacao_moedas.URL_BASE_AWESOMEAPI
+        cotacao_moedas.URL_BASE_AWESOMEAPI = servidor.url
+
+        # Sinks que imitam Sheets e Trello no servidor fake
+        def salvar(cotacao):
+            cliente_http.post(
+                f"{servidor.url}/v4/spreadsheets/fake/values/A1:append",
+                json={'values': [[cotacao['data_hora'], cotacao['par'], cotacao['valor']]]},
+            ).raise_for_status()
+            return True
+
+        def alertar(cotacao):
+            cliente_http.post(
+                f"{servidor.url}/1/cards", params={'name': cotacao['par']}
+            ).raise_for_status()
+            return True
+
+        # Mesmo caminho de enviar_se_mudou(), mas com os sinks fake e
+        # um detector em memória por fluxo (os dois veem tudo como novo)
+        executor = ExecutorDestinos()
+        executor.registrar('sheets', salvar)
+        executor.registrar('alertas', alertar)
+        detector_async = DetectorMudancas(':memory:')
+
+        def enviar(cotacao):
+            if detector_async.avaliar(cotacao) != 'nova':
+                return None
+            return executor.executar(cotacao)
+
+        try:
+            inicio = time.perf_counter()
+            _fluxo_sequencial(pares, salvar, alertar, DetectorMudancas(':memory:'))
+            tempo_sequencial = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            executar_monitoramento_concorrente(pares, enviar=enviar)
+            tempo_async = time.perf_counter() - inicio
+        finally:
+            cotacao_moedas.URL_BASE_AWESOMEAPI = url_original
+            executor.fechar()
+
+    return {
+        'pares': quantidade_pares,
+        'latencia': latencia,
+        'sequencial': tempo_sequencial,
+        'async': tempo_async,
+        'aceleracao': tempo_sequencial / tempo_async,
+    }
+
+
+if __name__ == "__main__":
+    print("📏 Comparando fluxo sequencial vs asyncio (servidor fake)...")
+    resultado = comparar_com_sequencial()
+
+    print(f"   Pares: {resultado['pares']} | latência simulada: {resultado['latencia'] * 1000:.0f}ms")
+    print(f"   Sequencial: {resultado['sequencial']:.2f}s")
+    print(f"   Asyncio:    {resultado['async']:.2f}s")
+    print(f"   🚀 {resultado['aceleracao']:.1f}x mais rápido")
@@ -0,0 +1,395 @@
+"""
+🕰️ MONITOR CONTÍNUO (daemon)
+=============================
+
+OBJETIVO:
+- Rodar o monitoramento sem parar, num único processo
+  (sem pagar import + autenticação a cada execução do cron)
+- Cada par tem seu próprio intervalo e "jitter"
+- Agenda sem deriva: usa relógio monotônico e horários FIXOS
+- Se um ciclo demorar demais, o próximo não roda por cima
+- Ctrl+C / SIGTERM: termina o ciclo atual e envia o que está no buffer
+- Editou monitor_config.json ou o .env? Vale em segundos, sem reiniciar
+
+NOVOS CONCEITOS:
+- time.monotonic() (relógio que nunca volta para trás)
+- heapq (fila de prioridade: o próximo prazo sempre na frente)
+- signal (encerramento gracioso)
+
+USO:
+    python monitor_daemon.py USD-BRL:60 EUR-BRL:300:10
+    (par:intervalo_segundos:jitter_segundos)
+    python monitor_daemon.py     → pares de monitor_config.json (recarregados)
+"""
+
+import heapq
+import random
+import signal
+import sys
+import threading
+import time
+from collections import deque
+
+from cache_cotacoes import cache_padrao
+from caixa_saida import caixa_padrao as caixa_saida
+from configuracao import obter as obter_config, recarregar_se_mudou
+from cotacao_moedas import buscar_cotacoes, normalizar_par
+from cotacoes_recentes import historico_recente
+from escritor_sheets import fechar_escritores
+from fila_trello import estatisticas_fila, fechar_fila
+from resiliencia import estado_disjuntores
+import metricas
+from integracao_completa import destinos, enviar_se_mudou, resumir_cotacao
+from mudancas_cotacao import detector_padrao as detector_mudancas
+
+INTERVALO_PADRAO = 60
+JITTER_PADRAO = 0.0
+
+# A cada quantos segundos registrar o relatório de atrasos
+INTERVALO_RELATORIO = 300
+
+# A cada quantos segundos conferir se a configuração mudou (um os.stat)
+INTERVALO_RECARGA = 5
+
+
+class AgendaPar:
+    """
+    Configuração de agendamento de um par
+
+    - continuo=True aceita intervalo 0 (consulta sem parar), que só o
+      monitor_shards sabe rodar; o daemon divide pelo intervalo
+
+    LEVANTA:
+    - ValueError se o intervalo for 0 (sem continuo) ou negativo
+    """
+
+    def __init__(self, par, intervalo=INTERVALO_PADRAO, jitter=JITTER_PADRAO, continuo=False):
+        self.par = normalizar_par(par)
+        self.intervalo = float(intervalo)
+        self.jitter = float(jitter)
+
+        if self.intervalo < 0 or (self.intervalo == 0 and not continuo):
+            raise ValueError(f"Intervalo do par {self.par} precisa ser maior que zero "
+                             f"(recebido: {intervalo})")
+
+    @classmethod
+    def de_texto(cls, texto, **opcoes):
+        """Lê "USD-BRL", "USD-BRL:60" ou "USD-BRL:60:5" """
+        partes = texto.split(':')
+        return cls(*partes, **opcoes)
+
+    def __repr__(self):
+        return f"AgendaPar({self.par!r}, intervalo={self.intervalo}, jitter={self.jitter})"
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) de uma lista (método do vizinho mais próximo)"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[indice]
+
+
+def processar_pares(pares):
+    """
+    Um ciclo do daemon: busca os pares em lote e envia para os destinos
+
+    💡 DICA: busca direto da API (valor fresco a cada tick) e depois
+    alimenta o cache, assim outras partes do código reaproveitam
+    """
+    with metricas.cronometrar('buscar'):
+        cotacoes = buscar_cotacoes(pares)
+    cache_padrao.guardar(cotacoes)
+
+    # Sheets + alertas de cada cotação em paralelo (integracao_completa.destinos),
+    # só para as que mudaram na API desde a última enviada
+    for cotacao in cotacoes.values():
+        resumo = resumir_cotacao(cotacao)
+        # Últimas cotações de cada par em memória (array('d'), tamanho fixo)
+        historico_recente.registrar(resumo)
+        enviar_se_mudou(resumo)
+
+
+class MonitorDaemon:
+    """
+    Agendador de ciclos de monitoramento
+
+    PARÂMETROS:
+    - agendas: lista de AgendaPar
+    - processar: função chamada com a lista de pares vencidos
+    - intervalo_relatorio: segundos entre relatórios de atraso
+    - agendas_da_config: os pares vieram da configuração
+      (se ela mudar, a agenda acompanha)
+    - intervalo_recarga: segundos entre checagens da configuração
+    """
+
+    def __init__(self, agendas, processar=processar_pares,
+                 intervalo_relatorio=INTERVALO_RELATORIO, agendas_da_config=False,
+                 intervalo_recarga=INTERVALO_RECARGA):
+        self.agendas = {agenda.par: agenda for agenda in agendas}
+        self.processar = processar
+        self.intervalo_relatorio = intervalo_relatorio
+        self.agendas_da_config = agendas_da_config
+        self.intervalo_recarga = intervalo_recarga
+
+        self._parar = threading.Event()
+        self._trava_ciclo = threading.Lock()   # impede ciclos sobrepostos
+        self._ciclo_atual = None
+
+        # Medições (as últimas 10 mil, para não crescer sem limite)
+        self.atrasos = deque(maxlen=10000)     # início real - horário agendado
+        self.duracoes = deque(maxlen=10000)    # duração de cada ciclo
+        self.contadores = {'ciclos': 0, 'sobrepostos': 0, 'ticks_perdidos': 0, 'erros': 0}
+
+    # ----------------------------------------
+    # Agenda sem deriva
+    # ----------------------------------------
+
+    def _prazo(self, agenda, ancora, tick):
+        """
+        Horário do tick número `tick` de um par
+
+        ⚠️ CUIDADO: NUNCA calcule "agora + intervalo" — o atraso de cada
+        ciclo se acumularia (deriva). Aqui o horário é sempre
+        âncora + tick * intervalo; o jitter não se acumula.
+        """
+        return ancora + tick * agenda.intervalo + random.uniform(0, agenda.jitter)
+
+    def parar(self, *_):
+        """Pede o encerramento (seguro para usar como handler de sinal)"""
+        if not self._parar.is_set():
+            metricas.log.info('daemon_parando', "🛑 Encerrando após o ciclo atual...")
+        self._parar.set()
+
+    def executar(self):
+        """Laço principal: espera o próximo prazo e dispara o ciclo"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.parar)
+            signal.signal(signal.SIGTERM, self.parar)
+
+        # Processo que fica no ar: a atualização em segundo plano do
+        # cache tem tempo de terminar, então vale servir o vencido
+        cache_padrao.servir_vencido = True
+
+        ancora = time.monotonic()
+        proximo_relatorio = ancora + self.intervalo_relatorio
+        proxima_recarga = ancora + self.intervalo_recarga
+
+        # Fila: (prazo, par, tick)
+        fila = [(self._prazo(agenda, ancora, 0), par, 0) for par, agenda in self.agendas.items()]
+        heapq.heapify(fila)
+
+        metricas.log.info('daemon_iniciado', "🕰️ Daemon iniciado",
+                          pares=len(self.agendas), intervalo_relatorio=self.intervalo_relatorio)
+
+        # METRICAS_PORTA → /metrics no ar; METRICAS_ARQUIVO → gravado a cada relatório
+        metricas.ativar_exportacao()
+
+        # Escritas que o Sheets/Trello não aceitaram são reenviadas em lote
+        caixa_saida.iniciar_reenvio()
+
+        try:
+            while not self._parar.is_set():
+                agora = time.monotonic()
+
+                if agora >= proximo_relatorio:
+                    self.registrar_relatorio()
+                    proximo_relatorio += self.intervalo_relatorio
+
+                if agora >= proxima_recarga:
+                    self._recarregar_config(fila, ancora, agora)
+                    proxima_recarga = agora + self.intervalo_recarga
+
+                espera = fila[0][0] - agora
+                if espera > 0:
+                    self._parar.wait(min(espera, proximo_relatorio - agora, proxima_recarga - agora))
+                    continue
+
+                # Junta todos os pares vencidos para buscar em lote
+                vencidos = []
+                while fila and fila[0][0] <= agora:
+                    prazo, par, tick = heapq.heappop(fila)
+                    self.atrasos.append(agora - prazo)
+                    vencidos.append(par)
+
+                    agenda = self.agendas[par]
+                    proximo_tick = tick + 1
+
+                    # Atrasou mais que um intervalo? Pula os ticks perdidos
+                    # (em vez de disparar vários ciclos seguidos para "compensar")
+                    em_dia = int((agora - ancora) // agenda.intervalo) + 1
+                    if em_dia > proximo_tick:
+                        self.contadores['ticks_perdidos'] += em_dia - proximo_tick
+                        proximo_tick = em_dia
+
+                    heapq.heappush(fila, (self._prazo(agenda, ancora, proximo_tick), par, proximo_tick))
+
+                self._disparar(vencidos)
+        finally:
+            self._encerrar()
+
+    def _recarregar_config(self, fila, ancora, agora):
+        """
+        Relê a configuração se o arquivo/.env mudou (entre dois disparos)
+
+        - Planilha e regras: o próximo ciclo já usa as novas (o código lê
+          obter_config() a cada uso; o motor de regras é refeito)
+        - Credenciais/endereço do Trello: o gancho em integracao_completa
+          troca a fila (a antiga termina o que tinha, com as credenciais
+          antigas) e, se a lista mudou, zera o índice de cards
+        - O ciclo em andamento termina com a configuração que já pegou
+        - Pares e intervalos (só se vieram da configuração): par novo ou
+          com intervalo novo entra na hora; os outros seguem a agenda
+        """
+        antiga = obter_config()
+        nova = recarregar_se_mudou()
+        if nova is antiga or not self.agendas_da_config or nova.pares == antiga.pares:
+            return
+
+        try:
+            novas = {agenda.par: agenda for agenda in (AgendaPar(*par) for par in nova.pares)}
+        except ValueError as erro:
+            metricas.log.aviso('agenda_invalida', "⚠️ Pares inválidos na configuração, mantendo os atuais",
+                               erro=str(erro))
+            return
+        if not novas:
+            metricas.log.aviso('agenda_vazia', "⚠️ Configuração sem pares, mantendo os atuais")
+            return
+
+        mantidas = []
+        for prazo, par, tick in fila:
+            anterior, agenda = self.agendas[par], novas.get(par)
+            if agenda and (agenda.intervalo, agenda.jitter) == (anterior.intervalo, anterior.jitter):
+                mantidas.append((prazo, par, tick))
+        na_fila = {par for _, par, _ in mantidas}
+        for par, agenda in novas.items():
+            if par not in na_fila:
+                # Tick "atual": dispara agora e depois segue alinhado à âncora
+                mantidas.append((agora, par, int((agora - ancora) // agenda.intervalo)))
+
+        fila[:] = mantidas
+        heapq.heapify(fila)
+        metricas.log.info('agenda_recarregada', "🔄 Pares atualizados pela configuração",
+                          pares=len(novas), novos=sorted(set(novas) - set(self.agendas)),
+                          removidos=sorted(set(self.agendas) - set(novas)))
+        self.agendas = novas
+
+    def _disparar(self, pares):
+        """Roda o ciclo numa thread; se o anterior ainda roda, pula"""
+        if not self._trava_ciclo.acquire(blocking=False):
+            self.contadores['sobrepostos'] += 1
+            metricas.log.aviso('ciclo_sobreposto', "⏭️ Ciclo anterior ainda rodando, pulando",
+                               pares=len(pares), sobrepostos=self.contadores['sobrepostos'])
+            return
+
+        self._ciclo_atual = threading.Thread(target=self._rodar_ciclo, args=(pares,), daemon=True)
+        self._ciclo_atual.start()
+
+    def _rodar_ciclo(self, pares):
+        inicio = time.monotonic()
+        try:
+            with metricas.cronometrar('ciclo'):
+                self.processar(pares)
+        except Exception as e:
+            self.contadores['erros'] += 1
+            metricas.log.erro('ciclo_falhou', "❌ Erro no ciclo", erro=str(e), pares=pares)
+        finally:
+            self.duracoes.append(time.monotonic() - inicio)
+            self.contadores['ciclos'] += 1
+            self._trava_ciclo.release()
+
+    def _encerrar(self):
+        """Espera o ciclo atual e envia tudo que está pendente"""
+        if self._ciclo_atual is not None:
+            self._ciclo_atual.join()
+
+        # Um destino que estourou o prazo do ciclo ainda pode estar
+        # rodando: só depois dele o buffer do Sheets e a fila ficam completos
+        destinos.fechar(esperar=True)
+
+        caixa_saida.parar_reenvio()
+        fechar_escritores()
+        fechar_fila()
+        cache_padrao.salvar_snapshot()
+
+        self.registrar_relatorio()
+        metricas.log.info('daemon_encerrado', "👋 Daemon encerrado")
+
+    # ----------------------------------------
+    # Relatório
+    # ----------------------------------------
+
+    def relatorio(self):
+        """Distribuição dos atrasos de tick e das durações (ms)"""
+        atrasos = list(self.atrasos)
+        duracoes = list(self.duracoes)
+
+        return {
+            **self.contadores,
+            'atraso_p50_ms': percentil(atrasos, 50) * 1000,
+            'atraso_p90_ms': percentil(atrasos, 90) * 1000,
+            'atraso_p99_ms': percentil(atrasos, 99) * 1000,
+            'atraso_max_ms': max(atrasos, default=0.0) * 1000,
+            'duracao_p50_ms': percentil(duracoes, 50) * 1000,
+            'duracao_p99_ms': percentil(duracoes, 99) * 1000,
+        }
+
+    def registrar_relatorio(self):
+        """
+        Registra no log estruturado os atrasos, durações e o estado
+        da fila do Trello, da caixa de saída e dos disjuntores
+        """
+        campos = {chave: round(valor, 1) if isinstance(valor, float) else valor
+                  for chave, valor in self.relatorio().items()}
+
+        fila = estatisticas_fila()
+        if fila:
+            campos.update({
+                'trello_enviados': fila['enviados'],
+                'trello_fila': fila['profundidade'],
+                'trello_coalescidos': fila['coalescidos'],
+                'trello_descartados': fila['descartados'],
+                'trello_429': fila['respostas_429'],
+            })
+
+        mudancas = detector_mudancas.resumo()
+        avaliadas = mudancas['novas'] + mudancas['repetidas'] + mudancas['heartbeats']
+        if avaliadas:
+            campos['sem_mudanca'] = avaliadas - mudancas['novas']
+            campos['avaliadas'] = avaliadas
+            campos['escritas_suprimidas'] = round(mudancas['taxa_suprimida'], 3)
+
+        recentes = historico_recente.estatisticas()
+        if recentes['pares']:
+            campos['recentes_cotacoes'] = recentes['cotacoes']
+            campos['recentes_pares'] = recentes['pares']
+            campos['recentes_kb'] = round(recentes['bytes'] / 1024)
+
+        campos['caixa_saida_pendentes'] = caixa_saida.pendentes()
+
+        metricas.log.info('daemon_relatorio', "📈 Relatório do daemon", **campos)
+
+        for host, resumo in estado_disjuntores().items():
+            metricas.log.info('disjuntor_estado', "🛡️ Estado do disjuntor", host=host, **resumo)
+
+        metricas.salvar_em_arquivo()
+
+
+def main(argumentos=None):
+    """Lê os pares da linha de comando e inicia o daemon"""
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    try:
+        if argumentos:
+            agendas = [AgendaPar.de_texto(texto) for texto in argumentos]
+        else:
+            # Sem pares na linha de comando: os da configuração (recarregados)
+            agendas = [AgendaPar(*par) for par in obter_config().pares]
+    except ValueError as erro:
+        raise SystemExit(f"❌ {erro}")
+
+    MonitorDaemon(agendas or [AgendaPar('USD-BRL')], agendas_da_config=not argumentos).executar()
+
+
+if __name__ == "__main__":
+    main()
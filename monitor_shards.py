@@ -0,0 +1,506 @@
+"""
+🧩 MONITOR EM VÁRIOS PROCESSOS (shards por hash consistente)
+=============================================================
+
+OBJETIVO:
+- Centenas de pares consultados a cada poucos segundos não cabem num
+  processo só: ler o JSON, converter e avaliar regras disputa o GIL
+- Os pares são divididos entre N processos "trabalhadores"
+- Cada trabalhador busca, converte e avalia as regras dos SEUS pares
+- Só as cotações novas voltam para o processo principal, que escreve
+  tudo num único ponto (Sheets em lote, alertas, caixa de saída)
+
+COMO FUNCIONA:
+1. Anel de hash consistente: cada par cai sempre no MESMO trabalhador
+   (o estado "valor anterior" das regras fica certo dentro dele)
+2. Mudar o número de trabalhadores move só ~1/N dos pares
+   (com par % N quase todos trocariam de processo)
+3. O supervisor confere os trabalhadores a cada segundo: morreu →
+   sobe outro com os mesmos pares
+4. Um único "escoador" no processo principal junta o que chega dos
+   trabalhadores em lotes e chama gravar_lote()
+
+NOVOS CONCEITOS:
+- multiprocessing (um GIL por processo), contexto 'spawn'
+- hash consistente (anel com nós virtuais + bisect)
+
+USO:
+    python monitor_shards.py 4 USD-BRL:10 EUR-BRL:10 ...
+    python cli.py monitor --daemon USD-BRL:10 EUR-BRL:10 --trabalhadores 4
+    (número de trabalhadores, depois par:intervalo:jitter como no daemon)
+
+📏 MEDIDO (python monitor_shards.py: 400 pares, AwesomeAPI fake com
+20ms de latência, máquina com 1 CPU):
+- 1 trabalhador: ~1.760 cotações/s | 2: ~2.950 (1,7x) | 4: ~4.760 (2,7x)
+  | 8: ~5.170 (2,9x, mesmo com um trabalhador derrubado no meio)
+- Com 1 CPU o ganho vem de esperar a rede em paralelo; com mais
+  núcleos a conversão e as regras também rodam em paralelo
+- 4 → 5 trabalhadores: 19% dos pares mudam de processo (par % N: 80%)
+
+⚠️ CUIDADO: a configuração é lida UMA vez, na subida. Cada trabalhador
+recebe uma cópia (pickle) no spawn e avalia as regras com ela; aqui não
+há recarga a quente como no monitor_daemon.py. Mudou pares, regras ou
+credenciais → reinicie o monitor.
+"""
+
+import bisect
+import hashlib
+import multiprocessing
+import queue
+import random
+import signal
+import sqlite3
+import sys
+import threading
+import time
+
+from metricas import log
+
+TRABALHADORES_PADRAO = 4
+
+# Nós virtuais por trabalhador no anel (mais nós = divisão mais uniforme)
+REPLICAS_PADRAO = 100
+
+# Escoador: grava quando juntar isso de cotações... ou quando passar o prazo
+TAMANHO_LOTE_ESCOADOR = 500
+PRAZO_LOTE_ESCOADOR = 0.5
+
+# Tempo mínimo entre dois reinícios do mesmo trabalhador
+ESPERA_REINICIO = 1.0
+
+
+# ============================================
+# 🔵 HASH CONSISTENTE
+# ============================================
+
+def _posicao(texto):
+    """
+    Posição no anel (estável entre processos)
+
+    ⚠️ CUIDADO: hash() do Python muda a cada processo (PYTHONHASHSEED);
+    aqui precisa ser o mesmo em todo lugar, então usamos md5
+    """
+    return int.from_bytes(hashlib.md5(texto.encode()).digest()[:8], 'big')
+
+
+class AnelHash:
+    """
+    Distribui chaves (pares) entre nós (trabalhadores)
+
+    PARÂMETROS:
+    - nos: identificadores dos nós (ex: range(4))
+    - replicas: nós virtuais por nó
+    """
+
+    def __init__(self, nos, replicas=REPLICAS_PADRAO):
+        pontos = sorted(
+            (_posicao(f"{no}#{replica}"), no)
+            for no in nos for replica in range(replicas)
+        )
+        self._posicoes = [posicao for posicao, _ in pontos]
+        self._nos = [no for _, no in pontos]
+
+    def no_de(self, chave):
+        """Primeiro nó no sentido horário a partir da posição da chave"""
+        indice = bisect.bisect(self._posicoes, _posicao(chave)) % len(self._posicoes)
+        return self._nos[indice]
+
+    def distribuir(self, chaves):
+        """dict {nó: [chaves]} (nós sem chave não aparecem)"""
+        shards = {}
+        for chave in chaves:
+            shards.setdefault(self.no_de(chave), []).append(chave)
+        return shards
+
+
+# ============================================
+# 👷 TRABALHADOR (roda em outro processo)
+# ============================================
+
+def _trabalhar(indice, agendas, resultados, parar, url_base=None, config=None):
+    """
+    Laço de um trabalhador: busca os pares vencidos, converte, filtra
+    repetidas e avalia as regras; manda UMA mensagem por ciclo
+
+    PARÂMETROS:
+    - agendas: lista de (par, intervalo, jitter)
+    - resultados: multiprocessing.Queue → (indice, consultadas, [(Cotacao, regras)])
+    - parar: multiprocessing.Event
+    - config: Configuracao do supervisor (None = ler aqui)
+
+    💡 DICA: a agenda é a mesma do monitor_daemon (âncora + tick * intervalo,
+    sem deriva), simplificada para um processo sem threads
+    """
+    # Quem para é o supervisor (via `parar`): Ctrl+C no terminal não derruba o trabalhador
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import configuracao
+    import cotacao_moedas
+    from cotacoes_recentes import Cotacao
+    from mudancas_cotacao import DetectorMudancas
+
+    if url_base:
+        cotacao_moedas.URL_BASE_AWESOMEAPI = url_base
+
+    motor = (config or configuracao.obter()).criar_motor()
+    # Cada par só existe neste processo: o estado em memória basta
+    # (depois de um reinício, o detector do supervisor segura as repetidas)
+    detector = DetectorMudancas(':memory:', heartbeat=None)
+
+    ancora = time.monotonic()
+    proximos = {par: [ancora, 0, intervalo, jitter] for par, intervalo, jitter in agendas}
+
+    while not parar.is_set():
+        agora = time.monotonic()
+        vencidos = [par for par, (prazo, *_) in proximos.items() if prazo <= agora]
+
+        if vencidos:
+            cotacoes = cotacao_moedas.buscar_cotacoes(vencidos)
+            lote = []
+            for bruto in cotacoes.values():
+                cotacao = Cotacao.da_api(bruto)
+                if detector.avaliar(cotacao) != 'nova':
+                    continue
+                lote.append((cotacao, motor.avaliar(cotacao.par, cotacao.valor, cotacao.variacao)))
+            resultados.put((indice, len(cotacoes), lote))
+
+            agora = time.monotonic()
+            for par in vencidos:
+                agenda = proximos[par]
+                prazo, tick, intervalo, jitter = agenda
+                tick += 1
+                if intervalo:
+                    # Pula ticks perdidos em vez de "compensar" com rajadas
+                    tick = max(tick, int((agora - ancora) // intervalo) + 1)
+                agenda[0] = ancora + tick * intervalo + random.uniform(0, jitter)
+                agenda[1] = tick
+
+        espera = min(prazo for prazo, *_ in proximos.values()) - time.monotonic()
+        if espera > 0:
+            parar.wait(espera)
+
+
+# ============================================
+# 📥 ESCOADOR (um único ponto de escrita)
+# ============================================
+
+def gravar_lote(itens):
+    """
+    Destino padrão do escoador: o mesmo caminho do daemon
+
+    - Histórico local: o lote inteiro numa transação (só este processo
+      escreve no SQLite; os trabalhadores não gravam)
+    - detector_padrao (persistente) descarta o que já foi enviado
+    - Sheets: salvar_no_sheets só enche o buffer → append_rows em lote
+    - Alertas: as regras já vieram avaliadas do trabalhador
+    """
+    from cotacoes_recentes import historico_recente
+    from historico_cotacoes import historico_padrao
+    from integracao_completa import alertar_por_regras, salvar_no_sheets
+    from mudancas_cotacao import detector_padrao
+
+    try:
+        historico_padrao.gravar_linhas([
+            (cotacao.par, int(cotacao.ts), cotacao.valor, None, cotacao.variacao)
+            for cotacao, _ in itens
+        ])
+    except sqlite3.Error as e:
+        log.aviso('historico_falhou', "⚠️ Não foi possível gravar o histórico", erro=str(e))
+
+    for cotacao, disparadas in itens:
+        if detector_padrao.avaliar(cotacao) != 'nova':
+            continue
+        historico_recente.registrar(cotacao)
+        salvar_no_sheets(cotacao)
+        alertar_por_regras(cotacao, disparadas)
+
+
+# ============================================
+# 🧑‍✈️ SUPERVISOR
+# ============================================
+
+class SupervisorShards:
+    """
+    Sobe os trabalhadores, reinicia os que caem e escoa os resultados
+
+    PARÂMETROS:
+    - agendas: lista de (par, intervalo, jitter) — ou AgendaPar do daemon
+    - trabalhadores: número de processos
+    - gravar: função(lista de (Cotacao, regras)) chamada pelo escoador
+    - url_base: AwesomeAPI alternativa (servidor fake nos testes)
+    - config: Configuracao passada aos trabalhadores (regras, limite do dólar);
+              copiada no spawn, não é recarregada (ver o topo do arquivo)
+    """
+
+    def __init__(self, agendas, trabalhadores=TRABALHADORES_PADRAO, gravar=gravar_lote,
+                 url_base=None, config=None,
+                 tamanho_lote=TAMANHO_LOTE_ESCOADOR, prazo_lote=PRAZO_LOTE_ESCOADOR):
+        agendas = [
+            (agenda.par, agenda.intervalo, agenda.jitter) if hasattr(agenda, 'par') else tuple(agenda)
+            for agenda in agendas
+        ]
+        por_par = {agenda[0]: agenda for agenda in agendas}
+        anel = AnelHash(range(trabalhadores))
+        self.shards = {
+            indice: [por_par[par] for par in pares]
+            for indice, pares in anel.distribuir(por_par).items()
+        }
+
+        self.gravar = gravar
+        self.url_base = url_base
+        self.config = config
+        self.tamanho_lote = tamanho_lote
+        self.prazo_lote = prazo_lote
+
+        # 'spawn': processo limpo (sem herdar threads, sockets e sessões HTTP)
+        self._contexto = multiprocessing.get_context('spawn')
+        self._resultados = self._contexto.Queue()
+        self._parar_trabalhadores = self._contexto.Event()
+        self._parar = threading.Event()
+        self._processos = {}
+        self._iniciado_em = {}
+        self._threads = []
+
+        self.contadores = {'consultadas': 0, 'recebidas': 0, 'lotes': 0, 'reinicios': 0,
+                           'erros_gravacao': 0}
+        self._inicio = None
+
+    # ----------------------------------------
+    # Trabalhadores
+    # ----------------------------------------
+
+    def _subir(self, indice):
+        processo = self._contexto.Process(
+            target=_trabalhar, name=f"shard-{indice}", daemon=True,
+            args=(indice, self.shards[indice], self._resultados, self._parar_trabalhadores,
+                  self.url_base, self.config),
+        )
+        processo.start()
+        self._processos[indice] = processo
+        self._iniciado_em[indice] = time.monotonic()
+
+    def _vigiar(self):
+        """Reinicia trabalhadores que morreram (com os mesmos pares)"""
+        while not self._parar.wait(0.2):
+            for indice, processo in list(self._processos.items()):
+                # Encerrando: os trabalhadores saem de propósito
+                if processo.is_alive() or self._parar_trabalhadores.is_set():
+                    continue
+                if time.monotonic() - self._iniciado_em[indice] < ESPERA_REINICIO:
+                    continue
+                log.aviso('shard_reiniciado', "🔁 Trabalhador caiu, subindo de novo",
+                          shard=indice, codigo_saida=processo.exitcode,
+                          pares=len(self.shards[indice]))
+                self.contadores['reinicios'] += 1
+                self._subir(indice)
+
+    def matar(self, indice):
+        """Derruba um trabalhador (para testar o reinício)"""
+        self._processos[indice].kill()
+
+    # ----------------------------------------
+    # Escoador
+    # ----------------------------------------
+
+    def _escoar(self):
+        """Junta as mensagens dos trabalhadores e grava em lotes"""
+        lote = []
+        limite = time.monotonic() + self.prazo_lote
+
+        while True:
+            try:
+                _, consultadas, itens = self._resultados.get(timeout=0.05)
+                self.contadores['consultadas'] += consultadas
+                self.contadores['recebidas'] += len(itens)
+                lote.extend(itens)
+            except queue.Empty:
+                if self._parar.is_set():
+                    break
+
+            if len(lote) >= self.tamanho_lote or (lote and time.monotonic() >= limite):
+                self._gravar(lote)
+                lote = []
+                limite = time.monotonic() + self.prazo_lote
+
+        if lote:
+            self._gravar(lote)
+
+    def _gravar(self, lote):
+        self.contadores['lotes'] += 1
+        try:
+            self.gravar(lote)
+        except Exception as e:
+            self.contadores['erros_gravacao'] += 1
+            log.erro('shard_gravacao_falhou', "❌ Erro ao gravar lote", erro=str(e), cotacoes=len(lote))
+
+    # ----------------------------------------
+    # Ciclo de vida
+    # ----------------------------------------
+
+    def iniciar(self):
+        self._inicio = time.monotonic()
+        for indice in self.shards:
+            self._subir(indice)
+        self._threads = [
+            threading.Thread(target=self._escoar, daemon=True, name='shards-escoador'),
+            threading.Thread(target=self._vigiar, daemon=True, name='shards-vigia'),
+        ]
+        for thread in self._threads:
+            thread.start()
+        log.info('shards_iniciados', "🧩 Trabalhadores no ar", trabalhadores=len(self.shards),
+                 pares=sum(len(agendas) for agendas in self.shards.values()))
+
+    def parar(self, *_):
+        """Pede o encerramento (seguro para usar como handler de sinal)"""
+        self._parar_trabalhadores.set()
+
+    def encerrar(self, prazo=5.0):
+        """Para os trabalhadores e grava o que ainda estava a caminho"""
+        self._parar_trabalhadores.set()
+        # O escoador continua lendo enquanto eles terminam: um processo
+        # com mensagens na fila só sai depois que alguém as lê
+        for processo in self._processos.values():
+            processo.join(prazo)
+            if processo.is_alive():
+                processo.terminate()
+        self._parar.set()
+        for thread in self._threads:
+            thread.join()
+
+    def executar(self, duracao=None):
+        """Roda até Ctrl+C/SIGTERM (ou `duracao` segundos)"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.parar)
+            signal.signal(signal.SIGTERM, self.parar)
+
+        self.iniciar()
+        try:
+            self._parar_trabalhadores.wait(duracao)
+        finally:
+            self.encerrar()
+
+    def estatisticas(self):
+        decorrido = time.monotonic() - self._inicio if self._inicio else 0.0
+        return {
+            **self.contadores,
+            'trabalhadores': len(self.shards),
+            'vivos': sum(1 for processo in self._processos.values() if processo.is_alive()),
+            'consultadas_por_s': self.contadores['consultadas'] / decorrido if decorrido else 0.0,
+        }
+
+
+# ============================================
+# 📏 BENCHMARK: 1, 2, 4 e 8 trabalhadores
+# ============================================
+
+def fracao_movida(pares, antes, depois):
+    """Fração dos pares que muda de trabalhador ao passar de `antes` para `depois`"""
+    anel_antes, anel_depois = AnelHash(range(antes)), AnelHash(range(depois))
+    consistente = sum(anel_antes.no_de(par) != anel_depois.no_de(par) for par in pares)
+    modulo = sum(_posicao(par) % antes != _posicao(par) % depois for par in pares)
+    return consistente / len(pares), modulo / len(pares)
+
+
+def _servir_fake(latencia, endereco, parar):
+    """ServidorFake num processo à parte (o GIL dele não conta para o monitor)"""
+    from servidores_fake import ServidorFake
+
+    with ServidorFake(latencia=latencia) as servidor:
+        endereco.put(servidor.url)
+        parar.wait()
+
+
+def benchmark(pares=400, niveis=(1, 2, 4, 8), duracao=5.0, latencia=0.02):
+    """
+    Todos os pares com intervalo 0 (consulta sem parar) contra a
+    AwesomeAPI fake, com 1, 2, 4 e 8 trabalhadores
+
+    - A medida é cotações consultadas + convertidas + avaliadas por segundo
+    - No último nível um trabalhador é derrubado no meio: ele volta
+      sozinho e a vazão quase não sente
+
+    RETORNA:
+    - dict {trabalhadores: estatisticas()}
+    """
+    lista = [f"M{n:03d}-BRL" for n in range(pares)]
+    contexto = multiprocessing.get_context('spawn')
+    endereco, parar = contexto.Queue(), contexto.Event()
+    servidor = contexto.Process(target=_servir_fake, args=(latencia, endereco, parar), daemon=True)
+    servidor.start()
+    url = endereco.get(timeout=10)
+
+    def contar(itens):
+        pass
+
+    resultado = {}
+    try:
+        for trabalhadores in niveis:
+            supervisor = SupervisorShards([(par, 0, 0) for par in lista], trabalhadores,
+                                          gravar=contar, url_base=url)
+            supervisor.iniciar()
+            # A subida (spawn + imports) fica fora da medida
+            time.sleep(1.0)
+            supervisor.contadores['consultadas'] = 0
+            supervisor._inicio = time.monotonic()
+
+            if trabalhadores == niveis[-1]:
+                time.sleep(duracao / 2)
+                supervisor.matar(0)
+                time.sleep(duracao / 2)
+            else:
+                time.sleep(duracao)
+
+            resultado[trabalhadores] = supervisor.estatisticas()
+            supervisor.encerrar()
+    finally:
+        parar.set()
+        servidor.join(5)
+
+    return resultado
+
+
+def main(trabalhadores, argumentos):
+    """Lê os pares (par:intervalo:jitter) e roda o supervisor até Ctrl+C"""
+    from caixa_saida import caixa_padrao as caixa_saida
+    from configuracao import obter as obter_config
+    from escritor_sheets import fechar_escritores
+    from fila_trello import fechar_fila
+    from monitor_daemon import AgendaPar
+
+    config = obter_config()
+    # Sem pares na linha de comando: os da configuração
+    # (aqui intervalo 0 vale: o trabalhador consulta sem parar)
+    try:
+        agendas = ([AgendaPar.de_texto(texto, continuo=True) for texto in argumentos]
+                   or [AgendaPar(*par, continuo=True) for par in config.pares]
+                   or [AgendaPar('USD-BRL')])
+    except ValueError as erro:
+        raise SystemExit(f"❌ {erro}")
+    supervisor = SupervisorShards(agendas, trabalhadores, config=config)
+    caixa_saida.iniciar_reenvio()
+    supervisor.executar()
+
+    # O que o escoador deixou no buffer do Sheets e na fila do Trello
+    caixa_saida.parar_reenvio()
+    fechar_escritores()
+    fechar_fila()
+    r = supervisor.estatisticas()
+    r['consultadas_por_s'] = round(r['consultadas_por_s'], 1)
+    log.info('shards_encerrado', "🧩 Shards encerrados", **r)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]), sys.argv[2:])
+    else:
+        print("🧩 400 pares consultando sem parar, AwesomeAPI fake com 20ms de latência")
+        base = None
+        for trabalhadores, r in benchmark().items():
+            base = base or r['consultadas_por_s']
+            print(f"   {trabalhadores} trabalhador(es): {r['consultadas_por_s']:8,.0f} cotações/s "
+                  f"({r['consultadas_por_s'] / base:.1f}x) | reinícios: {r['reinicios']} | "
+                  f"vivos no fim: {r['vivos']}")
+
+        movida, modulo = fracao_movida([f"M{n:03d}-BRL" for n in range(400)], 4, 5)
+        print(f"   4 → 5 trabalhadores: {movida:.0%} dos pares mudam de processo "
+              f"(com par % N: {modulo:.0%})")
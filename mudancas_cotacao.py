@@ -0,0 +1,181 @@
+"""
+🔁 DETECÇÃO DE MUDANÇA (sem linhas repetidas na planilha)
+==========================================================
+
+OBJETIVO:
+- A AwesomeAPI só atualiza cada par de tempos em tempos; consultar mais
+  rápido que isso devolve a MESMA cotação
+- Antes, toda consulta virava uma linha no Sheets (e gastava cota)
+- Agora a cotação só segue para os destinos (Sheets, alertas...) se o
+  timestamp DA API ou o bid mudou desde a última enviada
+
+COMO FUNCIONA:
+- Guarda, por par, a assinatura (timestamp da API, bid) da última enviada
+- Mesma assinatura → 'repetida': nenhum destino é chamado
+- Opcional: um "heartbeat" a cada N segundos sem mudança (uma linha de
+  log + métrica, não uma escrita) para saber que o monitor está vivo
+- O estado fica num SQLite local: vale entre execuções do cron também
+
+USO:
+    resultado = detector_padrao.avaliar(cotacao)   # 'nova' | 'repetida' | 'heartbeat'
+    if resultado == 'nova':
+        destinos.executar(cotacao)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from metricas import log, registro
+
+ARQUIVO_PADRAO = os.getenv('MUDANCAS_DB', 'ultimas_cotacoes.db')
+
+# Segundos sem mudança entre dois heartbeats (None desliga)
+HEARTBEAT_PADRAO = 600
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ultimas_cotacoes (
+    par        TEXT PRIMARY KEY,
+    ts         REAL NOT NULL,
+    valor      REAL NOT NULL,
+    avisado_em REAL NOT NULL
+)
+"""
+
+
+class DetectorMudancas:
+    """
+    Decide se uma cotação é nova ou repetição da última enviada
+
+    PARÂMETROS:
+    - caminho: arquivo SQLite (':memory:' para testes)
+    - heartbeat: segundos sem mudança entre dois heartbeats (None desliga)
+    """
+
+    def __init__(self, caminho=ARQUIVO_PADRAO, heartbeat=HEARTBEAT_PADRAO):
+        self.caminho = caminho
+        self.heartbeat = heartbeat
+
+        self._conexao = None
+        self._ultimas = None      # par → [ts, valor, avisado_em]; carregado 1x
+        self._trava = threading.Lock()
+
+        self.contadores = {'novas': 0, 'repetidas': 0, 'heartbeats': 0}
+
+    def _carregar(self):
+        if self._ultimas is not None:
+            return
+        conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute(ESQUEMA)
+        self._conexao = conexao
+        self._ultimas = {
+            par: [ts, valor, avisado_em]
+            for par, ts, valor, avisado_em in conexao.execute("SELECT * FROM ultimas_cotacoes")
+        }
+
+    def _salvar(self, par):
+        with self._conexao:
+            self._conexao.execute("INSERT OR REPLACE INTO ultimas_cotacoes VALUES (?, ?, ?, ?)",
+                                  (par, *self._ultimas[par]))
+
+    def avaliar(self, cotacao, agora=None):
+        """
+        RETORNA:
+        - 'nova': mudou (ou primeira vez) → mandar para os destinos
+        - 'repetida': igual à última enviada → não escrever nada
+        - 'heartbeat': igual, mas já faz `heartbeat` segundos sem aviso
+        """
+        agora = time.time() if agora is None else agora
+        par, ts, valor = cotacao['par'], cotacao['ts'], cotacao['valor']
+
+        with self._trava:
+            self._carregar()
+            ultima = self._ultimas.get(par)
+
+            if ultima is None or ultima[0] != ts or ultima[1] != valor:
+                self._ultimas[par] = [ts, valor, agora]
+                self._salvar(par)
+                self.contadores['novas'] += 1
+                return 'nova'
+
+            if self.heartbeat is not None and agora - ultima[2] >= self.heartbeat:
+                ultima[2] = agora
+                self._salvar(par)
+                self.contadores['heartbeats'] += 1
+                resultado = 'heartbeat'
+            else:
+                self.contadores['repetidas'] += 1
+                resultado = 'repetida'
+
+        if resultado == 'heartbeat':
+            log.info('cotacao_sem_mudanca', "💓 Cotação sem mudança na API", par=par,
+                     valor=valor, ts_api=ts, parada_ha_s=round(agora - ts))
+        return resultado
+
+    def taxa_suprimida(self):
+        """Fração das cotações que NÃO viraram escrita (0-1)"""
+        total = sum(self.contadores.values())
+        return (total - self.contadores['novas']) / total if total else 0.0
+
+    def resumo(self):
+        return {**self.contadores, 'taxa_suprimida': self.taxa_suprimida()}
+
+
+# Detector compartilhado pelos scripts
+detector_padrao = DetectorMudancas()
+
+
+def _coletar_metricas():
+    """Cotações por resultado para o /metrics"""
+    return [
+        ('monitor_cotacoes_avaliadas_total', 'counter', "Cotações por resultado da detecção de mudança",
+         {'resultado': resultado}, quantidade)
+        for resultado, quantidade in detector_padrao.contadores.items()
+    ]
+
+
+registro.registrar_coletor(_coletar_metricas)
+
+
+# ============================================
+# 📏 DEMONSTRAÇÃO: consultando mais rápido que a API atualiza
+# ============================================
+
+def comparar_escritas(duracao=3.0, intervalo_consulta=0.1, atualizacao_api=1.0, pares=5):
+    """
+    Consulta o ServidorFake a cada `intervalo_consulta` s, mas a "API"
+    só muda a cada `atualizacao_api` s. Conta as escritas com e sem detector.
+    """
+    import cotacao_moedas
+    from cotacoes_recentes import Cotacao
+    from servidores_fake import ServidorFake
+
+    lista = [f"{moeda}-BRL" for moeda in ('USD', 'EUR', 'GBP', 'JPY', 'ARS')[:pares]]
+    detector = DetectorMudancas(':memory:', heartbeat=None)
+    sem_detector = com_detector = 0
+
+    original = cotacao_moedas.URL_BASE_AWESOMEAPI
+    with ServidorFake(atualizacao=atualizacao_api) as servidor:
+        cotacao_moedas.URL_BASE_AWESOMEAPI = servidor.url
+        try:
+            fim = time.monotonic() + duracao
+            while time.monotonic() < fim:
+                for bruto in cotacao_moedas.buscar_cotacoes(lista).values():
+                    sem_detector += 1
+                    if detector.avaliar(Cotacao.da_api(bruto)) == 'nova':
+                        com_detector += 1
+                time.sleep(intervalo_consulta)
+        finally:
+            cotacao_moedas.URL_BASE_AWESOMEAPI = original
+
+    return {'sem_detector': sem_detector, 'com_detector': com_detector, **detector.resumo()}
+
+
+if __name__ == "__main__":
+    r = comparar_escritas()
+    print("🔁 Consultas a cada 0.1s, API atualizando a cada 1s (5 pares, 3s)")
+    print(f"   Escritas sem detector: {r['sem_detector']}")
+    print(f"   Escritas com detector: {r['com_detector']}")
+    print(f"   Suprimidas: {r['taxa_suprimida']:.0%}")
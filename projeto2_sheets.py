@@ -17,11 +17,14 @@ PRÉ-REQUISITOS:
 - Ter o arquivo credentials.json na mesma pasta deste arquivo
 """
 
-import requests
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
 
+from cache_cotacoes import buscar_cotacoes_em_cache
+from conexao_sheets import obter_aba, obter_cliente
+from configuracao import obter as obter_config
+from escritor_sheets import chave_aba, fechar_escritores, obter_escritor
+from historico_cotacoes import ativar_gravacao
+
 # ============================================
 # 🔑 PARTE 1: AUTENTICAÇÃO COM GOOGLE SHEETS
 # ============================================
@@ -36,27 +39,16 @@ def conectar_google_sheets():
     3. Autoriza o acesso
     4. Retorna um cliente conectado
     
+    Os passos 1-3 ficam no conexao_sheets.py e rodam uma vez por processo
+    
     RETORNA:
     - client: Objeto para manipular planilhas
     """
     
-    # Define o escopo (quais permissões precisamos)
-    # spreadsheets = planilhas | drive = Google Drive
-    escopo = [
-        'https://spreadsheets.google.com/feeds',
-        'https://www.googleapis.com/auth/drive'
-    ]
-    
     try:
-        # Lê as credenciais do arquivo JSON
-        # Este arquivo tem a "identidade" do nosso bot
-        credenciais = ServiceAccountCredentials.from_json_keyfile_name(
-            'credentials.json',  # Nome do arquivo de credenciais
-            escopo               # Permissões necessárias
-        )
-        
-        # Autoriza e cria o cliente
-        client = gspread.authorize(credenciais)
+        # O gerenciador lê credentials.json e autoriza só na PRIMEIRA vez;
+        # depois devolve o mesmo cliente (e renova o token antes de expirar)
+        client = obter_cliente()
         
         print("✅ Conectado ao Google Sheets com sucesso!")
         return client
@@ -84,64 +76,98 @@ def buscar_cotacao_dolar():
     - None em caso de erro
     """
     
-    url = "https://economia.awesomeapi.com.br/json/last/USD-BRL"
-    
-    try:
-        resposta = requests.get(url, timeout=5)
-        resposta.raise_for_status()
-        
-        dados = resposta.json()
-        cotacao = float(dados['USDBRL']['bid'])
-        
-        # Retorna um dicionário com as informações
-        return {
-            'moeda': 'USD/BRL',
-            'valor': cotacao,
-            'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        }
-    
-    except requests.exceptions.RequestException as erro:
-        print(f"❌ Erro ao buscar cotação: {erro}")
+    # Usa a busca em lote do Projeto 1, com cache na frente
+    cotacoes = buscar_cotacoes_em_cache(['USD-BRL'])
+
+    if 'USD-BRL' not in cotacoes:
+        print("❌ Erro ao buscar cotação")
         return None
 
+    # Retorna um dicionário com as informações
+    return {
+        'moeda': 'USD/BRL',
+        'valor': cotacoes['USD-BRL']['bid'],
+        'data_hora': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    }
+
 
 # ============================================
 # 📊 PARTE 3: SALVAR NO GOOGLE SHEETS
 # ============================================
 
+# Cabeçalho das colunas: Data/Hora | Moeda | Cotação
+CABECALHO = ['Data/Hora', 'Moeda', 'Cotação']
+
+# Estado de cada aba, descoberto UMA vez por processo
+# chave (planilha, aba) → {'tem_cabecalho': bool}
+_estado_abas = {}
+
+
+def preparar_aba(aba, escritor):
+    """
+    Garante o cabeçalho sem baixar a planilha inteira
+    
+    POR QUÊ?
+    - get_all_values() baixa TODO o histórico só para saber se está vazio
+    - Com 100 mil linhas, cada escrita ficava mais lenta que a anterior
+    
+    COMO FUNCIONA:
+    1. Na primeira chamada: lê só a linha 1 (row_values(1))
+    2. Guarda o resultado em memória (_estado_abas)
+    3. append_rows() sempre escreve depois da última linha com dados,
+       então não é preciso saber quantas linhas a aba tem
+    
+    RETORNA:
+    - dict de estado da aba
+    """
+    chave = chave_aba(aba)
+    estado = _estado_abas.get(chave)
+    
+    if estado is None:
+        estado = {'tem_cabecalho': bool(aba.row_values(1))}
+        _estado_abas[chave] = estado
+    
+    if not estado['tem_cabecalho']:
+        # Se a planilha estiver vazia, cria o cabeçalho
+        escritor.adicionar(CABECALHO)
+        estado['tem_cabecalho'] = True
+        print("📋 Cabeçalho criado na planilha")
+    
+    return estado
+
+
 def salvar_cotacao_na_planilha(client, cotacao_info):
     """
     Salva a cotação em uma planilha do Google Sheets
     
     PARÂMETROS:
     - client: Cliente conectado ao Google Sheets
+      (mantido por compatibilidade: a aba vem do gerenciador de conexão)
     - cotacao_info: Dicionário com dados da cotação
     
     NOVO CONCEITO: append_row()
     - Adiciona uma nova linha no final da planilha
     - É como pressionar "Enter" e escrever na próxima linha
+    
+    OTIMIZAÇÃO: SheetsBatchWriter
+    - As linhas vão para um buffer e saem em lote com append_rows()
     """
     
-    # ⚠️ IMPORTANTE: Substitua pelo ID da sua planilha!
-    # Veja no arquivo SETUP_GOOGLE_SHEETS.md como copiar o ID
-    PLANILHA_ID = '1ENHCxP6I2uOsXuTEey6sb_VQ2vCQEFcQqvAayxBId5w'
+    # ⚠️ IMPORTANTE: o ID da sua planilha vai em PLANILHA_ID (.env)
+    # ou em monitor_config.json — veja SETUP_GOOGLE_SHEETS.md
     
     try:
-        # Abre a planilha pelo ID
-        planilha = client.open_by_key(PLANILHA_ID)
+        # Abre a planilha pelo ID e pega a primeira aba (worksheet)
+        # (o gerenciador guarda a aba aberta: sem buscar metadados de novo)
+        aba = obter_aba(obter_config().planilha_id)
         
-        # Pega a primeira aba (worksheet)
-        aba = planilha.sheet1
+        # Escritor em lote: as linhas vão para um buffer e são enviadas
+        # juntas com append_rows() (1 chamada de API para várias linhas)
+        escritor = obter_escritor(aba)
         
         # Verifica se é a primeira vez (cria cabeçalho)
-        # get_all_values() retorna todas as linhas da planilha
-        todas_linhas = aba.get_all_values()
-        
-        if len(todas_linhas) == 0:
-            # Se a planilha estiver vazia, cria o cabeçalho
-            cabecalho = ['Data/Hora', 'Moeda', 'Cotação']
-            aba.append_row(cabecalho)
-            print("📋 Cabeçalho criado na planilha")
+        # Lê só a linha 1, e só na primeira chamada do processo
+        preparar_aba(aba, escritor)
         
         # Prepara os dados para adicionar
         # A ordem deve seguir as colunas: Data/Hora | Moeda | Cotação
@@ -151,20 +177,23 @@ def salvar_cotacao_na_planilha(client, cotacao_info):
             cotacao_info['valor']
         ]
         
-        # Adiciona a linha na planilha
-        aba.append_row(nova_linha)
+        # Coloca a linha no buffer (o envio acontece no flush)
+        escritor.adicionar(nova_linha)
         
         print(f"✅ Cotação salva: {cotacao_info['moeda']} = R$ {cotacao_info['valor']}")
         print(f"   Horário: {cotacao_info['data_hora']}")
     
-    except gspread.exceptions.SpreadsheetNotFound:
-        print("❌ ERRO: Planilha não encontrada!")
-        print("   Verifique se:")
-        print("   1. O ID está correto")
-        print("   2. A planilha foi compartilhada com o email do bot")
-    
     except Exception as erro:
-        print(f"❌ Erro ao salvar na planilha: {erro}")
+        # gspread só é importado quando o Sheets é usado (conexao_sheets)
+        from gspread.exceptions import SpreadsheetNotFound
+        
+        if isinstance(erro, SpreadsheetNotFound):
+            print("❌ ERRO: Planilha não encontrada!")
+            print("   Verifique se:")
+            print("   1. O ID está correto")
+            print("   2. A planilha foi compartilhada com o email do bot")
+        else:
+            print(f"❌ Erro ao salvar na planilha: {erro}")
 
 
 # ============================================
@@ -186,6 +215,9 @@ def main():
     print("=" * 50)
     print()
     
+    # A cotação buscada também vai para o histórico local
+    ativar_gravacao()
+    
     # Passo 1: Conectar com Google Sheets
     print("📡 Conectando ao Google Sheets...")
     client = conectar_google_sheets()
@@ -211,6 +243,9 @@ def main():
     print("💾 Salvando na planilha...")
     salvar_cotacao_na_planilha(client, cotacao)
     
+    # Envia o que ficou no buffer antes de encerrar
+    fechar_escritores()
+    
     print()
     print("=" * 50)
     print("✅ Processo concluído!")
@@ -240,7 +275,8 @@ if __name__ == "__main__":
      * authorize() = conecta
      * open_by_key() = abre planilha por ID
      * append_row() = adiciona linha
-     * get_all_values() = lê tudo
+     * get_all_values() = lê tudo (⚠️ caro em planilhas grandes)
+     * row_values(1) = lê só a primeira linha
 
 3. OAUTH2CLIENT
    - Gerencia autenticação com Google
@@ -20,10 +20,11 @@ PRÉ-REQUISITOS:
 """
 
 import requests
-import os
-from dotenv import load_dotenv
 from datetime import datetime
 
+from configuracao import obter as obter_config
+from fila_trello import obter_fila
+
 # ============================================
 # 🔑 PARTE 1: CARREGAR CREDENCIAIS
 # ============================================
@@ -41,19 +42,12 @@ def carregar_credenciais():
     - dict com API_KEY, TOKEN, BOARD_ID, LIST_ID
     """
     
-    # Carrega variáveis do arquivo .env
-    load_dotenv()
-    
-    # Lê cada variável
-    credenciais = {
-        'api_key': os.getenv('TRELLO_API_KEY'),
-        'token': os.getenv('TRELLO_TOKEN'),
-        'board_id': os.getenv('TRELLO_BOARD_ID'),
-        'list_id': os.getenv('TRELLO_LIST_ID')
-    }
+    # O .env é lido UMA vez, junto com o resto da configuração
+    # (configuracao.py: variáveis de ambiente, .env e monitor_config.json)
+    credenciais = obter_config().credenciais_trello
     
     # Valida se todas foram encontradas
-    if not all(credenciais.values()):
+    if credenciais is None or not all(credenciais.values()):
         print("❌ ERRO: Credenciais faltando no arquivo .env")
         print("   Verifique se todas as variáveis estão definidas")
         return None
@@ -83,28 +77,14 @@ def criar_card_trello(nome, descricao, credenciais):
     - True se sucesso, False se erro
     """
     
-    # URL da API do Trello para criar cards
-    url = "https://api.trello.com/1/cards"
-    
-    # Parâmetros da requisição
-    # ⚠️ ATENÇÃO: POST usa 'data' ou 'json', não 'params'
-    parametros = {
-        'key': credenciais['api_key'],
-        'token': credenciais['token'],
-        'idList': credenciais['list_id'],  # Em qual lista criar
-        'name': nome,                       # Título do card
-        'desc': descricao                   # Descrição
-    }
+    # A fila monta os parâmetros (key, token, idList) a partir das
+    # credenciais e respeita o rate limit do Trello (e o Retry-After em caso de 429)
+    fila = obter_fila(credenciais, url_base=obter_config().url_base_trello)
     
     try:
         # POST request (diferente do GET que usamos antes!)
-        resposta = requests.post(url, params=parametros, timeout=10)
-        
-        # Verifica se deu certo
-        resposta.raise_for_status()
-        
-        # Pega dados do card criado
-        card_criado = resposta.json()
+        # O card entra na fila; result() espera ele ser criado
+        card_criado = fila.enviar(nome, descricao).result()
         
         print(f"✅ Card criado com sucesso!")
         print(f"   Título: {card_criado['name']}")
@@ -114,12 +94,17 @@ def criar_card_trello(nome, descricao, credenciais):
         
     except requests.exceptions.HTTPError as e:
         print(f"❌ Erro HTTP ao criar card: {e}")
-        print(f"   Resposta: {resposta.text}")
+        print(f"   Resposta: {e.response.text}")
         return False
     
     except requests.exceptions.RequestException as e:
         print(f"❌ Erro na requisição: {e}")
         return False
+    
+    except RuntimeError as e:
+        # Fila cheia: o card foi descartado
+        print(f"❌ {e}")
+        return False
 
 
 # ============================================
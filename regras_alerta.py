@@ -0,0 +1,318 @@
+"""
+📏 MOTOR DE REGRAS DE ALERTA
+=============================
+
+OBJETIVO:
+- Trocar o LIMITE_DOLAR fixo por MILHARES de regras configuráveis
+- Vários pares, vários tipos de regra:
+  * acima / abaixo de um valor
+  * variação (%) acima / abaixo de um valor
+  * faixa (dispara ao SAIR da faixa mínimo–máximo)
+- Só dispara regras cujo limite foi CRUZADO desde a última cotação
+
+COMO É RÁPIDO?
+- As regras de cada par ficam em listas ORDENADAS pelo limite
+- Com bisect (busca binária) achamos em O(log n) a fatia de limites
+  que fica entre o valor anterior e o novo
+- Não importa se são 10 ou 100 mil regras: não há laço por todas
+
+FORMATO DO ARQUIVO (JSON):
+    [
+      {"id": "dolar-alto", "par": "USD-BRL", "tipo": "acima", "limite": 5.50},
+      {"id": "euro-queda", "par": "EUR-BRL", "tipo": "variacao_abaixo", "limite": -2},
+      {"id": "libra-faixa", "par": "GBP-BRL", "tipo": "faixa", "minimo": 6.5, "maximo": 7.2}
+    ]
+"""
+
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+
+ARQUIVO_REGRAS = os.getenv('ARQUIVO_REGRAS', 'regras_alerta.json')
+
+# tipo → (campo da cotação, direção do cruzamento)
+TIPOS = {
+    'acima': ('valor', 'subida'),
+    'abaixo': ('valor', 'descida'),
+    'variacao_acima': ('variacao', 'subida'),
+    'variacao_abaixo': ('variacao', 'descida'),
+}
+
+
+class Regra:
+    """Uma regra de alerta (faixa vira duas: acima do máximo + abaixo do mínimo)"""
+
+    __slots__ = ('id', 'par', 'tipo', 'limite')
+
+    def __init__(self, id, par, tipo, limite):
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de regra desconhecido: {tipo}")
+        self.id = id
+        self.par = par
+        self.tipo = tipo
+        self.limite = float(limite)
+
+    def descrever(self):
+        """Texto curto para logs e cards"""
+        if self.tipo.startswith('variacao'):
+            sinal = '>' if self.tipo == 'variacao_acima' else '<'
+            return f"variação {sinal} {self.limite:.2f}%"
+        sinal = '>' if self.tipo == 'acima' else '<'
+        return f"valor {sinal} {self.limite:.4f}"
+
+    def __repr__(self):
+        return f"Regra({self.id!r}, {self.par!r}, {self.tipo!r}, {self.limite})"
+
+
+def regras_de_dict(dados):
+    """
+    Converte uma entrada do arquivo em uma ou mais Regra
+
+    'faixa' gera duas regras com o MESMO id (sair por cima ou por baixo)
+    """
+    from cotacao_moedas import normalizar_par
+
+    par = normalizar_par(dados['par'])
+    identificador = dados.get('id') or f"{par}:{dados['tipo']}:{dados.get('limite')}"
+
+    if dados['tipo'] == 'faixa':
+        return [
+            Regra(identificador, par, 'acima', dados['maximo']),
+            Regra(identificador, par, 'abaixo', dados['minimo']),
+        ]
+    return [Regra(identificador, par, dados['tipo'], dados['limite'])]
+
+
+class _IndiceOrdenado:
+    """Limites ordenados + regras na mesma ordem (listas paralelas)"""
+
+    __slots__ = ('limites', 'regras')
+
+    def __init__(self):
+        self.limites = []
+        self.regras = []
+
+    def adicionar(self, regra):
+        posicao = bisect_right(self.limites, regra.limite)
+        self.limites.insert(posicao, regra.limite)
+        self.regras.insert(posicao, regra)
+
+    def cruzadas_subindo(self, anterior, atual):
+        """Regras com anterior <= limite < atual"""
+        inicio = bisect_left(self.limites, anterior)
+        fim = bisect_left(self.limites, atual)
+        return self.regras[inicio:fim]
+
+    def cruzadas_descendo(self, anterior, atual):
+        """Regras com atual < limite <= anterior"""
+        inicio = bisect_right(self.limites, atual)
+        fim = bisect_right(self.limites, anterior)
+        return self.regras[inicio:fim]
+
+    def satisfeitas(self, atual, direcao):
+        """Sem valor anterior: todas as regras já satisfeitas"""
+        if direcao == 'subida':
+            return self.regras[:bisect_left(self.limites, atual)]
+        return self.regras[bisect_right(self.limites, atual):]
+
+
+class MotorRegras:
+    """
+    Índice de regras por par e avaliação por cruzamento de limite
+
+    USO:
+        motor = MotorRegras.de_arquivo('regras_alerta.json')
+        for regra in motor.avaliar('USD-BRL', valor=5.61, variacao=1.2):
+            criar_alerta_trello(cotacao, regra)
+    """
+
+    def __init__(self, regras=()):
+        # par → (campo, direção) → _IndiceOrdenado
+        self._indices = {}
+        # par → {campo: último valor visto}
+        self._anteriores = {}
+        self.total_regras = 0
+
+        for regra in regras:
+            self.adicionar(regra)
+
+    @classmethod
+    def de_arquivo(cls, caminho=ARQUIVO_REGRAS):
+        """Carrega as regras de um JSON (lista de dicts)"""
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        return cls(regra for item in dados for regra in regras_de_dict(item))
+
+    def adicionar(self, regra):
+        """Insere uma regra mantendo o índice ordenado"""
+        chave = TIPOS[regra.tipo]
+        indices = self._indices.setdefault(regra.par, {})
+        indices.setdefault(chave, _IndiceOrdenado()).adicionar(regra)
+        self.total_regras += 1
+
+    def regras(self):
+        """Todas as regras do motor (por par e tipo, não em ordem de cadastro)"""
+        for indices in self._indices.values():
+            for indice in indices.values():
+                yield from indice.regras
+
+    def carregar_em_massa(self, regras):
+        """
+        Adiciona muitas regras de uma vez
+
+        💡 DICA: inserir uma a uma em lista ordenada é O(n²);
+        aqui juntamos tudo e ordenamos uma vez só (O(n log n))
+        """
+        agrupadas = {}
+        for regra in regras:
+            chave = (regra.par, TIPOS[regra.tipo])
+            agrupadas.setdefault(chave, []).append(regra)
+
+        for (par, chave), novas in agrupadas.items():
+            indice = self._indices.setdefault(par, {}).setdefault(chave, _IndiceOrdenado())
+            todas = sorted(indice.regras + novas, key=lambda regra: regra.limite)
+            indice.regras = todas
+            indice.limites = [regra.limite for regra in todas]
+            self.total_regras += len(novas)
+
+    def avaliar(self, par, valor, variacao=None):
+        """
+        Devolve as regras do par cruzadas desde a cotação anterior
+
+        PARÂMETROS:
+        - valor: cotação atual (bid)
+        - variacao: variação % do dia (pctChange)
+
+        RETORNA:
+        - lista de Regra disparadas (vazia se nada cruzou)
+        """
+        indices = self._indices.get(par)
+        atuais = {'valor': valor, 'variacao': variacao}
+        anteriores = self._anteriores.setdefault(par, {})
+
+        disparadas = []
+        if indices:
+            for (campo, direcao), indice in indices.items():
+                atual = atuais[campo]
+                if atual is None:
+                    continue
+
+                anterior = anteriores.get(campo)
+                if anterior is None:
+                    disparadas.extend(indice.satisfeitas(atual, direcao))
+                elif direcao == 'subida' and atual > anterior:
+                    disparadas.extend(indice.cruzadas_subindo(anterior, atual))
+                elif direcao == 'descida' and atual < anterior:
+                    disparadas.extend(indice.cruzadas_descendo(anterior, atual))
+
+        for campo, atual in atuais.items():
+            if atual is not None:
+                anteriores[campo] = atual
+
+        return disparadas
+
+    def satisfeitas(self, par, valor, variacao=None):
+        """
+        Regras do par cuja condição vale AGORA (sem olhar o anterior)
+
+        Diferente de avaliar(), não muda nada: serve para mostrar o
+        estado da cotação (ex: coluna de status do Sheets) sem
+        atrapalhar a detecção de cruzamentos.
+        """
+        atuais = {'valor': valor, 'variacao': variacao}
+        regras = []
+        for (campo, direcao), indice in self._indices.get(par, {}).items():
+            if atuais[campo] is not None:
+                regras.extend(indice.satisfeitas(atuais[campo], direcao))
+        return regras
+
+
+def motor_padrao(limite_padrao=None):
+    """
+    Carrega o motor a partir de ARQUIVO_REGRAS
+
+    Sem arquivo, mantém o comportamento antigo: uma regra
+    "USD-BRL acima de limite_padrao" (o antigo LIMITE_DOLAR)
+    """
+    if os.path.exists(ARQUIVO_REGRAS):
+        return MotorRegras.de_arquivo(ARQUIVO_REGRAS)
+
+    regras = []
+    if limite_padrao is not None:
+        regras.append(Regra('limite-dolar', 'USD-BRL', 'acima', limite_padrao))
+    return MotorRegras(regras)
+
+
+# ============================================
+# 📏 BENCHMARK: índice vs varredura linear
+# ============================================
+
+def benchmark(quantidade_regras=100_000, quantidade_pares=100, cotacoes=100_000):
+    """
+    Compara o motor indexado com um laço que testa todas as regras
+
+    RETORNA:
+    - dict com microssegundos por cotação de cada abordagem
+    """
+    import random
+
+    gerador = random.Random(42)
+    pares = [f"M{indice:03d}-BRL" for indice in range(quantidade_pares)]
+
+    regras = [
+        Regra(f"r{indice}", gerador.choice(pares), gerador.choice(('acima', 'abaixo')),
+              gerador.uniform(4.0, 6.0))
+        for indice in range(quantidade_regras)
+    ]
+
+    inicio = time.perf_counter()
+    motor = MotorRegras()
+    motor.carregar_em_massa(regras)
+    tempo_carga = time.perf_counter() - inicio
+
+    # Passeio aleatório de preços para cada par
+    precos = {par: 5.0 for par in pares}
+    sequencia = []
+    for _ in range(cotacoes):
+        par = gerador.choice(pares)
+        precos[par] *= 1 + gerador.gauss(0, 0.002)
+        sequencia.append((par, precos[par]))
+
+    inicio = time.perf_counter()
+    disparos_motor = sum(len(motor.avaliar(par, valor)) for par, valor in sequencia)
+    tempo_motor = time.perf_counter() - inicio
+
+    # Varredura linear (só uma amostra, senão demora demais)
+    amostra = sequencia[:max(1, cotacoes // 100)]
+    anteriores = {}
+    inicio = time.perf_counter()
+    for par, valor in amostra:
+        anterior = anteriores.get(par)
+        for regra in regras:
+            if regra.par != par or anterior is None:
+                continue
+            if regra.tipo == 'acima' and anterior <= regra.limite < valor:
+                pass
+            elif regra.tipo == 'abaixo' and valor < regra.limite <= anterior:
+                pass
+        anteriores[par] = valor
+    tempo_linear = time.perf_counter() - inicio
+
+    return {
+        'regras': quantidade_regras,
+        'carga_s': tempo_carga,
+        'indexado_us': tempo_motor / len(sequencia) * 1e6,
+        'linear_us': tempo_linear / len(amostra) * 1e6,
+        'disparos': disparos_motor,
+    }
+
+
+if __name__ == "__main__":
+    print("📏 Motor de regras: 100 mil regras, 100 pares")
+    resultado = benchmark()
+    print(f"   Carga (ordenação):   {resultado['carga_s'] * 1000:.0f}ms")
+    print(f"   Indexado (bisect):   {resultado['indexado_us']:.2f}µs por cotação")
+    print(f"   Varredura linear:    {resultado['linear_us']:.0f}µs por cotação")
+    print(f"   🚀 {resultado['linear_us'] / resultado['indexado_us']:.0f}x mais rápido "
+          f"({resultado['disparos']} disparos)")
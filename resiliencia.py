@@ -0,0 +1,367 @@
+"""
+🛡️ RESILIÊNCIA: RETRY COM BACKOFF + CIRCUIT BREAKER
+====================================================
+
+OBJETIVO:
+- Uma falha passageira (rede piscou, 503) não pode perder a cotação
+  → tenta de novo, esperando cada vez mais (backoff exponencial + jitter)
+- Um serviço FORA DO AR não pode custar 10s de timeout a cada ciclo
+  → depois de N falhas seguidas o "disjuntor abre" e as chamadas
+    falham NA HORA, sem tocar na rede
+
+COMO FUNCIONA O DISJUNTOR (circuit breaker):
+- FECHADO:     tudo normal, as chamadas passam
+- ABERTO:      falhou demais → rejeita na hora (CircuitoAberto)
+- MEIO ABERTO: passou o tempo de espera → deixa UMA chamada testar
+               deu certo → FECHADO | falhou → ABERTO de novo
+
+💡 DICA: CircuitoAberto é uma requests.exceptions.RequestException,
+então os "except RequestException" que já existem tratam sem mudança.
+
+⚠️ CUIDADO: POST (criar card, adicionar linha) NÃO é idempotente.
+Repetir depois de um 500 pode duplicar o card/linha, então para esses
+métodos só repetimos erros em que o pedido certamente não foi
+processado (falha de conexão, 429).
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+import metricas
+
+# Métodos que podem ser repetidos sem efeito colateral
+METODOS_IDEMPOTENTES = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class CircuitoAberto(requests.exceptions.RequestException):
+    """O disjuntor do host está aberto: chamada rejeitada sem usar a rede"""
+
+
+def segundos_retry_after(valor, padrao=None):
+    """
+    Converte o cabeçalho Retry-After em segundos de espera
+
+    O servidor pode mandar segundos ('30') ou uma data HTTP
+    ('Wed, 21 Oct 2015 07:28:00 GMT'). Vazio ou inválido → padrao.
+    """
+    if not valor:
+        return padrao
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError, IndexError):
+        return padrao
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+
+
+class PoliticaRetry:
+    """
+    Quando e quanto esperar para tentar de novo
+
+    PARÂMETROS:
+    - tentativas: total de tentativas (1 = sem retry)
+    - espera_base / espera_maxima: backoff = base * 2^n, limitado ao máximo
+    - status_retry: códigos HTTP que valem nova tentativa
+    - status_nao_processado: códigos que garantem que o pedido NÃO foi
+      executado (podem ser repetidos até em POST)
+    """
+
+    def __init__(self, tentativas=3, espera_base=0.5, espera_maxima=8.0,
+                 status_retry=(429, 500, 502, 503, 504), status_nao_processado=(429,)):
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.status_retry = frozenset(status_retry)
+        self.status_nao_processado = frozenset(status_nao_processado)
+
+    def espera(self, tentativa, resposta=None):
+        """
+        Segundos antes da próxima tentativa
+
+        - Se o servidor mandou Retry-After, obedece (até o máximo)
+        - Senão "full jitter": sorteio entre 0 e base * 2^tentativa,
+          para vários clientes não voltarem todos no mesmo instante
+        """
+        if resposta is not None:
+            retry_after = segundos_retry_after(resposta.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.espera_maxima)
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+
+    def repetir_status(self, metodo, status):
+        if metodo in METODOS_IDEMPOTENTES:
+            return status in self.status_retry
+        return status in self.status_nao_processado
+
+    def repetir_erro(self, metodo, erro):
+        if isinstance(erro, CircuitoAberto):
+            return False
+        if metodo in METODOS_IDEMPOTENTES:
+            return isinstance(erro, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+        # POST: timeout de leitura pode ter sido processado → não repete
+        return isinstance(erro, requests.exceptions.ConnectionError)
+
+
+class Disjuntor:
+    """
+    Circuit breaker de um host
+
+    PARÂMETROS:
+    - limite_falhas: falhas SEGUIDAS para abrir
+    - tempo_aberto: segundos rejeitando antes de testar de novo
+    """
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio_aberto'
+
+    def __init__(self, nome, limite_falhas=5, tempo_aberto=30.0):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+
+        self.estado = self.FECHADO
+        self.falhas_seguidas = 0
+        self._aberto_em = 0.0
+        self._testando = False
+        self._trava = threading.Lock()
+
+        self.contadores = {'chamadas': 0, 'retries': 0, 'falhas': 0,
+                           'rejeitadas': 0, 'aberturas': 0}
+
+    def permitir(self):
+        """Levanta CircuitoAberto se a chamada não deve ir para a rede"""
+        with self._trava:
+            if self.estado == self.ABERTO:
+                if time.monotonic() - self._aberto_em < self.tempo_aberto:
+                    self.contadores['rejeitadas'] += 1
+                    raise CircuitoAberto(f"Circuito aberto para {self.nome} (falhando rápido)")
+                self.estado = self.MEIO_ABERTO
+                self._testando = False
+
+            if self.estado == self.MEIO_ABERTO:
+                # Só UMA chamada de teste por vez
+                if self._testando:
+                    self.contadores['rejeitadas'] += 1
+                    raise CircuitoAberto(f"Circuito de {self.nome} em teste (falhando rápido)")
+                self._testando = True
+
+            self.contadores['chamadas'] += 1
+
+    def sucesso(self):
+        with self._trava:
+            self.estado = self.FECHADO
+            self.falhas_seguidas = 0
+            self._testando = False
+
+    def falha(self):
+        with self._trava:
+            self.contadores['falhas'] += 1
+            self.falhas_seguidas += 1
+            self._testando = False
+
+            if self.estado == self.MEIO_ABERTO or self.falhas_seguidas >= self.limite_falhas:
+                if self.estado != self.ABERTO:
+                    self.contadores['aberturas'] += 1
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+    def contar_retry(self):
+        with self._trava:
+            self.contadores['retries'] += 1
+
+    def resumo(self):
+        with self._trava:
+            return {'estado': self.estado, 'falhas_seguidas': self.falhas_seguidas, **self.contadores}
+
+
+# ============================================
+# ⚙️ POLÍTICAS POR HOST
+# ============================================
+
+POLITICA_PADRAO = PoliticaRetry()
+
+# Para quem já repete por conta própria (ex: fila_trello): uma tentativa só
+SEM_RETRY = PoliticaRetry(tentativas=1)
+
+# Ajustes por host (mesma ideia do POOLS_POR_HOST do cliente_http)
+POLITICAS_POR_HOST = {
+    # Cotação: GET idempotente, pode repetir à vontade mas sem demorar
+    'economia.awesomeapi.com.br': PoliticaRetry(tentativas=3, espera_base=0.5, espera_maxima=4.0),
+    # Trello: o 429 é tratado pela fila_trello (Retry-After global)
+    'api.trello.com': PoliticaRetry(tentativas=3, espera_base=1.0, status_nao_processado=()),
+    # Sheets: vale para abrir planilha/aba; o append_rows do escritor_sheets
+    # roda com SEM_RETRY (ele mesmo repete o lote inteiro)
+    'sheets.googleapis.com': PoliticaRetry(tentativas=2, espera_base=1.0),
+}
+
+# Política trocada só na thread atual (ver usando_politica)
+_politica_da_thread = threading.local()
+
+
+@contextmanager
+def usando_politica(politica):
+    """
+    Troca a política de TODAS as requisições feitas nesta thread dentro do with
+
+    Serve para quem não chama o cliente_http direto (ex: gspread, que usa
+    a sessão compartilhada) e por isso não consegue passar politica=.
+
+    USO:
+        with resiliencia.usando_politica(resiliencia.SEM_RETRY):
+            aba.append_rows(linhas)
+    """
+    anterior = getattr(_politica_da_thread, 'politica', None)
+    _politica_da_thread.politica = politica
+    try:
+        yield politica
+    finally:
+        _politica_da_thread.politica = anterior
+
+# Parâmetros do disjuntor: (falhas seguidas para abrir, segundos aberto)
+DISJUNTOR_PADRAO = (5, 30.0)
+
+_disjuntores = {}
+_trava = threading.Lock()
+
+
+def obter_disjuntor(host):
+    """Devolve o disjuntor do host (criado sob demanda)"""
+    disjuntor = _disjuntores.get(host)
+    if disjuntor is not None:
+        return disjuntor
+
+    with _trava:
+        if host not in _disjuntores:
+            _disjuntores[host] = Disjuntor(host, *DISJUNTOR_PADRAO)
+        return _disjuntores[host]
+
+
+def executar(host, metodo, enviar, politica=None):
+    """
+    Roda `enviar()` (que faz UMA requisição) com retry + disjuntor
+
+    PARÂMETROS:
+    - host: chave da política e do disjuntor
+    - metodo: 'GET', 'POST'... (decide o que pode ser repetido)
+    - enviar: função sem argumentos que devolve a requests.Response
+    - politica: troca a política do host nesta chamada (ex: SEM_RETRY);
+                o disjuntor continua valendo. Sem ela, vale a de
+                usando_politica() e depois a do host
+
+    RETORNA:
+    - a Response da última tentativa (quem chama decide o raise_for_status)
+
+    LEVANTA:
+    - CircuitoAberto se o host está fora do ar
+    - a exceção de rede da última tentativa
+    """
+    metodo = metodo.upper()
+    if politica is None:
+        politica = getattr(_politica_da_thread, 'politica', None)
+    if politica is None:
+        politica = POLITICAS_POR_HOST.get(host, POLITICA_PADRAO)
+    disjuntor = obter_disjuntor(host)
+
+    for tentativa in range(politica.tentativas):
+        ultima = tentativa == politica.tentativas - 1
+        disjuntor.permitir()
+
+        try:
+            resposta = enviar()
+        except requests.exceptions.RequestException as erro:
+            disjuntor.falha()
+            if ultima or not politica.repetir_erro(metodo, erro):
+                raise
+            espera = politica.espera(tentativa)
+        else:
+            # 5xx conta como falha do serviço; 4xx (inclusive 429) não
+            if resposta.status_code >= 500:
+                disjuntor.falha()
+            else:
+                disjuntor.sucesso()
+
+            if ultima or not politica.repetir_status(metodo, resposta.status_code):
+                return resposta
+            espera = politica.espera(tentativa, resposta)
+            resposta.close()
+
+        disjuntor.contar_retry()
+        time.sleep(espera)
+
+
+def estado_disjuntores():
+    """dict {host: {'estado', 'falhas_seguidas', 'chamadas', 'retries', ...}}"""
+    with _trava:
+        disjuntores = list(_disjuntores.items())
+    return {host: disjuntor.resumo() for host, disjuntor in disjuntores}
+
+
+def imprimir_estado():
+    """Exibe o estado dos disjuntores de forma legível"""
+    icones = {Disjuntor.FECHADO: '🟢', Disjuntor.MEIO_ABERTO: '🟡', Disjuntor.ABERTO: '🔴'}
+    for host, resumo in estado_disjuntores().items():
+        print(
+            f"{icones[resumo['estado']]} {host}: {resumo['estado']} | "
+            f"{resumo['chamadas']} chamadas, {resumo['retries']} retries, "
+            f"{resumo['falhas']} falhas, {resumo['rejeitadas']} rejeitadas na hora"
+        )
+
+
+def _coletar_metricas():
+    """Estado dos disjuntores para o /metrics (lido só na exportação)"""
+    niveis = {Disjuntor.FECHADO: 0, Disjuntor.MEIO_ABERTO: 0.5, Disjuntor.ABERTO: 1}
+    amostras = []
+    for host, resumo in estado_disjuntores().items():
+        rotulos = {'host': host}
+        amostras += [
+            ('resiliencia_retries_total', 'counter', "Novas tentativas por host", rotulos, resumo['retries']),
+            ('resiliencia_falhas_total', 'counter', "Falhas (rede ou 5xx) por host", rotulos, resumo['falhas']),
+            ('resiliencia_rejeitadas_total', 'counter', "Chamadas rejeitadas com o disjuntor aberto",
+             rotulos, resumo['rejeitadas']),
+            ('resiliencia_disjuntor_estado', 'gauge', "0 = fechado, 0.5 = meio aberto, 1 = aberto",
+             rotulos, niveis[resumo['estado']]),
+        ]
+    return amostras
+
+
+metricas.registro.registrar_coletor(_coletar_metricas)
+
+
+def reiniciar_disjuntores():
+    """Esquece todo o estado (útil em testes e benchmarks)"""
+    with _trava:
+        _disjuntores.clear()
+
+
+if __name__ == "__main__":
+    import cliente_http
+    from servidores_fake import ServidorFake
+
+    # Servidor que some: conexão recusada em toda chamada
+    servidor = ServidorFake().iniciar()
+    url = f"{servidor.url}/json/last/USD-BRL"
+    servidor.parar()
+
+    print("🔌 Serviço fora do ar: 10 chamadas seguidas")
+    for numero in range(1, 11):
+        inicio = time.perf_counter()
+        try:
+            cliente_http.get(url, timeout=2)
+        except requests.exceptions.RequestException as erro:
+            tipo = type(erro).__name__
+        print(f"   #{numero:2d} {tipo:<16} {(time.perf_counter() - inicio) * 1000:7.1f}ms")
+
+    # Pelo cliente_http: este arquivo rodando como __main__ é outro módulo
+    cliente_http.imprimir_estatisticas()
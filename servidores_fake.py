@@ -0,0 +1,389 @@
+"""
+🧪 SERVIDORES FAKE (AwesomeAPI + Trello + Google Sheets)
+=========================================================
+
+OBJETIVO:
+- Rodar os scripts SEM depender das APIs reais
+- Medir desempenho de forma repetível (latência controlada)
+
+ENDPOINTS IMITADOS (nome da rota entre parênteses):
+- GET  /json/last/USD-BRL,EUR-BRL                      → AwesomeAPI (cotacoes)
+- GET  /json/daily/USD-BRL/360?start_date=&end_date=   → AwesomeAPI (cotacoes)
+- POST /1/cards                                        → Trello (trello)
+- PUT  /1/cards/<id>                                   → Trello (trello)
+- GET  /1/lists/<id>/cards                             → Trello (trello)
+- GET  /v4/spreadsheets/<id>/values/<intervalo>        → Sheets (sheets)
+- POST /v4/spreadsheets/<id>/values/<intervalo>:append → Sheets (sheets)
+
+FALHAS SIMULADAS (por rota):
+- taxa_erro: fração das requisições que recebe 503
+- limites: (requisições, janela) → acima disso, 429 com Retry-After
+
+USO:
+    with ServidorFake(latencia=0.05, taxa_erro={'trello': 0.1}) as servidor:
+        cotacao_moedas.URL_BASE_AWESOMEAPI = servidor.url
+        ...
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def gerar_cotacao(par, momento=None):
+    """
+    Monta uma cotação no mesmo formato (texto) da AwesomeAPI
+
+    - momento: epoch da "atualização" (None = agora, valor aleatório);
+      o mesmo momento sempre gera o mesmo bid
+    """
+    origem, destino = par.split('-')
+    base = 1 + (sum(map(ord, origem)) % 50) / 10
+    sorteio = random if momento is None else random.Random(f"{par}{momento}")
+    bid = base * (1 + sorteio.uniform(-0.01, 0.01))
+    momento = time.time() if momento is None else momento
+
+    return {
+        'code': origem,
+        'codein': destino,
+        'name': f"{origem}/{destino}",
+        'high': f"{bid * 1.01:.4f}",
+        'low': f"{bid * 0.99:.4f}",
+        'varBid': f"{bid - base:.4f}",
+        'pctChange': f"{(bid / base - 1) * 100:.2f}",
+        'bid': f"{bid:.4f}",
+        'ask': f"{bid * 1.001:.4f}",
+        'timestamp': str(int(momento)),
+        'create_date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(momento)),
+    }
+
+
+def gerar_diarias(par, dias, inicio=None, fim=None):
+    """
+    Histórico diário no formato de /json/daily (mais recente primeiro)
+
+    - Só dias úteis, como a API; o valor de cada dia é sempre o mesmo
+      (semente = par + data), então baixar de novo dá o mesmo resultado
+    - inicio/fim: 'AAAAMMDD' (sem eles: os últimos `dias` até hoje)
+    """
+    origem, destino = par.split('-')
+    base = 1 + (sum(map(ord, origem)) % 50) / 10
+
+    def ler_data(texto):
+        return datetime.strptime(texto, '%Y%m%d').replace(tzinfo=timezone.utc)
+
+    ultimo = ler_data(fim) if fim else datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    primeiro = ler_data(inicio) if inicio else ultimo - timedelta(days=dias)
+
+    itens = []
+    dia = ultimo
+    while dia >= primeiro and len(itens) < dias:
+        if dia.weekday() < 5:
+            sorteio = random.Random(f"{par}{dia:%Y%m%d}")
+            bid = base * (1 + sorteio.uniform(-0.05, 0.05))
+            itens.append({
+                'high': f"{bid * 1.01:.4f}",
+                'low': f"{bid * 0.99:.4f}",
+                'varBid': f"{bid - base:.4f}",
+                'pctChange': f"{(bid / base - 1) * 100:.2f}",
+                'bid': f"{bid:.4f}",
+                'ask': f"{bid * 1.001:.4f}",
+                'timestamp': str(int((dia + timedelta(hours=18)).timestamp())),
+            })
+        dia -= timedelta(days=1)
+
+    # A API só manda code/codein/name no primeiro item
+    if itens:
+        itens[0].update({'code': origem, 'codein': destino, 'name': f"{origem}/{destino}"})
+    return itens
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """Responde as rotas fake (uma instância por requisição)"""
+
+    # HTTP/1.1 = keep-alive, igual às APIs reais
+    protocol_version = 'HTTP/1.1'
+
+    # TCP_NODELAY: sem isso, cabeçalho e corpo saem em pacotes separados
+    # e o "delayed ACK" do TCP soma ~40ms a cada resposta
+    disable_nagle_algorithm = True
+
+    def log_message(self, formato, *args):
+        # Silencia o log padrão (uma linha por requisição atrapalha o benchmark)
+        pass
+
+    def _responder(self, status, corpo, cabecalhos=None):
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _parametros(self):
+        """Parâmetros da query string (o Trello recebe tudo por ali)"""
+        return {nome: valores[-1] for nome, valores in parse_qs(urlsplit(self.path).query).items()}
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if not tamanho:
+            return None
+        return json.loads(self.rfile.read(tamanho))
+
+    def _barrar(self, rota):
+        """Aplica erro aleatório e rate limit da rota (True = já respondeu)"""
+        servidor = self.server.fake
+
+        if servidor.sortear_erro(rota):
+            self._responder(503, {'erro': 'erro simulado'})
+            return True
+
+        espera = servidor.consumir_limite(rota)
+        if espera:
+            self._responder(429, {'erro': 'API_TOKEN_LIMIT_EXCEEDED'},
+                            {'Retry-After': f"{espera:.3f}"})
+            return True
+        return False
+
+    def do_GET(self):
+        servidor = self.server.fake
+        servidor.registrar(self.path)
+        time.sleep(servidor.latencia)
+
+        caminho = urlsplit(self.path).path
+
+        if caminho.startswith('/json/last/'):
+            if self._barrar('cotacoes'):
+                return
+            pares = caminho[len('/json/last/'):].split(',')
+            corpo = {par.replace('-', ''): servidor.cotacao(par) for par in pares}
+            self._responder(200, corpo)
+        elif caminho.startswith('/json/daily/'):
+            if self._barrar('cotacoes'):
+                return
+            par, _, dias = caminho[len('/json/daily/'):].partition('/')
+            consulta = parse_qs(urlsplit(self.path).query)
+            self._responder(200, gerar_diarias(
+                par, int(dias or 1),
+                consulta.get('start_date', [None])[0], consulta.get('end_date', [None])[0],
+            ))
+        elif caminho.startswith('/1/lists/') and caminho.endswith('/cards'):
+            if self._barrar('trello'):
+                return
+            lista = caminho.split('/')[3]
+            with servidor._trava:
+                abertos = [dict(card) for card in servidor.cards.values()
+                           if card['idList'] == lista and not card['closed']]
+            self._responder(200, abertos)
+        elif caminho.startswith('/v4/spreadsheets/') and '/values/' in caminho:
+            if self._barrar('sheets'):
+                return
+            intervalo = unquote(caminho.rsplit('/values/', 1)[1])
+            with servidor._trava:
+                primeira = list(servidor.linhas_sheets[:1])
+            self._responder(200, {'range': intervalo, 'majorDimension': 'ROWS', 'values': primeira})
+        else:
+            self._responder(404, {'erro': 'rota desconhecida'})
+
+    def do_POST(self):
+        servidor = self.server.fake
+        servidor.registrar(self.path)
+        time.sleep(servidor.latencia)
+
+        caminho = urlsplit(self.path).path
+        corpo = self._ler_corpo()
+
+        if caminho == '/1/cards':
+            if self._barrar('trello'):
+                return
+            parametros = self._parametros()
+            numero = servidor.proximo_id()
+            card = {
+                'id': f"card{numero}",
+                'name': parametros.get('name', f"card {numero}"),
+                'desc': parametros.get('desc', ''),
+                'idList': parametros.get('idList', ''),
+                'closed': False,
+                'url': f"{servidor.url}/c/card{numero}",
+            }
+            with servidor._trava:
+                servidor.cards[card['id']] = card
+            self._responder(200, card)
+        elif caminho.startswith('/v4/spreadsheets/') and caminho.endswith(':append'):
+            if self._barrar('sheets'):
+                return
+            linhas = (corpo or {}).get('values', [])
+            with servidor._trava:
+                servidor.linhas_sheets.extend(linhas)
+            self._responder(200, {'updates': {'updatedRows': len(linhas)}})
+        else:
+            self._responder(404, {'erro': 'rota desconhecida'})
+
+    def do_PUT(self):
+        servidor = self.server.fake
+        servidor.registrar(self.path)
+        time.sleep(servidor.latencia)
+
+        caminho = urlsplit(self.path).path
+        self._ler_corpo()
+
+        if caminho.startswith('/1/cards/'):
+            if self._barrar('trello'):
+                return
+            parametros = self._parametros()
+            with servidor._trava:
+                card = servidor.cards.get(caminho.split('/')[3])
+                if card is not None:
+                    for campo in ('name', 'desc', 'idList'):
+                        if campo in parametros:
+                            card[campo] = parametros[campo]
+                    if 'closed' in parametros:
+                        card['closed'] = parametros['closed'] == 'true'
+                    servidor.cards_atualizados += 1
+                    card = dict(card)
+            if card is None:
+                self._responder(404, {'erro': 'card não encontrado'})
+            else:
+                self._responder(200, card)
+        else:
+            self._responder(404, {'erro': 'rota desconhecida'})
+
+
+class ServidorFake:
+    """
+    Servidor HTTP local que imita AwesomeAPI, Trello e Sheets
+
+    PARÂMETROS:
+    - latencia: segundos de espera antes de cada resposta
+    - porta: 0 = o sistema escolhe uma porta livre
+    - taxa_erro: fração (0-1) de respostas 503; um número vale para
+      todas as rotas, ou dict {'cotacoes'|'trello'|'sheets': fração}
+    - limites: dict {rota: (requisições, janela_segundos)} → acima
+      disso, 429 com Retry-After (janela deslizante, como o Trello)
+    - limite_trello: atalho para limites={'trello': ...}
+    - semente: deixa o sorteio dos erros repetível
+    - atualizacao: segundos entre atualizações de cada par (como a API
+      real: consultas no meio do intervalo devolvem a MESMA cotação);
+      None = valor novo a cada consulta
+    """
+
+    ROTAS = ('cotacoes', 'trello', 'sheets')
+
+    def __init__(self, latencia=0.0, porta=0, taxa_erro=0.0, limites=None,
+                 limite_trello=None, semente=None, atualizacao=None):
+        self.latencia = latencia
+        self.atualizacao = atualizacao
+        if not isinstance(taxa_erro, dict):
+            taxa_erro = dict.fromkeys(self.ROTAS, taxa_erro)
+        self.taxa_erro = taxa_erro
+        self.limites = dict(limites or {})
+        if limite_trello:
+            self.limites['trello'] = limite_trello
+        self._janelas = {rota: deque() for rota in self.limites}   # horários aceitos
+        self._sorteio = random.Random(semente)
+        self.erros_simulados = dict.fromkeys(self.ROTAS, 0)
+        self.respostas_429 = dict.fromkeys(self.ROTAS, 0)
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', porta), _Manipulador)
+        self._http.daemon_threads = True
+        self._http.fake = self
+        self._thread = None
+        self._trava = threading.Lock()
+        self._contador_ids = 0
+
+        self.requisicoes = []
+        self.linhas_sheets = []
+        self.cards = {}               # id → card (o "board" do Trello)
+        self.cards_atualizados = 0
+
+    def cotacao(self, par):
+        """Cotação atual do par (fixa dentro de cada intervalo de atualização)"""
+        if not self.atualizacao:
+            return gerar_cotacao(par)
+        return gerar_cotacao(par, time.time() // self.atualizacao * self.atualizacao)
+
+    @property
+    def url(self):
+        host, porta = self._http.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def registrar(self, caminho):
+        with self._trava:
+            self.requisicoes.append(caminho)
+
+    def proximo_id(self):
+        with self._trava:
+            self._contador_ids += 1
+            return self._contador_ids
+
+    @property
+    def cards_criados(self):
+        return self._contador_ids
+
+    def sortear_erro(self, rota):
+        """True se esta requisição deve falhar (conforme taxa_erro)"""
+        taxa = self.taxa_erro.get(rota, 0.0)
+        if not taxa:
+            return False
+        with self._trava:
+            falhar = self._sorteio.random() < taxa
+            if falhar:
+                self.erros_simulados[rota] += 1
+        return falhar
+
+    def consumir_limite(self, rota):
+        """
+        Janela deslizante do rate limit da rota
+
+        RETORNA:
+        - 0 se a requisição pode passar, senão os segundos até liberar
+        """
+        limite = self.limites.get(rota)
+        if not limite:
+            return 0
+        maximo, janela = limite
+        agora = time.monotonic()
+
+        with self._trava:
+            aceitas = self._janelas[rota]
+            while aceitas and agora - aceitas[0] >= janela:
+                aceitas.popleft()
+            if len(aceitas) >= maximo:
+                self.respostas_429[rota] += 1
+                return aceitas[0] + janela - agora
+            aceitas.append(agora)
+            return 0
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *erro):
+        self.parar()
+
+
+if __name__ == "__main__":
+    with ServidorFake() as servidor:
+        print(f"🧪 Servidor fake rodando em {servidor.url}")
+        print("   Ctrl+C para parar")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,24 @@
+"""
+🧪 CONFIGURAÇÃO DOS TESTES
+===========================
+
+- Os módulos ficam na raiz do repositório: ela entra no sys.path
+- Os bancos SQLite (histórico, caixa de saída, estado dos alertas...)
+  vão para uma pasta temporária, nunca para a pasta do projeto
+
+USO:
+    python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+_PASTA_BANCOS = tempfile.mkdtemp(prefix='monitor-testes-')
+for _variavel in ('HISTORICO_DB', 'MUDANCAS_DB', 'ESTADO_ALERTAS_DB',
+                  'CAIXA_SAIDA_DB', 'INDICE_CARDS_DB'):
+    os.environ.setdefault(_variavel, os.path.join(_PASTA_BANCOS, _variavel.lower() + '.db'))
@@ -0,0 +1,100 @@
+"""
+🧪 ESTADO DOS ALERTAS: COOLDOWN, HISTERESE, ESCALADA E PODA
+============================================================
+
+Regra "acima de 5.00", cooldown de 100s, histerese de 1% (rearma
+abaixo de 4.95) e um nível de escalada a cada 2% além do limite.
+"""
+
+import pytest
+
+from estado_alertas import EstadoAlertas
+from regras_alerta import Regra
+
+PAR = 'USD-BRL'
+
+
+@pytest.fixture
+def estado():
+    return EstadoAlertas(':memory:', cooldown=100, histerese_pct=1.0, passo_escalada_pct=2.0)
+
+
+@pytest.fixture
+def regra():
+    return Regra('dolar-alto', PAR, 'acima', 5.0)
+
+
+def test_cruzamento_no_cooldown_sai_quando_ele_acaba(estado, regra):
+    assert estado.permitir(PAR, regra, valor=5.1, agora=0)
+    assert estado.observar(PAR, 4.9, agora=10) == []          # rearmou
+
+    # Cruzou de novo dentro do cooldown: fica pendente
+    assert not estado.permitir(PAR, regra, valor=5.1, agora=20)
+    assert estado.resumo()['pendentes'] == 1
+    assert estado.observar(PAR, 5.1, agora=50) == []
+
+    # Cooldown acabou com o valor ainda acima: o alerta segurado sai
+    [(adiada, nivel)] = estado.observar(PAR, 5.1, agora=101)
+    assert (adiada.id, adiada.tipo, adiada.limite, nivel) == ('dolar-alto', 'acima', 5.0, 0)
+    assert estado.resumo()['pendentes'] == 0
+    assert estado.contadores['adiados_enviados'] == 1
+
+
+def test_pendente_descartado_se_o_valor_voltou(estado, regra):
+    assert estado.permitir(PAR, regra, valor=5.1, agora=0)
+    assert estado.observar(PAR, 4.9, agora=10) == []
+    assert not estado.permitir(PAR, regra, valor=5.1, agora=20)
+
+    # Voltou para baixo do limite (mas acima do reset) antes do fim do cooldown
+    assert estado.observar(PAR, 4.99, agora=101) == []
+    assert estado.resumo()['pendentes'] == 0
+    assert estado.contadores['adiados_enviados'] == 0
+
+
+def test_histerese_so_rearma_abaixo_do_reset(estado, regra):
+    assert estado.permitir(PAR, regra, valor=5.01, agora=0)
+
+    # 4.97 está abaixo do limite, mas não do reset (4.95): segue desarmada
+    assert estado.observar(PAR, 4.97, agora=150) == []
+    assert not estado.permitir(PAR, regra, valor=5.01, agora=200)
+    assert estado.contadores['suprimidos_histerese'] == 1
+
+    assert estado.observar(PAR, 4.94, agora=250) == []
+    assert estado.contadores['rearmados'] == 1
+    assert estado.permitir(PAR, regra, valor=5.01, agora=300)
+
+
+def test_niveis_de_escalada(estado, regra):
+    assert estado.permitir(PAR, regra, valor=5.05, agora=0)   # 1% além: nível 0
+
+    [(escalada, nivel)] = estado.observar(PAR, 5.12, agora=10)   # 2,4%
+    assert escalada.id == 'dolar-alto' and nivel == 1
+    assert estado.observar(PAR, 5.13, agora=20) == []            # mesmo nível
+
+    [(_, nivel)] = estado.observar(PAR, 5.31, agora=30)          # 6,2%: pula para 3
+    assert nivel == 3
+    assert estado.contadores['escaladas'] == 2
+
+
+def test_escalada_comeca_onde_o_valor_ja_esta(estado, regra):
+    # Já cruzou 5% além: o nível inicial é 2, não vira escalada na próxima cotação
+    assert estado.permitir(PAR, regra, valor=5.25, agora=0)
+    assert estado.observar(PAR, 5.26, agora=10) == []
+
+
+def test_podar_apaga_regras_removidas(estado, regra):
+    outra = Regra('dolar-muito-alto', PAR, 'acima', 6.0)
+    assert estado.permitir(PAR, regra, valor=6.1, agora=0)
+    assert estado.permitir(PAR, outra, valor=6.1, agora=0)
+    assert estado.resumo()['desarmadas'] == 2
+
+    assert estado.podar([regra]) == 1
+    assert estado.resumo()['desarmadas'] == 1
+
+    # Limite novo para a mesma regra também apaga o estado antigo
+    assert estado.podar([Regra('dolar-alto', PAR, 'acima', 5.5)]) == 1
+    assert estado.resumo()['desarmadas'] == 0
+    assert estado.podar([regra]) == 0
+
+    # Sem estado, a regra volta a disparar na hora
+    assert estado.permitir(PAR, outra, valor=6.1, agora=10)
@@ -0,0 +1,93 @@
+"""
+🧪 FILA DO TRELLO CONTRA O SERVIDOR FAKE
+=========================================
+
+- Cards repetidos ainda na fila viram UM só; nenhum é descartado
+- Um 429 com Retry-After pausa TODOS os workers, não só quem o recebeu
+"""
+
+import threading
+import time
+
+from fila_trello import FilaTrello
+from servidores_fake import ServidorFake
+
+CREDENCIAIS = {'api_key': 'k', 'token': 't', 'list_id': 'l'}
+
+
+class ServidorCronometrado(ServidorFake):
+    """ServidorFake que anota a hora de cada requisição e de cada 429"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chegadas = []        # time.monotonic() de cada requisição
+        self.pausas = []          # (time.monotonic(), Retry-After) de cada 429
+        self._trava_horas = threading.Lock()
+
+    def registrar(self, caminho):
+        with self._trava_horas:
+            self.chegadas.append(time.monotonic())
+        super().registrar(caminho)
+
+    def consumir_limite(self, rota):
+        espera = super().consumir_limite(rota)
+        if espera:
+            with self._trava_horas:
+                self.pausas.append((time.monotonic(), espera))
+        return espera
+
+
+def test_repetidos_coalescidos_sem_descarte():
+    distintos, repeticoes = 30, 3
+
+    with ServidorFake(limite_trello=(20, 1.0)) as servidor:
+        fila = FilaTrello(CREDENCIAIS, workers=4, limite_key=(20, 1.0),
+                          limite_token=(20, 1.0), url_base=servidor.url)
+
+        # Enfileira tudo segurando a trava da fila: nenhum worker tira um
+        # card antes das cópias chegarem, então a coalescência é exata
+        with fila._condicao:
+            futuros = [fila.enviar(f"card {indice}", f"versão {rodada}")
+                       for rodada in range(repeticoes) for indice in range(distintos)]
+        fila.fechar(timeout=60)
+
+        numeros = fila.estatisticas()
+        assert numeros['enviados'] == distintos
+        assert numeros['coalescidos'] == distintos * (repeticoes - 1)
+        assert numeros['descartados'] == 0
+        assert numeros['falhas'] == 0
+        assert all(futuro.exception() is None for futuro in futuros)
+
+        # O servidor recebeu cada card UMA vez, com o conteúdo mais novo
+        assert servidor.cards_criados == distintos
+        cards = sorted(servidor.cards.values(), key=lambda card: card['name'])
+        assert sorted(card['name'] for card in cards) == sorted(f"card {i}" for i in range(distintos))
+        assert {card['desc'] for card in cards} == {f"versão {repeticoes - 1}"}
+
+
+def test_retry_after_pausa_todos_os_workers():
+    workers = 8
+
+    # Balde da fila bem acima do limite do servidor: só o Retry-After segura
+    with ServidorCronometrado(limite_trello=(5, 1.0)) as servidor:
+        fila = FilaTrello(CREDENCIAIS, workers=workers, limite_key=(1000, 1.0),
+                          limite_token=(1000, 1.0), url_base=servidor.url)
+        futuros = [fila.enviar(f"card {indice}") for indice in range(20)]
+        fila.fechar(timeout=60)
+
+        assert fila.estatisticas()['respostas_429'] > 0
+        assert all(futuro.exception() is None for futuro in futuros)
+        assert servidor.cards_criados == 20
+
+        # Depois do primeiro 429, as requisições que já estavam a caminho
+        # chegam juntas; a partir daí NENHUM worker fala com o servidor
+        # até o Retry-After vencer
+        inicio, espera = servidor.pausas[0]
+        margem = 0.05
+        durante_a_pausa = [chegada for chegada in servidor.chegadas
+                           if inicio + margem < chegada < inicio + espera - margem]
+        assert durante_a_pausa == []
+
+        # Sem a pausa global cada worker repetiria na hora: bem mais 429
+        # do que os que chegam na mesma leva de cada janela
+        assert fila.estatisticas()['respostas_429'] <= workers * 4
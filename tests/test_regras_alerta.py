@@ -0,0 +1,66 @@
+"""
+🧪 MOTOR DE REGRAS: CRUZAMENTOS E FAIXAS
+=========================================
+"""
+
+from regras_alerta import MotorRegras, regras_de_dict
+
+PAR = 'GBP-BRL'
+
+
+def criar_motor():
+    faixa = {'id': 'libra-faixa', 'par': PAR, 'tipo': 'faixa', 'minimo': 6.5, 'maximo': 7.2}
+    return MotorRegras(regras_de_dict(faixa))
+
+
+def descrever(regras):
+    return sorted((regra.id, regra.tipo, regra.limite) for regra in regras)
+
+
+def test_faixa_vira_duas_regras_com_o_mesmo_id():
+    assert descrever(criar_motor().regras()) == [
+        ('libra-faixa', 'abaixo', 6.5),
+        ('libra-faixa', 'acima', 7.2),
+    ]
+
+
+def test_cruzamento_subindo_e_descendo():
+    motor = criar_motor()
+    assert motor.avaliar(PAR, 7.0) == []                     # dentro da faixa
+
+    assert descrever(motor.avaliar(PAR, 7.3)) == [('libra-faixa', 'acima', 7.2)]
+    assert motor.avaliar(PAR, 7.4) == []                     # já estava fora
+    assert motor.avaliar(PAR, 7.0) == []                     # voltou: não é cruzamento
+
+    assert descrever(motor.avaliar(PAR, 6.4)) == [('libra-faixa', 'abaixo', 6.5)]
+    assert motor.avaliar(PAR, 6.3) == []
+
+
+def test_limite_exato_nao_dispara():
+    motor = criar_motor()
+    motor.avaliar(PAR, 7.0)
+    assert motor.avaliar(PAR, 7.2) == []                     # "acima" é estrito
+    assert descrever(motor.avaliar(PAR, 7.21)) == [('libra-faixa', 'acima', 7.2)]
+
+
+def test_primeira_cotacao_fora_da_faixa_dispara():
+    motor = criar_motor()
+    assert descrever(motor.avaliar(PAR, 6.0)) == [('libra-faixa', 'abaixo', 6.5)]
+
+
+def test_satisfeitas_nao_muda_o_valor_anterior():
+    motor = criar_motor()
+    motor.avaliar(PAR, 7.0)
+
+    assert descrever(motor.satisfeitas(PAR, 7.3)) == [('libra-faixa', 'acima', 7.2)]
+    assert descrever(motor.satisfeitas(PAR, 6.4)) == [('libra-faixa', 'abaixo', 6.5)]
+    assert motor.satisfeitas(PAR, 7.0) == []
+
+    # O cruzamento continua sendo detectado a partir de 7.0
+    assert descrever(motor.avaliar(PAR, 7.3)) == [('libra-faixa', 'acima', 7.2)]
+
+
+def test_par_sem_regras():
+    motor = criar_motor()
+    assert motor.avaliar('USD-BRL', 5.0) == []
+    assert motor.satisfeitas('USD-BRL', 5.0) == []